@@ -0,0 +1,273 @@
+# agg_trades.py
+# -*- coding: utf-8 -*-
+"""
+바이낸스 스팟 aggTrades(체결 묶음) 이력 다운로더.
+- fromId로 페이지 이동: aggTrade id는 심볼마다 0부터 연속 → [from_id, to_id]를 1000개 단위 구간으로 잘라 동시 요청
+- 가중치 예산(WeightBudget)/커넥션 풀은 kline 수집과 같은 것을 공유 가능
+- 저장: {root}/{symbol}/aggTrades/part-{시작 id:012d}.parquet, 파트 하나 = id part_rows개 구간
+  컬럼 id/time/firstId/lastId int64, price/qty float64, maker bool
+- 받은 순서대로 현재 파트 버퍼에만 쌓고 파트가 차면 기록 → 메모리는 체결 수와 무관 (파트 1개 + 동시 요청분)
+- 증분: 마지막 파트의 마지막 id 이후부터 이어 받음 (덜 찬 마지막 파트는 읽어서 이어 씀)
+"""
+
+import os
+import glob
+import datetime as dt
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
+
+from multi_symbols_to_csv import API_BASE, WeightBudget, make_session, request_json, to_ms
+
+AGG_URL = f"{API_BASE}/api/v3/aggTrades"
+AGG_WEIGHT = 4           # /api/v3/aggTrades 요청 1회 가중치
+AGG_LIMIT = 1000         # 요청당 최대 행 수
+TRADES_ROOT = "trade_store"
+PART_ROWS = 1_000_000
+
+AGG_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("time", pa.int64()),
+    ("price", pa.float64()),
+    ("qty", pa.float64()),
+    ("firstId", pa.int64()),
+    ("lastId", pa.int64()),
+    ("maker", pa.bool_()),
+])
+AGG_COLUMNS = AGG_SCHEMA.names
+AGG_DTYPES = {f.name: np.dtype(f.type.to_pandas_dtype()) for f in AGG_SCHEMA}
+# 응답 필드 → 컬럼
+AGG_FIELDS = {"id": "a", "time": "T", "price": "p", "qty": "q", "firstId": "f", "lastId": "l", "maker": "m"}
+
+
+def agg_dir(root: str, symbol: str) -> str:
+    return os.path.join(root, symbol.upper(), "aggTrades")
+
+
+def decode_agg_chunk(chunk: list) -> dict:
+    """aggTrades 응답(list of dict) → 컬럼명 → NumPy 배열."""
+    return {c: np.array([t[k] for t in chunk]).astype(AGG_DTYPES[c]) for c, k in AGG_FIELDS.items()}
+
+
+def _get_agg(session, params, budget, pause=0.25, max_retries=4):
+    return request_json(session, AGG_URL, params, AGG_WEIGHT, pause, max_retries, budget)
+
+
+def latest_agg_id(symbol: str, session: Optional[requests.Session] = None,
+                  budget: Optional[WeightBudget] = None) -> Optional[int]:
+    """현재 마지막 aggTrade id (없으면 None)."""
+    session = session or make_session(1)
+    chunk = _get_agg(session, {"symbol": symbol.upper(), "limit": 1}, budget)
+    return int(chunk[-1]["a"]) if chunk else None
+
+
+def find_id_by_time(symbol: str, t: dt.datetime, session: Optional[requests.Session] = None,
+                    budget: Optional[WeightBudget] = None) -> Optional[int]:
+    """
+    시각 t 이후 첫 aggTrade id. t 이후 체결이 없으면 None.
+    먼저 [t, t+1h) 구간을 한 번 조회하고, 그 한 시간에 체결이 없으면 id 이진 탐색 (최대 ~35회).
+    """
+    session = session or make_session(1)
+    t_ms = to_ms(t)
+    sym = symbol.upper()
+    chunk = _get_agg(session, {"symbol": sym, "startTime": t_ms,
+                               "endTime": t_ms + 3_599_999, "limit": 1}, budget)
+    if chunk:
+        return int(chunk[0]["a"])
+
+    hi = latest_agg_id(sym, session, budget)
+    if hi is None:
+        return None
+    lo = 0
+    while lo < hi:  # time(id) >= t_ms 인 가장 작은 id
+        mid = (lo + hi) // 2
+        row = _get_agg(session, {"symbol": sym, "fromId": mid, "limit": 1}, budget)
+        if row is None:
+            raise RuntimeError(f"{sym}: aggTrades request failed at fromId={mid}")
+        if not row or int(row[0]["T"]) < t_ms:
+            lo = (int(row[0]["a"]) if row else mid) + 1
+        else:
+            hi = mid
+    row = _get_agg(session, {"symbol": sym, "fromId": lo, "limit": 1}, budget)
+    return lo if row and int(row[0]["T"]) >= t_ms else None
+
+
+def split_id_windows(from_id: int, to_id: int, limit: int = AGG_LIMIT) -> List[Tuple[int, int]]:
+    """[from_id, to_id]를 (fromId, limit) 요청들로 분할."""
+    return [(s, min(limit, to_id - s + 1)) for s in range(from_id, to_id + 1, limit)]
+
+
+def iter_agg_trades(symbol: str, from_id: int, to_id: int, workers: int = 8,
+                    budget: Optional[WeightBudget] = None,
+                    session: Optional[requests.Session] = None,
+                    pause: float = 0.25, max_retries: int = 4) -> Iterator[dict]:
+    """
+    id ∈ [from_id, to_id] aggTrades를 id순 컬럼 배열 chunk(dict)로 yield.
+    구간들을 동시에 요청하되 앞서 나간 요청은 workers×2개까지만 유지.
+    끝내 실패한 구간이 있으면 거기서 멈춤 (id가 끊긴 채 저장되지 않도록 → 다음 실행 때 그 id부터 재개).
+    """
+    sym = symbol.upper()
+    session = session or make_session(max(workers, 1))
+    if budget is None:
+        budget = WeightBudget()
+
+    def fetch(win):
+        chunk = _get_agg(session, {"symbol": sym, "fromId": win[0], "limit": win[1]},
+                         budget, pause, max_retries)
+        return None if chunk is None else [t for t in chunk if t["a"] <= to_id]
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        pending: deque = deque()
+        it = iter(split_id_windows(from_id, to_id))
+        for win in islice(it, workers * 2):
+            pending.append((win, ex.submit(fetch, win)))
+        while pending:
+            win, fut = pending.popleft()
+            chunk = fut.result()
+            if chunk is None:
+                print(f"[WARN] {sym}: aggTrades request failed at fromId={win[0]}, stop here.")
+                for _, f in pending:
+                    f.cancel()
+                return
+            for nxt in islice(it, 1):
+                pending.append((nxt, ex.submit(fetch, nxt)))
+            if chunk:
+                yield decode_agg_chunk(chunk)
+
+
+# ---- 파트 파일 ----
+
+def list_parts(symbol: str, root: str = TRADES_ROOT) -> List[str]:
+    return sorted(glob.glob(os.path.join(agg_dir(root, symbol), "part-*.parquet")))
+
+
+def part_start_id(path: str) -> int:
+    return int(os.path.basename(path)[5:-8])
+
+
+def last_agg_id(symbol: str, root: str = TRADES_ROOT) -> Optional[int]:
+    """저장된 마지막 aggTrade id (없으면 None)."""
+    parts = list_parts(symbol, root)
+    if not parts:
+        return None
+    ids = pq.read_table(parts[-1], columns=["id"]).column("id").to_numpy()
+    return int(ids[-1]) if len(ids) else None
+
+
+def _write_part(base: str, start_id: int, cols: List[dict]) -> int:
+    table = pa.Table.from_arrays(
+        [pa.array(np.concatenate([c[name] for c in cols])) for name in AGG_COLUMNS], schema=AGG_SCHEMA)
+    path = os.path.join(base, f"part-{start_id:012d}.parquet")
+    tmp = path + ".tmp"
+    pq.write_table(table, tmp, row_group_size=128_000, compression="zstd")
+    os.replace(tmp, path)
+    return table.num_rows
+
+
+def save_agg_trades(symbol: str, start: Optional[dt.datetime] = None, to_id: Optional[int] = None,
+                    workers: int = 8, budget: Optional[WeightBudget] = None,
+                    session: Optional[requests.Session] = None,
+                    root: str = TRADES_ROOT, part_rows: int = PART_ROWS) -> int:
+    """
+    심볼 하나의 aggTrades를 파트 파일로 저장/증분 갱신. 새로 받은 행 수 반환.
+    처음이면 start 시각(None이면 id 0)부터, 이미 저장돼 있으면 마지막 id 다음부터 to_id(None이면 현재)까지.
+    """
+    sym = symbol.upper()
+    session = session or make_session(max(workers, 1))
+    base = agg_dir(root, sym)
+    os.makedirs(base, exist_ok=True)
+
+    last = last_agg_id(sym, root)
+    if last is not None:
+        from_id = last + 1
+    elif start is not None:
+        from_id = find_id_by_time(sym, start, session, budget)
+        if from_id is None:
+            print(f"[INFO] {sym}: no aggTrades after {start}.")
+            return 0
+    else:
+        from_id = 0
+    if to_id is None:
+        to_id = latest_agg_id(sym, session, budget)
+    if to_id is None or from_id > to_id:
+        return 0
+
+    # 덜 찬 마지막 파트는 버퍼로 읽어 와서 이어 씀
+    part_id = from_id // part_rows * part_rows
+    cols: List[dict] = []
+    buffered = 0
+    parts = list_parts(sym, root)
+    if parts and part_start_id(parts[-1]) == part_id:
+        t = pq.read_table(parts[-1], schema=AGG_SCHEMA)
+        cols.append({c: t.column(c).to_numpy() for c in AGG_COLUMNS})
+        buffered = t.num_rows
+
+    added = 0
+    for chunk in iter_agg_trades(sym, from_id, to_id, workers, budget, session):
+        ids = chunk["id"]
+        while len(ids):
+            cut = int(np.searchsorted(ids, part_id + part_rows))
+            cols.append({c: a[:cut] for c, a in chunk.items()})
+            buffered += cut
+            added += cut
+            if cut == len(ids):
+                break
+            _write_part(base, part_id, cols)  # 파트가 참 → 기록하고 다음 파트로
+            cols, buffered = [], 0
+            chunk = {c: a[cut:] for c, a in chunk.items()}
+            ids = chunk["id"]
+            part_id = int(ids[0]) // part_rows * part_rows
+    if buffered:
+        _write_part(base, part_id, cols)
+    print(f"[OK] {sym} aggTrades +{added} (id {from_id}~{to_id})")
+    return added
+
+
+def iter_parts(symbol: str, from_id: int = 0, columns: Optional[List[str]] = None,
+               root: str = TRADES_ROOT) -> Iterator[pa.Table]:
+    """저장된 aggTrades를 파트 단위 Table로 id순 yield (id >= from_id만)."""
+    parts = list_parts(symbol, root)
+    cols = list(columns) if columns else AGG_COLUMNS
+    if "id" not in cols:
+        cols = ["id"] + cols
+    for i, path in enumerate(parts):
+        if i + 1 < len(parts) and part_start_id(parts[i + 1]) <= from_id:
+            continue
+        t = pq.read_table(path, columns=cols, schema=AGG_SCHEMA)
+        if from_id > part_start_id(path):
+            t = t.slice(int(np.searchsorted(t.column("id").to_numpy(), from_id)))
+        if t.num_rows:
+            yield t
+
+
+def read_agg_trades(symbol: str, start: Optional[dt.datetime] = None, end: Optional[dt.datetime] = None,
+                    columns: Optional[List[str]] = None, root: str = TRADES_ROOT) -> pa.Table:
+    """time ∈ [start, end] 구간 aggTrades (row group 통계로 필요한 부분만 읽음)."""
+    filters = []
+    if start is not None:
+        filters.append(("time", ">=", to_ms(start)))
+    if end is not None:
+        filters.append(("time", "<=", to_ms(end)))
+    cols = list(columns) if columns else AGG_COLUMNS
+    tables = [pq.read_table(p, columns=cols, filters=filters or None, schema=AGG_SCHEMA)
+              for p in list_parts(symbol, root)]
+    tables = [t for t in tables if t.num_rows]
+    return pa.concat_tables(tables) if tables else AGG_SCHEMA.empty_table().select(cols)
+
+
+if __name__ == "__main__":
+    # 🔧 설정
+    symbols = ["BTCUSDT", "ETHUSDT"]
+    start = dt.datetime(2024, 1, 1)  # 처음 받을 때만 사용 (이후는 이어 받기)
+    workers = 8
+
+    budget = WeightBudget()
+    session = make_session(workers)
+    for sym in symbols:
+        save_agg_trades(sym, start, workers=workers, budget=budget, session=session)
@@ -0,0 +1,144 @@
+# bench_klines.py
+# -*- coding: utf-8 -*-
+"""
+kline 수집 파이프라인 처리량 측정 (mock_binance 로컬 대역 서버 사용, 실 API 호출 없음).
+단계별(fetch / convert / write) + end-to-end(run_symbols)로
+rows/s, requests/s, 단계 중 최대 RSS 증가량(현재 RSS 표본 기준), 경과 시간을 심볼 수 × interval 조합마다 출력합니다.
+
+예:
+    python bench_klines.py --symbols 1,4,16 --intervals 1h,15m --days 365 --workers 8
+    python bench_klines.py --latency 0.05 --rate-429 0.02
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import threading
+import datetime as dt
+
+from mock_binance import MockBinance
+
+
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_mb() -> float:
+    """
+    현재 RSS (MB). Linux는 /proc/self/statm.
+    /proc이 없으면(macOS 등) 프로세스 최대 RSS(ru_maxrss)로 대신 → 앞 단계보다 작게 쓴 단계는 0으로 나옴.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE / (1024 * 1024)
+    except OSError:
+        r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return r / (1024 * 1024) if sys.platform == "darwin" else r / 1024
+
+
+class Stage:
+    """
+    with 블록 하나의 경과 시간/요청 수/RSS 증가량 측정.
+    ru_maxrss는 프로세스 평생 최대값이라 앞 단계가 더 많이 썼으면 증가량이 0이 됨
+    → 블록 동안 현재 RSS를 sample초마다 재서 (블록 중 최대 - 시작 값)을 증가량으로.
+    """
+
+    def __init__(self, server: MockBinance, sample: float = 0.005):
+        self.server = server
+        self.sample = sample
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.sample):
+            self._peak = max(self._peak, rss_mb())
+
+    def __enter__(self):
+        self.rss0 = self._peak = rss_mb()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._watch, daemon=True)
+        self._sampler.start()
+        self.t0 = time.perf_counter()
+        self.req0 = self.server.requests
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.t0
+        self.reqs = self.server.requests - self.req0
+        self._stop.set()
+        self._sampler.join()
+        self.rss = max(self._peak, rss_mb()) - self.rss0
+
+
+def report(name: str, n_sym: int, interval: str, rows: int, st: Stage) -> None:
+    print(f"{name:8s} sym={n_sym:<3d} {interval:>4s}  rows={rows:<10d} "
+          f"wall={st.wall:8.3f}s  rows/s={rows / st.wall:12.0f}  "
+          f"req/s={st.reqs / st.wall:8.1f}  ΔRSS={st.rss:8.1f}MB")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--symbols", default="1,4", help="심볼 수 목록 (쉼표 구분)")
+    ap.add_argument("--intervals", default="1h,15m")
+    ap.add_argument("--days", type=int, default=365, help="수집 기간 (일)")
+    ap.add_argument("--workers", type=int, default=8, help="심볼당 샤딩 동시 요청 수")
+    ap.add_argument("--max-symbols", type=int, default=4, help="동시에 처리할 심볼 수")
+    ap.add_argument("--latency", type=float, default=0.0, help="mock 응답 지연 (초)")
+    ap.add_argument("--rate-429", type=float, default=0.0, help="mock 무작위 429 비율")
+    args = ap.parse_args()
+
+    server = MockBinance(latency=args.latency, rate_429=args.rate_429, retry_after=0.05,
+                         now_ms=int(dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc).timestamp() * 1000))
+    server.start()
+    os.environ["BINANCE_API_BASE"] = server.url
+    import multi_symbols_to_csv as msc  # BASE_URL이 mock을 가리키도록 환경변수 설정 후 import
+    from kline_store import buffer_to_table, write_klines
+
+    end = dt.datetime(2024, 12, 31, 23, 59, 59)
+    start = end - dt.timedelta(days=args.days)
+    workdir = tempfile.mkdtemp(prefix="bench_klines_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        for interval in args.intervals.split(","):
+            for n_sym in (int(x) for x in args.symbols.split(",")):
+                symbols = [f"BENCH{i:03d}USDT" for i in range(n_sym)]
+                budget = msc.WeightBudget()
+                session = msc.make_session(args.workers)
+
+                with Stage(server) as st:
+                    bufs = [msc.fetch_kline_arrays(s, interval, start, end, workers=args.workers,
+                                                   budget=budget, session=session) for s in symbols]
+                rows = sum(len(b) for b in bufs)
+                report("fetch", n_sym, interval, rows, st)
+
+                with Stage(server) as st:
+                    frames = [b.to_frame(tz="Asia/Seoul") for b in bufs]
+                report("convert", n_sym, interval, rows, st)
+
+                with Stage(server) as st:
+                    for s, df in zip(symbols, frames):
+                        df.to_csv(f"{s}_{interval}.csv", index=False, encoding="utf-8-sig")
+                report("csv", n_sym, interval, rows, st)
+
+                with Stage(server) as st:
+                    for s, b in zip(symbols, bufs):
+                        write_klines(buffer_to_table(b), s, interval, root="store")
+                report("parquet", n_sym, interval, rows, st)
+                del bufs, frames
+
+                with Stage(server) as st:
+                    msc.run_symbols(symbols, interval, start, end, max_symbols=args.max_symbols,
+                                    workers=args.workers)
+                report("e2e", n_sym, interval, rows, st)
+                print()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+        server.stop()
+    print(f"[MOCK] requests={server.requests} throttled={server.throttled}")
+
+
+if __name__ == "__main__":
+    main()
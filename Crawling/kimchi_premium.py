@@ -0,0 +1,201 @@
+# kimchi_premium.py
+# -*- coding: utf-8 -*-
+"""
+김치 프리미엄 = 업비트 KRW 가격 / (바이낸스 USDT 가격 × 원/USDT 환율) - 1
+- 환율: 업비트 KRW-USDT (기본) 또는 고정 숫자
+- 과거: 업비트 저장소(upbit_klines)와 바이낸스 저장소(kline_store)에 둘 다 있는 모든 쌍을
+  한 시간 격자에 맞춰 (T, 쌍) 배열로 한 번에 계산 → kline_panel.Panel
+- 실시간: 업비트 ticker + 바이낸스 miniTicker 웹소켓으로 쌍별 최신가만 갱신, every초마다 전체 김프 벡터 계산
+  out을 주면 {시각, 쌍별 김프} 행을 CSV에 이어 붙임
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import datetime as dt
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import websockets
+
+from multi_symbols_to_csv import INTERVAL_MS, KST
+from kline_store import STORE_ROOT, read_table
+from kline_gaps import stored_symbols
+from kline_panel import Panel
+from kline_ws import WS_BASE
+from upbit_klines import UPBIT_ROOT
+
+UPBIT_WS_BASE = os.getenv("UPBIT_WS_BASE", "wss://api.upbit.com/websocket/v1")
+FX_MARKET = "KRW-USDT"
+PREMIUM_FIELDS = ["krw", "usdt", "fx", "premium"]
+
+
+def pair_of(market: str) -> str:
+    """KRW-BTC → BTCUSDT"""
+    return market.split("-", 1)[1] + "USDT"
+
+
+def overlapping_pairs(interval: str, upbit_root: str = UPBIT_ROOT,
+                      binance_root: str = STORE_ROOT) -> List[Tuple[str, str]]:
+    """두 저장소에 모두 있는 (업비트 마켓, 바이낸스 심볼) 쌍."""
+    binance = set(stored_symbols(interval, binance_root))
+    return [(m, pair_of(m)) for m in stored_symbols(interval, upbit_root)
+            if m.startswith("KRW-") and m != FX_MARKET and pair_of(m) in binance]
+
+
+def _closes(symbol: str, interval: str, t0: Optional[int], t1: Optional[int], root: str):
+    t = read_table(symbol, interval, t0, t1, ["openTime", "close"], root)
+    return t.column("openTime").to_numpy(), t.column("close").to_numpy()
+
+
+def premium_panel(interval: str, pairs: Optional[List[Tuple[str, str]]] = None,
+                  t0: Optional[int] = None, t1: Optional[int] = None,
+                  fx: Union[str, float] = FX_MARKET,
+                  upbit_root: str = UPBIT_ROOT, binance_root: str = STORE_ROOT) -> Panel:
+    """
+    openTime 격자 × 쌍 × [krw, usdt, fx, premium] 패널 (종가 기준, UTC ms 구간 [t0, t1]).
+    mask는 세 가격이 모두 있는 칸. symbols는 업비트 마켓 코드.
+    """
+    pairs = pairs if pairs is not None else overlapping_pairs(interval, upbit_root, binance_root)
+    step = INTERVAL_MS[interval]
+    series = []
+    for market, symbol in pairs:
+        series.append(_closes(market, interval, t0, t1, upbit_root))
+        series.append(_closes(symbol, interval, t0, t1, binance_root))
+    fx_series = _closes(fx, interval, t0, t1, upbit_root) if isinstance(fx, str) else None
+
+    opens = [ot for ot, _ in series + ([fx_series] if fx_series is not None else []) if len(ot)]
+    if not pairs or not opens:
+        return Panel(np.empty(0, np.int64), [m for m, _ in pairs], PREMIUM_FIELDS,
+                     np.empty((0, len(pairs), 4)), np.empty((0, len(pairs)), bool))
+    g0 = min(int(o[0]) for o in opens)
+    g1 = max(int(o[-1]) for o in opens)
+    times = np.arange(g0, g1 + 1, step, dtype=np.int64)
+
+    def place(ot, close):
+        col = np.full(len(times), np.nan)
+        col[(ot - g0) // step] = close
+        return col
+
+    krw = np.stack([place(*series[2 * i]) for i in range(len(pairs))], axis=1)
+    usdt = np.stack([place(*series[2 * i + 1]) for i in range(len(pairs))], axis=1)
+    rate = place(*fx_series) if fx_series is not None else np.full(len(times), float(fx))
+    rate = np.broadcast_to(rate[:, None], krw.shape)
+    prem = krw / (usdt * rate) - 1.0
+    values = np.stack([krw, usdt, rate, prem], axis=2)
+    return Panel(times, [m for m, _ in pairs], PREMIUM_FIELDS, values, ~np.isnan(prem))
+
+
+class PremiumStream:
+    """
+    실시간 김프. 쌍별 최신가 배열(krw/usdt)과 환율만 들고 있다가 메시지마다 한 칸씩 갱신.
+    premium()은 전체 쌍을 한 번에 계산.
+    """
+
+    def __init__(self, markets: List[str], fx: Union[str, float] = FX_MARKET,
+                 every: float = 1.0, out: Optional[str] = None):
+        self.markets = [m.upper() for m in markets]
+        self.symbols = [pair_of(m) for m in self.markets]
+        self._krw_idx = {m: i for i, m in enumerate(self.markets)}
+        self._usdt_idx = {s: i for i, s in enumerate(self.symbols)}
+        self.krw = np.full(len(self.markets), np.nan)
+        self.usdt = np.full(len(self.markets), np.nan)
+        self.fx_market = fx if isinstance(fx, str) else None
+        self.fx = np.nan if isinstance(fx, str) else float(fx)
+        self.every = every
+        self.out = out
+        self.received = 0
+
+    def premium(self) -> np.ndarray:
+        return self.krw / (self.usdt * self.fx) - 1.0
+
+    def on_upbit(self, msg) -> None:
+        d = json.loads(msg)
+        code, price = d.get("code"), d.get("trade_price")
+        if price is None:
+            return
+        if code == self.fx_market:
+            self.fx = float(price)
+        elif code in self._krw_idx:
+            self.krw[self._krw_idx[code]] = float(price)
+        self.received += 1
+
+    def on_binance(self, msg) -> None:
+        d = json.loads(msg).get("data", {})
+        i = self._usdt_idx.get(d.get("s", "").upper())
+        if i is not None and "c" in d:
+            self.usdt[i] = float(d["c"])
+            self.received += 1
+
+    async def _upbit_loop(self) -> None:
+        codes = self.markets + ([self.fx_market] if self.fx_market else [])
+        sub = json.dumps([{"ticket": str(uuid.uuid4())}, {"type": "ticker", "codes": codes}])
+        await self._ws_loop(UPBIT_WS_BASE, self.on_upbit, sub)
+
+    async def _binance_loop(self) -> None:
+        streams = "/".join(f"{s.lower()}@miniTicker" for s in self.symbols)
+        await self._ws_loop(f"{WS_BASE}/stream?streams={streams}", self.on_binance)
+
+    async def _ws_loop(self, url: str, handler, subscribe: Optional[str] = None) -> None:
+        retry = 1.0
+        while True:
+            try:
+                async with websockets.connect(url, max_size=None) as ws:
+                    retry = 1.0
+                    if subscribe:
+                        await ws.send(subscribe)
+                    async for msg in ws:
+                        handler(msg)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[PREMIUM] {url.split('?')[0]}: {e}; reconnect in {retry:.0f}s")
+            await asyncio.sleep(retry)
+            retry = min(retry * 2, 60.0)
+
+    def _append(self, t_ms: int, prem: np.ndarray) -> None:
+        new = not os.path.exists(self.out)
+        with open(self.out, "a", encoding="utf-8-sig" if new else "utf-8", newline="") as f:
+            if new:
+                f.write(",".join(["time"] + self.markets) + "\n")
+            ts = dt.datetime.fromtimestamp(t_ms / 1000, KST).replace(tzinfo=None).isoformat(sep=" ", timespec="milliseconds")
+            f.write(",".join([ts] + ["" if np.isnan(p) else f"{p:.6f}" for p in prem]) + "\n")
+
+    async def _emit_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.every)
+            prem = self.premium()
+            if self.out:
+                self._append(int(time.time() * 1000), prem)
+            else:
+                ok = ~np.isnan(prem)
+                if ok.any():
+                    top = np.argsort(-np.abs(np.where(ok, prem, 0.0)))[:5]
+                    print("  ".join(f"{self.markets[i]} {prem[i]:+.2%}" for i in top if ok[i]))
+
+    async def run(self) -> None:
+        await asyncio.gather(self._upbit_loop(), self._binance_loop(), self._emit_loop())
+
+
+if __name__ == "__main__":
+    # 🔧 설정
+    interval = "1h"
+    live = False  # True면 실시간 스트림
+
+    if live:
+        markets = [m for m, _ in overlapping_pairs(interval)] or ["KRW-BTC", "KRW-ETH", "KRW-XRP"]
+        stream = PremiumStream(markets, out="kimchi_premium_live.csv")
+        try:
+            asyncio.run(stream.run())
+        except KeyboardInterrupt:
+            print(f"bye (received={stream.received})")
+    else:
+        panel = premium_panel(interval)
+        prem = panel.field("premium")
+        print(f"pairs={len(panel.symbols)} T={len(panel.times)} coverage={panel.mask.mean():.1%}")
+        with np.errstate(all="ignore"):
+            last = prem[-24 * 30:]
+            for m, mean in sorted(zip(panel.symbols, np.nanmean(last, axis=0)), key=lambda x: -abs(x[1]))[:10]:
+                print(f"{m:12s} 30d mean premium {mean:+.2%}")
@@ -0,0 +1,113 @@
+# kline_archive.py
+# -*- coding: utf-8 -*-
+"""
+바이낸스 공개 아카이브(data.binance.vision)의 월/일 단위 kline zip을 일괄 적재합니다.
+- 입력: 로컬 미러 디렉터리 (예: BTCUSDT-1m-2021-03.zip, BTCUSDT-1m-2024-06-15.zip)
+- zip 해제/파싱은 프로세스 풀로 코어 수만큼 병렬 처리
+- 결과는 save_symbol_csv와 동일한 스키마(CSV) 또는 kline_store 파티션으로 저장
+- 아카이브 이후의 최근 구간(tail)만 REST(get_binance_klines)로 보충
+"""
+
+import os
+import re
+import glob
+import zipfile
+import datetime as dt
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from multi_symbols_to_csv import KLINE_COLUMNS, KLINE_DTYPES, KlineBuffer, fetch_kline_arrays
+
+# BTCUSDT-1m-2021-03.zip / BTCUSDT-1m-2021-03-15.zip
+ARCHIVE_RE = re.compile(r"^(?P<symbol>[A-Z0-9]+)-(?P<interval>\w+)-(?P<date>\d{4}-\d{2}(?:-\d{2})?)\.zip$")
+
+
+def list_archives(path: str, symbol: str, interval: str) -> List[str]:
+    """path 아래(하위 폴더 포함)에서 symbol/interval zip을 기간 시작 순으로 정렬해 반환."""
+    found = []
+    for f in glob.glob(os.path.join(path, "**", "*.zip"), recursive=True):
+        m = ARCHIVE_RE.match(os.path.basename(f))
+        if m and m["symbol"] == symbol.upper() and m["interval"] == interval:
+            date = m["date"] if len(m["date"]) == 10 else m["date"] + "-00"  # 월 파일이 같은 달 일 파일보다 앞
+            found.append((date, f))
+    return [f for _, f in sorted(found)]
+
+
+def read_archive(path: str) -> Dict[str, np.ndarray]:
+    """zip 하나 → 컬럼명 → 배열. (헤더 유무, 2025년 이후 μs 타임스탬프 모두 처리)"""
+    with zipfile.ZipFile(path) as zf:
+        name = zf.namelist()[0]
+        with zf.open(name) as f:
+            first = f.readline()
+        header = 0 if not first[:1].isdigit() else None
+        with zf.open(name) as f:
+            df = pd.read_csv(f, header=header, names=KLINE_COLUMNS, usecols=range(11),
+                             dtype={c: t for c, t in KLINE_DTYPES.items()})
+    cols = {c: df[c].to_numpy() for c in KLINE_DTYPES}
+    for c in ("openTime", "closeTime"):
+        if len(cols[c]) and cols[c][0] > 10**14:  # μs → ms
+            cols[c] = cols[c] // 1000
+    return cols
+
+
+def load_archives(path: str, symbol: str, interval: str, procs: Optional[int] = None,
+                  buffer: Optional[KlineBuffer] = None) -> KlineBuffer:
+    """디렉터리의 zip들을 병렬로 디코딩해 기간 순서대로 KlineBuffer에 적재."""
+    files = list_archives(path, symbol, interval)
+    if buffer is None:
+        buffer = KlineBuffer()
+    if not files:
+        return buffer
+    with ProcessPoolExecutor(max_workers=procs) as ex:
+        for cols in ex.map(read_archive, files, chunksize=4):  # 파일 순서 유지
+            buffer.extend_arrays(cols)
+    return buffer
+
+
+def import_archives(path: str, symbol: str, interval: str, fetch_tail: bool = True,
+                    out: str = "csv", procs: Optional[int] = None, workers: int = 4) -> int:
+    """
+    아카이브 일괄 적재 + (선택) 최근 구간 REST 보충 후 저장. 저장한 행 수 반환.
+    out="csv"  : {symbol}_{interval}_{first}_{last}.csv (save_symbol_csv와 동일 형식)
+    out="store": kline_store 파티션
+    """
+    buf = load_archives(path, symbol, interval, procs)
+
+    if fetch_tail:
+        ot = buf.arrays()["openTime"]
+        start = (dt.datetime.fromtimestamp((int(ot[-1]) + 1) / 1000, dt.timezone.utc)
+                 if len(ot) else dt.datetime(2017, 1, 1, tzinfo=dt.timezone.utc))
+        end = dt.datetime.now(dt.timezone.utc)
+        now_ms = int(end.timestamp() * 1000)
+        tail = fetch_kline_arrays(symbol, interval, start, end, workers=workers)
+        closed = tail.arrays()["closeTime"] < now_ms  # 진행 중인 봉 제외
+        buf.extend_arrays({c: a[closed] for c, a in tail.arrays().items()})
+
+    if not len(buf):
+        print(f"[INFO] {symbol}: no archive data under {path}. skipped.")
+        return 0
+
+    if out == "store":
+        from kline_store import buffer_to_table, write_klines
+        write_klines(buffer_to_table(buf), symbol, interval)
+        print(f"[OK] stored {symbol} {interval} (rows={len(buf)})")
+    else:
+        df = buf.to_frame(tz="Asia/Seoul")
+        first, last = df["openTime"].iloc[0].date(), df["openTime"].iloc[-1].date()
+        out_name = f"{symbol}_{interval}_{first}_{last}.csv"
+        df.to_csv(out_name, index=False, encoding="utf-8-sig")
+        print(f"[OK] saved {out_name} (rows={len(df)})")
+    return len(buf)
+
+
+if __name__ == "__main__":
+    # 🔧 설정
+    archive_dir = "binance_archive"   # data.binance.vision에서 받아둔 zip 미러
+    symbols = ["BTCUSDT", "ETHUSDT"]
+    interval = "1m"
+
+    for sym in symbols:
+        import_archives(archive_dir, sym, interval, fetch_tail=True, out="store")
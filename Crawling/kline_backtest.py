@@ -0,0 +1,136 @@
+# kline_backtest.py
+# -*- coding: utf-8 -*-
+"""
+kline 패널 위의 벡터화 백테스터.
+- 입력: 종가 (T, S) + 목표 포지션 신호 (T, S) 또는 파라미터 묶음 (P, T, S), 값은 -1 ~ 1
+- t 봉 종가에 낸 신호는 t+1 봉 수익률에 적용 (미래 참조 없음)
+- 비용: |포지션 변화| × (fee + slippage) bps, 데이터 없는 칸은 포지션 0
+- 파라미터 스윕: 그리드를 나눠 프로세스 풀에서 계산 (종가 배열은 워커당 한 번만 전달)
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from multi_symbols_to_csv import INTERVAL_MS
+
+YEAR_MS = 365 * 86_400_000
+
+
+def bar_returns(close: np.ndarray) -> np.ndarray:
+    """(T, S) 단순 수익률. 첫 봉/빈 칸은 0."""
+    r = np.zeros_like(close, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r[1:] = close[1:] / close[:-1] - 1.0
+    return np.nan_to_num(r, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def backtest(close: np.ndarray, signal: np.ndarray, fee_bps: float = 10.0,
+             slippage_bps: float = 5.0, bars_per_year: float = 8760.0) -> Dict[str, np.ndarray]:
+    """
+    signal: (T, S) 또는 (P, T, S). 반환 통계는 파라미터(P)별 배열 (심볼은 동일 가중 포트폴리오).
+    pnl: (P, T) 봉별 포트폴리오 수익률도 함께 반환.
+    """
+    sig = np.asarray(signal, dtype=np.float64)
+    if sig.ndim == 2:
+        sig = sig[None]
+    valid = ~np.isnan(close)
+    r = bar_returns(close)
+
+    pos = np.zeros_like(sig)
+    pos[:, 1:] = np.nan_to_num(sig[:, :-1])          # 다음 봉부터 보유
+    pos[:, ~valid] = 0.0                              # 데이터 없는 칸은 청산 상태
+    turnover = np.abs(np.diff(pos, axis=1, prepend=0.0))
+    cost = turnover * (fee_bps + slippage_bps) / 1e4
+
+    n_sym = np.maximum(valid.sum(axis=1), 1)          # 그 시각 거래 가능한 심볼 수
+    pnl = ((pos * r - cost).sum(axis=2)) / n_sym      # (P, T)
+
+    equity = np.cumsum(np.log1p(pnl), axis=1)
+    peak = np.maximum.accumulate(equity, axis=1)
+    mean, std = pnl.mean(axis=1), pnl.std(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(bars_per_year), 0.0)
+    return {
+        "total_return": np.expm1(equity[:, -1]),
+        "sharpe": sharpe,
+        "max_drawdown": np.expm1((equity - peak).min(axis=1)),
+        "turnover": turnover.sum(axis=(1, 2)) / sig.shape[2],
+        "pnl": pnl,
+    }
+
+
+# ---- 신호 예시: 이동평균 교차 (파라미터 여러 개를 한 번에) ----
+
+def _sma(x: np.ndarray, w: int) -> np.ndarray:
+    """열별 단순이동평균. 창 안에 NaN(상장 전/공백)이 하나라도 있으면 NaN (0으로 채워 평균을 끌어내리지 않음)."""
+    valid = ~np.isnan(x)
+    zero = np.zeros((1, x.shape[1]))
+    cs = np.vstack([zero, np.cumsum(np.where(valid, x, 0.0), axis=0)])
+    cn = np.vstack([zero, np.cumsum(valid, axis=0)])
+    out = np.full(x.shape, np.nan)
+    full = (cn[w:] - cn[:-w]) == w
+    out[w - 1:] = np.where(full, (cs[w:] - cs[:-w]) / w, np.nan)
+    return out
+
+
+def ma_cross(close: np.ndarray, params: List[dict]) -> np.ndarray:
+    """params=[{"fast":.., "slow":..}, ...] → (P, T, S) 신호 (fast > slow면 1, 아니면 0)."""
+    windows = sorted({p["fast"] for p in params} | {p["slow"] for p in params})
+    sma = {w: _sma(close, w) for w in windows}
+    out = np.empty((len(params),) + close.shape)
+    for i, p in enumerate(params):
+        out[i] = (sma[p["fast"]] > sma[p["slow"]]).astype(np.float64)
+    return out
+
+
+# ---- 파라미터 스윕 ----
+
+_close: Optional[np.ndarray] = None
+
+
+def _init_worker(close: np.ndarray) -> None:
+    global _close
+    _close = close
+
+
+def _run_chunk(args):
+    signal_fn, params, kw = args
+    res = backtest(_close, signal_fn(_close, params), **kw)
+    res.pop("pnl")
+    return [dict(p, **{k: float(v[i]) for k, v in res.items()}) for i, p in enumerate(params)]
+
+
+def sweep(close: np.ndarray, signal_fn: Callable[[np.ndarray, List[dict]], np.ndarray],
+          grid: List[dict], chunk: int = 4, procs: Optional[int] = None,
+          interval: Optional[str] = None, **kw) -> List[dict]:
+    """
+    grid의 파라미터마다 backtest 통계를 계산해 리스트로 반환 (grid 순서 유지).
+    signal_fn(close, params) → (len(params), T, S) 는 모듈 최상위 함수여야 함 (프로세스 풀 전달).
+    """
+    if interval is not None and interval in INTERVAL_MS:
+        kw.setdefault("bars_per_year", YEAR_MS / INTERVAL_MS[interval])
+    tasks = [(signal_fn, grid[i:i + chunk], kw) for i in range(0, len(grid), chunk)]
+    procs = procs or os.cpu_count()
+    if procs == 1:
+        _init_worker(close)
+        return [row for t in tasks for row in _run_chunk(t)]
+    with ProcessPoolExecutor(max_workers=procs, initializer=_init_worker, initargs=(close,)) as ex:
+        return [row for rows in ex.map(_run_chunk, tasks) for row in rows]
+
+
+if __name__ == "__main__":
+    from multi_symbols_to_csv import DEFAULT_SYMBOLS
+    from kline_panel import build_panel
+
+    interval = "1h"
+    panel = build_panel(DEFAULT_SYMBOLS, interval, fields=("close",))
+    close = panel.field("close")
+    grid = [{"fast": f, "slow": s} for f in range(6, 100, 6) for s in range(24, 24 * 21, 24) if f < s]
+    results = sweep(close, ma_cross, grid, interval=interval, fee_bps=10, slippage_bps=5)
+    results.sort(key=lambda r: r["sharpe"], reverse=True)
+    for r in results[:10]:
+        print(f"fast={r['fast']:3d} slow={r['slow']:4d}  sharpe={r['sharpe']:6.2f}  "
+              f"ret={r['total_return']:8.2%}  mdd={r['max_drawdown']:8.2%}  turnover={r['turnover']:.0f}")
@@ -0,0 +1,107 @@
+# kline_cache.py
+# -*- coding: utf-8 -*-
+"""
+klines REST 응답(window)용 디스크 캐시.
+- 키: (symbol, interval, startTime, limit) 해시 → {root}/{앞 2글자}/{해시}.bin
+- 값: 응답 JSON을 zlib 압축한 바이트 (원본 그대로 복원)
+- 이미 마감된 꽉 찬 window(행 수 == limit, 마지막 closeTime < 현재)만 저장 → 내용이 바뀔 일 없음
+  (샤딩 모드에서 통째로 지난 window는 상장 전처럼 비어 있어도 저장)
+- 전체 크기가 max_bytes를 넘으면 가장 오래 안 쓴 파일부터 삭제(LRU, mtime 기준)
+"""
+
+import os
+import json
+import zlib
+import time
+import hashlib
+import threading
+from typing import Optional
+
+CACHE_ROOT = "kline_cache"
+
+
+class KlineCache:
+    def __init__(self, root: str = CACHE_ROOT, max_bytes: int = 2 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.stores = self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._size = sum(os.path.getsize(p) for p in self._files())
+
+    def _files(self):
+        for d, _, names in os.walk(self.root):
+            for n in names:
+                if n.endswith(".bin"):
+                    yield os.path.join(d, n)
+
+    def _path(self, symbol: str, interval: str, start_ms: int, limit: int) -> str:
+        key = f"{symbol.upper()}|{interval}|{start_ms}|{limit}".encode()
+        h = hashlib.sha1(key).hexdigest()
+        return os.path.join(self.root, h[:2], h + ".bin")
+
+    def get(self, symbol: str, interval: str, start_ms: int, limit: int) -> Optional[list]:
+        path = self._path(symbol, interval, start_ms, limit)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # LRU: 최근 사용 시각 갱신
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return json.loads(zlib.decompress(data))
+
+    def put(self, symbol: str, interval: str, start_ms: int, limit: int, chunk: list,
+            window_closed: bool = False) -> bool:
+        """
+        마감된 꽉 찬 window만 저장. 저장했으면 True.
+        window_closed=True: 호출 측이 window 전체(limit봉 길이)가 이미 지났음을 보장
+        → 행이 모자라거나 비어 있어도(상장 전 구간 등) 저장.
+        """
+        full = len(chunk) == limit and chunk[-1][6] < time.time() * 1000
+        if not (full or window_closed):
+            return False
+        path = self._path(symbol, interval, start_ms, limit)
+        data = zlib.compress(json.dumps(chunk, separators=(",", ":")).encode(), 6)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        old = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp, path)
+        with self._lock:
+            self.stores += 1
+            self._size += len(data) - old
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+        return True
+
+    def evict(self, target_ratio: float = 0.9) -> None:
+        """mtime이 오래된 파일부터 지워 max_bytes × target_ratio 이하로."""
+        with self._lock:
+            files = []
+            for p in self._files():
+                st = os.stat(p)
+                files.append((st.st_mtime, st.st_size, p))
+            files.sort()
+            size = sum(s for _, s, _ in files)
+            for _, s, p in files:
+                if size <= self.max_bytes * target_ratio:
+                    break
+                os.remove(p)
+                size -= s
+                self.evictions += 1
+            self._size = size
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits, "misses": self.misses, "stores": self.stores,
+                "evictions": self.evictions, "bytes": self._size,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
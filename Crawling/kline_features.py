@@ -0,0 +1,260 @@
+# kline_features.py
+# -*- coding: utf-8 -*-
+"""
+여러 심볼의 kline 컬럼(kline_mmap)으로 피처를 한 번에 계산하고 캐시합니다.
+- 피처: ret(로그수익률), vol(롤링 변동성), atr, vwap, volz(거래량 z-score)
+- 계산: 심볼들을 한 배열로 이어 붙이고 심볼 구간마다 누적합(cumsum) 차분으로 롤링 → O(n), 창 크기와 무관
+  누적합은 심볼 구간마다(긴 구간은 블록마다) 새로 시작하고 구간 평균을 뺀 값으로 계산
+  → 앞 심볼의 큰 값 오차를 물려받지 않고 E[x²]-E[x]² 상쇄 오차도 작음
+  (심볼 경계를 넘는 창, NaN이 든 창은 NaN)
+- 캐시: {root}/{symbol}/{interval}/{feature}__{params}.bin, kline_mmap 행 번호와 1:1 정렬
+  새로 붙은 행 + lookback 만큼만 읽어 꼬리만 다시 계산
+  같은 폴더 openTime.bin에 계산 기준 openTime을 남겨 두고, kline_mmap이 중간부터 다시 쓰였으면
+  (repair_store 보충 등) 처음 달라진 행부터 모든 피처 캐시를 잘라내고 다시 계산
+"""
+
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from kline_mmap import KlineMmapReader
+
+FEATURE_ROOT = "kline_features"
+_BLOCK = 4096  # 누적합을 새로 시작하는 최소 창 개수 (블록당 추가 비용 w-1행 → 블록을 4w 이상으로 잡아 O(n))
+
+
+# ---- 구간(세그먼트) 단위 벡터 연산 ----
+# x: 여러 심볼(또는 심볼 구간)을 이어 붙인 1차원 배열
+# edges: 구간 경계 [0, e1, ..., len(x)] (호출하는 쪽이 구간 길이의 누적합으로 넘김, 값에서 추측하지 않음)
+
+def _edges(lens: List[int]) -> np.ndarray:
+    return np.concatenate(([0], np.cumsum(lens))).astype(np.int64)
+
+
+def _local(edges: np.ndarray) -> np.ndarray:
+    """각 원소의 구간 안 위치 (0부터)."""
+    return np.arange(edges[-1]) - np.repeat(edges[:-1], np.diff(edges))
+
+
+def _lag(x: np.ndarray, edges: np.ndarray, n: int = 1) -> np.ndarray:
+    out = np.full_like(x, np.nan, dtype=np.float64)
+    out[n:] = x[:-n]
+    out[_local(edges) < n] = np.nan
+    return out
+
+
+def _window_sums(y: np.ndarray, w: int) -> np.ndarray:
+    """y의 길이 w 창 합 (len(y) - w + 1개). 누적합을 블록마다 새로 시작해 오차 누적을 막음."""
+    out = np.empty(len(y) - w + 1)
+    block = max(_BLOCK, 4 * w)
+    for s in range(0, len(out), block):
+        e = min(s + block, len(out))
+        cs = np.concatenate(([0.0], np.cumsum(y[s:e + w - 1])))
+        out[s:e] = cs[w:] - cs[:-w]
+    return out
+
+
+def _rolling_moments(x: np.ndarray, edges: np.ndarray, w: int,
+                     squares: bool) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    구간마다 길이 w 창의 합 (squares면 평균을 뺀 제곱합도).
+    창이 덜 찼거나 창 안에 NaN(공백/첫 수익률 등)이 하나라도 있으면 NaN (0으로 채워 값을 끌어내리지 않음).
+    """
+    s1 = np.full(len(x), np.nan)
+    s2 = np.full(len(x), np.nan) if squares else None
+    for a, b in zip(edges[:-1].tolist(), edges[1:].tolist()):
+        if b - a < w:
+            continue
+        valid = ~np.isnan(x[a:b])
+        if not valid.any():
+            continue
+        c = float(np.mean(x[a:b][valid]))  # 구간 평균을 빼고 더함 (큰 값끼리의 상쇄 오차 방지)
+        y = np.where(valid, x[a:b] - c, 0.0)
+        full = _window_sums(valid.astype(np.float64), w) == w
+        d1 = _window_sums(y, w)
+        s1[a + w - 1:b] = np.where(full, d1 + w * c, np.nan)
+        if squares and w == 1:
+            s2[a:b] = np.where(valid, 0.0, np.nan)
+        elif squares:
+            m2 = np.maximum(_window_sums(y * y, w) - d1 * d1 / w, 0.0)
+            s2[a + w - 1:b] = np.where(full, m2, np.nan)
+    return s1, s2
+
+
+def _rolling_sum(x: np.ndarray, edges: np.ndarray, w: int) -> np.ndarray:
+    return _rolling_moments(x, edges, w, squares=False)[0]
+
+
+def _rolling_mean_std(x: np.ndarray, edges: np.ndarray, w: int) -> Tuple[np.ndarray, np.ndarray]:
+    s1, m2 = _rolling_moments(x, edges, w, squares=True)
+    return s1 / w, np.sqrt(m2 / max(w - 1, 1))
+
+
+# ---- 피처 정의: (함수, 필요한 컬럼, lookback 행 수) ----
+
+def f_ret(c: Dict[str, np.ndarray], edges: np.ndarray, n: int = 1) -> np.ndarray:
+    return np.log(c["close"] / _lag(c["close"], edges, n))
+
+
+def f_vol(c, edges, window: int = 24) -> np.ndarray:
+    r = np.log(c["close"] / _lag(c["close"], edges, 1))
+    # 구간 첫 행/종가 NaN 옆의 수익률은 NaN → 그 수익률이 든 창의 변동성도 NaN (0으로 채워 과소평가하지 않음)
+    _, std = _rolling_mean_std(r, edges, window)
+    return std
+
+
+def f_atr(c, edges, window: int = 14) -> np.ndarray:
+    prev = _lag(c["close"], edges, 1)
+    tr = np.fmax(c["high"] - c["low"],
+                 np.fmax(np.abs(c["high"] - prev), np.abs(c["low"] - prev)))  # 첫 봉은 high-low
+    return _rolling_sum(tr, edges, window) / window
+
+
+def f_vwap(c, edges, window: int = 24) -> np.ndarray:
+    return _rolling_sum(c["quoteAssetVolume"], edges, window) / _rolling_sum(c["volume"], edges, window)
+
+
+def f_volz(c, edges, window: int = 24) -> np.ndarray:
+    mean, std = _rolling_mean_std(c["volume"], edges, window)
+    return (c["volume"] - mean) / std
+
+
+FEATURES: Dict[str, Tuple[Callable, List[str], Callable[[dict], int]]] = {
+    "ret":  (f_ret,  ["close"], lambda p: p.get("n", 1)),
+    "vol":  (f_vol,  ["close"], lambda p: p.get("window", 24)),
+    "atr":  (f_atr,  ["high", "low", "close"], lambda p: p.get("window", 14)),
+    "vwap": (f_vwap, ["quoteAssetVolume", "volume"], lambda p: p.get("window", 24)),
+    "volz": (f_volz, ["volume"], lambda p: p.get("window", 24)),
+}
+
+
+def feature_key(name: str, params: dict) -> str:
+    return name + ("__" + ",".join(f"{k}={params[k]}" for k in sorted(params)) if params else "")
+
+
+class FeatureEngine:
+    def __init__(self, reader: Optional[KlineMmapReader] = None, root: str = FEATURE_ROOT):
+        self.reader = reader or KlineMmapReader()
+        self.root = root
+
+    def _path(self, symbol: str, interval: str, key: str) -> str:
+        return os.path.join(self.root, symbol.upper(), interval, key + ".bin")
+
+    def _ot_path(self, symbol: str, interval: str) -> str:
+        return self._path(symbol, interval, "openTime")
+
+    @staticmethod
+    def _rows(path: str) -> int:
+        return os.path.getsize(path) // 8 if os.path.exists(path) else 0
+
+    @staticmethod
+    def _truncate(path: str, rows: int) -> None:
+        """앞 rows행만 남김 (새 파일로 바꿔치기 → 이미 get()으로 받은 memmap은 그대로 유효)."""
+        with open(path, "rb") as src, open(path + ".tmp", "wb") as dst:
+            dst.write(src.read(rows * 8))
+        os.replace(path + ".tmp", path)
+
+    def _verified_rows(self, symbol: str, interval: str, ot: np.ndarray) -> int:
+        """
+        캐시가 계산된 openTime(openTime.bin)과 지금 kline_mmap의 openTime을 비교해 맞는 행 수 반환.
+        마지막 행이 다르면(kline_mmap이 중간부터 다시 쓰임) 처음 달라진 행을 찾아
+        그 뒤로 openTime.bin과 모든 피처 캐시를 잘라냄.
+        """
+        path = self._ot_path(symbol, interval)
+        m = self._rows(path)
+        if m == 0:
+            return 0
+        cached = np.memmap(path, dtype="<i8", mode="r", shape=(m,))
+        k = min(m, len(ot))
+        if m > len(ot) or (k and cached[k - 1] != ot[k - 1]):
+            diff = np.flatnonzero(cached[:k] != ot[:k])
+            k = int(diff[0]) if len(diff) else k
+        del cached
+        if k < m:
+            print(f"[FEAT] {symbol} {interval}: klines changed at row {k}, drop cached rows from there")
+            folder = os.path.dirname(path)
+            for name in os.listdir(folder):
+                f = os.path.join(folder, name)
+                if name.endswith(".bin") and self._rows(f) > k:
+                    self._truncate(f, k)
+        return k
+
+    def update(self, symbols: List[str], interval: str, name: str, params: Optional[dict] = None) -> int:
+        """symbols의 피처 캐시를 꼬리만 갱신. 새로 계산한 행 수 반환."""
+        params = params or {}
+        fn, cols, lookback = FEATURES[name]
+        key = feature_key(name, params)
+        lb = lookback(params)
+
+        parts, plan = [], []
+        for sym in symbols:
+            # openTime과 피처 입력 컬럼을 한 번에 읽음 (같은 세대의 kline_mmap)
+            full = self.reader.get(sym, interval, columns=sorted(set(cols) | {"openTime"}))
+            ot = full["openTime"]
+            n_total = len(ot)
+            path = self._path(sym, interval, key)
+            verified = self._verified_rows(sym, interval, ot)
+            done = self._rows(path)
+            if done > verified:  # openTime.bin을 쓰기 전에 죽었거나 예전 캐시 → 확인된 행까지만
+                self._truncate(path, verified)
+                done = verified
+            if done >= n_total:
+                continue
+            # lookback(+1)만큼 앞에서부터 읽음. 읽은 구간 앞쪽 lookback 행은 창을 채우는 데만 쓰고 다시 쓰지 않음
+            i0 = max(done - lb - 1, 0)
+            parts.append({c: full[c][i0:n_total] for c in cols})
+            plan.append((path, i0, done, n_total, ot))
+        if not parts:
+            return 0
+
+        # 심볼 구간들을 이어 붙여 한 번에 계산 (구간 경계는 길이의 누적합으로 명시)
+        lens = [p - i0 for _, i0, _, p, _ in plan]
+        x = {c: np.concatenate([p[c] for p in parts]).astype(np.float64) for c in cols}
+        values = fn(x, _edges(lens), **params)
+
+        added = 0
+        off = 0
+        for (path, i0, done, n_total, ot), ln in zip(plan, lens):
+            new = values[off + (done - i0): off + ln]
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 기준 openTime을 먼저 늘리고 피처를 씀 (피처 행은 항상 openTime.bin의 앞부분)
+            ot_path = os.path.join(os.path.dirname(path), "openTime.bin")
+            m = self._rows(ot_path)
+            if m < n_total:
+                with open(ot_path, "ab") as f:
+                    f.write(np.ascontiguousarray(ot[m:n_total], dtype="<i8").tobytes())
+            with open(path, "ab") as f:
+                f.write(np.ascontiguousarray(new, dtype="<f8").tobytes())
+            added += len(new)
+            off += ln
+        return added
+
+    def get(self, symbol: str, interval: str, name: str, params: Optional[dict] = None) -> np.ndarray:
+        """캐시된 피처 전체 (kline_mmap 행 번호와 정렬된 memmap)."""
+        path = self._path(symbol, interval, feature_key(name, params or {}))
+        n = os.path.getsize(path) // 8 if os.path.exists(path) else 0
+        if n == 0:
+            return np.empty(0)
+        return np.memmap(path, dtype="<f8", mode="r", shape=(n,))
+
+    def compute(self, symbols: List[str], interval: str,
+                specs: List[Tuple[str, dict]]) -> Dict[Tuple[str, str], np.ndarray]:
+        """선언한 피처들을 갱신하고 (symbol, feature_key) → 배열로 반환."""
+        out = {}
+        for name, params in specs:
+            self.update(symbols, interval, name, params)
+            for sym in symbols:
+                out[(sym, feature_key(name, params))] = self.get(sym, interval, name, params)
+        return out
+
+
+if __name__ == "__main__":
+    from multi_symbols_to_csv import DEFAULT_SYMBOLS
+
+    specs = [("ret", {}), ("vol", {"window": 24}), ("atr", {"window": 14}),
+             ("vwap", {"window": 24}), ("volz", {"window": 168})]
+    engine = FeatureEngine()
+    feats = engine.compute(DEFAULT_SYMBOLS, "1h", specs)
+    for (sym, key), arr in feats.items():
+        print(f"{sym:10s} {key:20s} rows={len(arr)} last={arr[-1] if len(arr) else None}")
@@ -0,0 +1,215 @@
+# kline_gaps.py
+# -*- coding: utf-8 -*-
+"""
+저장된 kline의 무결성 점검 + 빠진 구간만 골라 재수집합니다.
+- 점검: 누락 봉(gap)을 전 심볼 한 번에 벡터 연산으로 검사
+  + 앞/뒤가 잘린 구간: 상장 시각(또는 지정한 start) ~ 첫 봉, 마지막 봉 ~ 마지막 마감 봉(또는 end)
+  (중복/역행은 검사하지 않음: write_klines/append_tail이 파일마다 정렬·중복 제거하고 read_table도 정리해서 돌려줌)
+- 점검 대상은 kline_store(Parquet)뿐. multi_symbols_to_csv가 쓰는 CSV는 검사하지 않음
+  (CSV는 수집 중 find_gaps 경고만 남김 → 점검/복구가 필요하면 kline_store로 받을 것)
+- 복구: gap 구간만 workers개 스레드로 동시에 다시 받아 심볼마다 한 번에 kline_store에 병합
+- 바이낸스 점검 시간처럼 원래 데이터가 없는 구간은 {symbol}/{interval}/_gaps.json에 기록해 다음부터 건너뜀
+  (요청이 성공했는데 빈 봉만 기록, 요청 실패는 기록하지 않고 예외로 올림)
+"""
+
+import os
+import json
+import glob
+import time
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from multi_symbols_to_csv import (
+    BASE_URL, INTERVAL_MS, KLINES_WEIGHT, KlineBuffer, WeightBudget, make_session, request_json,
+    split_windows, to_ms,
+)
+from kline_store import STORE_ROOT, buffer_to_table, partition_dir, read_table, write_klines
+
+
+def stored_symbols(interval: str, root: str = STORE_ROOT) -> List[str]:
+    return sorted(os.path.basename(os.path.dirname(d))
+                  for d in glob.glob(os.path.join(root, "*", interval)) if os.path.isdir(d))
+
+
+def scan_open_times(open_ms: np.ndarray, seg_ids: np.ndarray, step: int) -> Dict[str, np.ndarray]:
+    """
+    여러 심볼의 openTime을 이어 붙인 배열 하나를 한 번에 검사.
+    seg_ids: 각 행의 심볼 번호 (같은 심볼끼리 연속)
+    반환: gap_seg/gap_start/gap_end (빠진 첫/마지막 openTime)
+    """
+    d = np.diff(open_ms)
+    same = seg_ids[1:] == seg_ids[:-1]  # 심볼 경계의 차이는 무시
+    pos = np.flatnonzero(same & (d > step))
+    return {
+        "gap_seg": seg_ids[pos],
+        "gap_start": open_ms[pos] + step,
+        "gap_end": open_ms[pos + 1] - step,
+    }
+
+
+def _known_gaps_path(symbol: str, interval: str, root: str) -> str:
+    return os.path.join(partition_dir(root, symbol, interval), "_gaps.json")
+
+
+def load_known_gaps(symbol: str, interval: str, root: str = STORE_ROOT) -> set:
+    path = _known_gaps_path(symbol, interval, root)
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {tuple(g) for g in json.load(f)}
+
+
+def save_known_gaps(symbol: str, interval: str, gaps: set, root: str = STORE_ROOT) -> None:
+    path = _known_gaps_path(symbol, interval, root)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(sorted(gaps), f)
+    os.replace(tmp, path)
+
+
+def first_open_ms(symbol: str, interval: str, session, budget: Optional[WeightBudget] = None) -> Optional[int]:
+    """거래소에 있는 첫 봉의 openTime (상장 시각). 요청 실패/봉 없음이면 None."""
+    params = {"symbol": symbol, "interval": interval, "startTime": 0, "limit": 1}
+    chunk = request_json(session, BASE_URL, params, KLINES_WEIGHT, budget=budget)
+    return int(chunk[0][0]) if chunk else None
+
+
+def _trim_known(a: int, b: int, known: set, step: int) -> Optional[tuple]:
+    """[a, b]의 앞쪽에서 이미 확인된(원래 없는) 구간을 걷어냄. 다 걷히면 None."""
+    for ka, kb in sorted(known):
+        if ka <= a <= kb:
+            a = kb + step
+    return (a, b) if a <= b else None
+
+
+def scan_store(interval: str, symbols: Optional[List[str]] = None, root: str = STORE_ROOT,
+               start: Optional[dt.datetime] = None, end: Optional[dt.datetime] = None,
+               session=None, budget: Optional[WeightBudget] = None) -> Dict[str, dict]:
+    """
+    저장소의 symbols(기본: 전체)를 점검. symbol → {"rows", "gaps": [(start, end)], "head", "tail"}
+    - gaps: 중간 gap + 앞/뒤가 잘린 구간 (repair_store가 그대로 채움)
+    - head: start(없으면 상장 시각, 심볼당 요청 1회) ~ 첫 봉 전, tail: 마지막 봉 뒤 ~ end(없으면 마지막 마감 봉)
+      없으면 None. 상장 시각 요청이 실패하면 head는 검사하지 않음
+    이미 확인된(원래 없는) 구간은 제외.
+    """
+    step = INTERVAL_MS[interval]
+    symbols = symbols or stored_symbols(interval, root)
+    opens = [read_table(s, interval, columns=["openTime"], root=root).column("openTime").to_numpy()
+             for s in symbols]
+    if not symbols:
+        return {}
+    seg = np.repeat(np.arange(len(symbols)), [len(o) for o in opens])
+    res = scan_open_times(np.concatenate(opens), seg, step)
+
+    last_closed = (int(time.time() * 1000) // step - 1) * step
+    want_last = last_closed if end is None else min(to_ms(end) // step * step, last_closed)
+    want_first = None if start is None else -(-to_ms(start) // step) * step
+    if start is None:
+        session = session or make_session(1)
+        budget = budget or WeightBudget()
+
+    report = {}
+    for i, sym in enumerate(symbols):
+        known = load_known_gaps(sym, interval, root)
+        mask = res["gap_seg"] == i
+        gaps = [(int(a), int(b)) for a, b in zip(res["gap_start"][mask], res["gap_end"][mask])]
+        first = want_first
+        if first is None:
+            first = first_open_ms(sym, interval, session, budget)
+            if first is None:
+                print(f"[WARN] {sym}: listing time unknown, head not checked")
+        o = opens[i]
+        if len(o):
+            head = (first, int(o[0]) - step) if first is not None else None
+            tail = (int(o[-1]) + step, want_last)
+        else:
+            head, tail = None, (first, want_last) if first is not None else None
+        head = head and _trim_known(*head, known, step)
+        tail = tail and _trim_known(*tail, known, step)
+        gaps = [g for g in (_trim_known(a, b, known, step) for a, b in gaps) if g]
+        report[sym] = {"rows": len(o), "head": head, "tail": tail,
+                       "gaps": ([head] if head else []) + gaps + ([tail] if tail else [])}
+    return report
+
+
+def missing_runs(a: int, b: int, got: np.ndarray, step: int) -> List[tuple]:
+    """[a, b] 격자 중 got에 없는 openTime들의 연속 구간 [(start, end)] (다음 점검이 보고하는 gap과 같은 경계)."""
+    grid = np.arange(a, b + 1, step, dtype=np.int64)
+    miss = grid[~np.isin(grid, got)]
+    if not len(miss):
+        return []
+    cut = np.flatnonzero(np.diff(miss) != step) + 1
+    return [(int(r[0]), int(r[-1])) for r in np.split(miss, cut)]
+
+
+def fetch_gap(symbol: str, interval: str, a: int, b: int, session,
+              budget: Optional[WeightBudget] = None, limit: int = 1000) -> list:
+    """gap [a, b]의 raw klines. 요청이 하나라도 끝내 실패하면 RuntimeError (빈 구간과 구분)."""
+    step = INTERVAL_MS[interval]
+    rows: list = []
+    for s, e in split_windows(a, b, interval, limit):
+        params = {"symbol": symbol, "interval": interval, "startTime": s, "endTime": e, "limit": limit}
+        chunk = request_json(session, BASE_URL, params, KLINES_WEIGHT, budget=budget)
+        if chunk is None:
+            raise RuntimeError(f"{symbol}: klines request failed at {s}~{e}")
+        rows.extend(r for r in chunk if a <= r[0] <= b and (r[0] - a) % step == 0)
+    return rows
+
+
+def repair_store(interval: str, report: Dict[str, dict], workers: int = 4,
+                 root: str = STORE_ROOT) -> Tuple[Dict[str, int], Dict[str, str]]:
+    """
+    scan_store 결과의 gap 구간만 재수집해 병합. (symbol → 채운 행 수, 실패한 symbol → 첫 오류) 반환.
+    gap들은 workers개 스레드로 동시에 받고 (가중치 예산 공유), 심볼마다 받은 봉을 한 번에 기록.
+    요청은 성공했지만 봉이 없는 부분 구간만 _gaps.json에 기록 (거래소 점검 등).
+    요청 실패는 기록하지 않고 실패 목록에 남긴 뒤 다음 심볼로 계속
+    (그 심볼의 나머지 gap에서 받은 것/확인된 빈 구간은 저장됨 → 다음 점검/복구에서 실패 구간만 다시 받음).
+    """
+    budget = WeightBudget()
+    session = make_session(workers)
+    step = INTERVAL_MS[interval]
+    filled, failed = {}, {}
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for sym, info in report.items():
+            known = load_known_gaps(sym, interval, root)
+            n_known = len(known)
+            n = 0
+            futs = [(a, b, ex.submit(fetch_gap, sym, interval, a, b, session, budget)) for a, b in info["gaps"]]
+            error: Optional[Exception] = None
+            try:
+                got: list = []
+                for a, b, fut in futs:
+                    try:
+                        rows = fut.result()
+                    except RuntimeError as e:
+                        error = error or e
+                        continue
+                    got.extend(rows)
+                    # 남은 빈 부분은 API가 비어 있다고 확인한 구간 → 다음 점검에서 제외
+                    known.update(missing_runs(a, b, np.array([r[0] for r in rows], dtype=np.int64), step))
+                if got:
+                    n = write_klines(buffer_to_table(KlineBuffer(len(got)).extend(got)), sym, interval, root)
+            finally:
+                if len(known) != n_known:
+                    save_known_gaps(sym, interval, known, root)
+                filled[sym] = n
+            if error is not None:
+                print(f"[ERROR] {sym}: repair incomplete → {error} (filled rows={n})")
+                failed[sym] = str(error)
+    return filled, failed
+
+
+if __name__ == "__main__":
+    # 🔧 설정
+    interval = "1h"
+
+    report = scan_store(interval)
+    for sym, info in report.items():
+        print(f"{sym:10s} rows={info['rows']} gaps={len(info['gaps'])} head={info['head']} tail={info['tail']}")
+    filled, failed = repair_store(interval, {s: r for s, r in report.items() if r["gaps"]})
+    print("\nREPAIRED. " + ", ".join(f"{s}+{n}" for s, n in filled.items()))
+    if failed:
+        print(f"FAILED ({len(failed)}): " + ", ".join(failed))
@@ -0,0 +1,234 @@
+# kline_mmap.py
+# -*- coding: utf-8 -*-
+"""
+kline 구간 조회용 메모리 맵 컬럼 파일.
+- 경로: {root}/{symbol}/{interval}/{gen}/{column}.bin  (고정폭 little-endian 배열, openTime 오름차순)
+  {gen}은 같은 폴더의 CURRENT 파일에 적힌 세대 폴더 (CURRENT가 없으면 {interval} 폴더 바로 아래 = 예전 레이아웃)
+- export_mmap: kline_store에서 마지막 openTime 이후만 이어 붙임 (openTime 파일을 맨 마지막에 씀)
+  저장소 파일이 바뀌었으면(meta.json과 비교) 처음 달라진 openTime부터 다시 씀 → 중간 보충분도 반영
+  다시 쓸 때는 새 세대 폴더에 전부 쓴 뒤 CURRENT를 바꿔 공개 (열려 있는 파일은 줄이지 않음 → reader SIGBUS 없음)
+- KlineMmapReader.get(symbol, interval, t0, t1): openTime 이진 탐색 → 복사 없는 NumPy view
+  여러 프로세스가 같은 파일을 열면 OS 페이지 캐시를 공유하므로 reader 수와 무관하게 메모리 일정
+"""
+
+import os
+import json
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from kline_store import SCHEMA, STORE_COLUMNS, STORE_ROOT, partition_dir, read_table, store_files
+
+MMAP_ROOT = "kline_mmap"
+COLUMN_DTYPES = {f.name: np.dtype(f.type.to_pandas_dtype()).newbyteorder("<") for f in SCHEMA}
+# openTime이 행 수의 기준 → 다른 컬럼을 먼저 쓰고 openTime을 마지막에 씀
+WRITE_ORDER = [c for c in STORE_COLUMNS if c != "openTime"] + ["openTime"]
+
+
+def _base_dir(root: str, symbol: str, interval: str) -> str:
+    return os.path.join(root, symbol.upper(), interval)
+
+
+def current_gen(root: str, symbol: str, interval: str) -> str:
+    """지금 공개된 세대 폴더 이름 (없으면 "" = {interval} 폴더 바로 아래)."""
+    try:
+        with open(os.path.join(_base_dir(root, symbol, interval), "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+
+def gen_dir(root: str, symbol: str, interval: str, gen: Optional[str] = None) -> str:
+    if gen is None:
+        gen = current_gen(root, symbol, interval)
+    return os.path.join(_base_dir(root, symbol, interval), gen)
+
+
+def column_path(root: str, symbol: str, interval: str, column: str, gen: Optional[str] = None) -> str:
+    return os.path.join(gen_dir(root, symbol, interval, gen), f"{column}.bin")
+
+
+def stored_rows(root: str, symbol: str, interval: str, gen: Optional[str] = None) -> int:
+    path = column_path(root, symbol, interval, "openTime", gen)
+    return os.path.getsize(path) // 8 if os.path.exists(path) else 0
+
+
+def _meta_path(root: str, symbol: str, interval: str) -> str:
+    return os.path.join(_base_dir(root, symbol, interval), "meta.json")
+
+
+def _load_meta(root: str, symbol: str, interval: str) -> Dict[str, list]:
+    try:
+        with open(_meta_path(root, symbol, interval), encoding="utf-8") as f:
+            return json.load(f).get("files", {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_meta(root: str, symbol: str, interval: str, files: Dict[str, list]) -> None:
+    path = _meta_path(root, symbol, interval)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"files": files}, f)
+    os.replace(path + ".tmp", path)
+
+
+def _is_gen(name: str) -> bool:
+    return name.startswith("g") and name[1:].isdigit()
+
+
+def _publish(root: str, symbol: str, interval: str, gen: str, old: str) -> None:
+    """CURRENT를 gen으로 바꾸고, 직전 세대(old)만 남기고 더 오래된 세대 폴더 삭제.
+    직전 세대는 CURRENT를 읽은 직후 파일을 여는 reader가 있을 수 있어 한 번 더 남겨 둠."""
+    base = _base_dir(root, symbol, interval)
+    with open(os.path.join(base, "CURRENT.tmp"), "w", encoding="utf-8") as f:
+        f.write(gen)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(os.path.join(base, "CURRENT.tmp"), os.path.join(base, "CURRENT"))
+    for name in os.listdir(base):
+        if _is_gen(name) and name not in (gen, old):
+            shutil.rmtree(os.path.join(base, name), ignore_errors=True)  # 윈도우에서 열려 있으면 다음 번에
+    if _is_gen(old):  # 예전 레이아웃(폴더 바로 아래) 파일도 두 세대가 지나면 정리
+        for c in WRITE_ORDER:
+            try:
+                os.remove(os.path.join(base, f"{c}.bin"))
+            except OSError:
+                pass
+
+
+def _rewrite(root: str, symbol: str, interval: str, gen: str, keep: int, table) -> str:
+    """현재 세대의 앞 keep행 + table → 새 세대 폴더에 쓰고 공개. 새 세대 이름 반환."""
+    num = int(gen[1:]) + 1 if _is_gen(gen) else 1
+    new = f"g{num}"
+    new_dir = gen_dir(root, symbol, interval, new)
+    shutil.rmtree(new_dir, ignore_errors=True)  # 지난번에 공개 전에 죽은 잔여물
+    os.makedirs(new_dir)
+    for c in WRITE_ORDER:
+        itemsize = COLUMN_DTYPES[c].itemsize
+        arr = np.ascontiguousarray(table.column(c).to_numpy(), dtype=COLUMN_DTYPES[c])
+        with open(column_path(root, symbol, interval, c, gen), "rb") as src, \
+                open(column_path(root, symbol, interval, c, new), "wb") as dst:
+            left = keep * itemsize
+            while left:
+                buf = src.read(min(left, 1 << 24))
+                dst.write(buf)
+                left -= len(buf)
+            dst.write(arr.tobytes())
+            dst.flush()
+            os.fsync(dst.fileno())
+    _publish(root, symbol, interval, new, gen)
+    return new
+
+
+def export_mmap(symbol: str, interval: str, store_root: str = STORE_ROOT,
+                root: str = MMAP_ROOT) -> int:
+    """
+    kline_store → 컬럼 파일 반영. 쓴 행 수 반환.
+    meta.json에 저장소 파일별 (크기, mtime, 기간 시작)을 기록해 두고, 바뀌거나 생기거나 없어진 파일이 있으면
+    그 기간부터 openTime을 저장소와 비교 → 처음 달라진 행부터 잘라내고 다시 씀
+    (repair_store가 중간에 채운 봉, tail 병합 등). 바뀐 파일이 없으면 아무것도 읽지 않음.
+    다시 쓸 때는 기존 파일을 줄이지 않고 새 세대 폴더에 써서 CURRENT를 바꿈
+    → 이미 매핑한 reader는 옛 파일을 그대로 보고, 다음 조회 때 세대가 바뀐 것을 보고 다시 매핑.
+    """
+    gen = current_gen(root, symbol, interval)
+    n = stored_rows(root, symbol, interval, gen)
+    os.makedirs(gen_dir(root, symbol, interval, gen), exist_ok=True)
+    # 이전 export가 openTime을 쓰기 전에 죽었으면 다른 컬럼 꼬리가 남아 있음 → n행으로 맞춤
+    # (n행 뒤 꼬리는 어떤 reader도 매핑하지 않은 영역이라 줄여도 안전)
+    for c in WRITE_ORDER:
+        path = column_path(root, symbol, interval, c, gen)
+        if os.path.exists(path) and os.path.getsize(path) != n * COLUMN_DTYPES[c].itemsize:
+            os.truncate(path, n * COLUMN_DTYPES[c].itemsize)
+
+    base = partition_dir(store_root, symbol, interval)
+    files = {}
+    for path, t0 in store_files(symbol, interval, store_root):
+        st = os.stat(path)
+        files[os.path.relpath(path, base)] = [st.st_size, st.st_mtime_ns, t0]
+    old = _load_meta(root, symbol, interval)
+    changed = [v[2] for k, v in files.items() if old.get(k) != v] + [v[2] for k, v in old.items() if k not in files]
+    if not changed:
+        return 0
+
+    keep = 0
+    if n:
+        bound = min(changed)
+        ot = np.memmap(column_path(root, symbol, interval, "openTime", gen), dtype="<i8", mode="r", shape=(n,))
+        i = int(np.searchsorted(ot, bound, side="left"))
+        new_ot = read_table(symbol, interval, start_ms=bound, columns=["openTime"],
+                            root=store_root).column("openTime").to_numpy()
+        m = min(n - i, len(new_ot))
+        diff = np.flatnonzero(ot[i:i + m] != new_ot[:m])
+        keep = i + (int(diff[0]) if len(diff) else m)
+        last = int(ot[keep - 1]) if keep else None
+        del ot
+    else:
+        last = None
+
+    table = read_table(symbol, interval, start_ms=None if last is None else last + 1, root=store_root)
+    if keep < n:
+        new = _rewrite(root, symbol, interval, gen, keep, table)
+        print(f"[MMAP] {symbol} {interval}: store changed, rewrote from row {keep} "
+              f"({n - keep} rows dropped) into {new}")
+        _save_meta(root, symbol, interval, files)
+        return table.num_rows
+    for c in WRITE_ORDER:
+        arr = np.ascontiguousarray(table.column(c).to_numpy(), dtype=COLUMN_DTYPES[c])
+        with open(column_path(root, symbol, interval, c, gen), "ab") as f:
+            f.write(arr.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+    _save_meta(root, symbol, interval, files)
+    return table.num_rows
+
+
+class KlineMmapReader:
+    """
+    컬럼 파일을 memmap으로 열어 구간 조회. 파일이 늘어나거나(export_mmap append)
+    세대가 바뀌면(rewrite) 다음 조회 때 다시 매핑.
+    반환 배열은 memmap의 slice(view)라 복사가 없음 → 읽기 전용으로 사용.
+    """
+
+    def __init__(self, root: str = MMAP_ROOT):
+        self.root = root
+        self._maps: Dict[Tuple[str, str, str], Tuple[str, np.memmap]] = {}
+
+    def _column(self, symbol: str, interval: str, column: str, gen: str, n: int) -> np.ndarray:
+        key = (symbol.upper(), interval, column)
+        cached = self._maps.get(key)
+        if cached is None or cached[0] != gen or len(cached[1]) != n:
+            if n == 0:
+                return np.empty(0, dtype=COLUMN_DTYPES[column])
+            m = np.memmap(column_path(self.root, symbol, interval, column, gen),
+                          dtype=COLUMN_DTYPES[column], mode="r", shape=(n,))
+            self._maps[key] = (gen, m)
+            return m
+        return cached[1]
+
+    def get(self, symbol: str, interval: str, t0: Optional[int] = None, t1: Optional[int] = None,
+            columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """openTime ∈ [t0, t1] (UTC ms) 행들의 컬럼 → view dict."""
+        for attempt in range(3):
+            # 세대는 한 번만 읽고 모든 컬럼을 같은 세대에서 엶 (컬럼끼리 행 수가 어긋나지 않게)
+            gen = current_gen(self.root, symbol, interval)
+            try:
+                n = stored_rows(self.root, symbol, interval, gen)
+                ot = self._column(symbol, interval, "openTime", gen, n)
+                i0 = 0 if t0 is None else int(np.searchsorted(ot, t0, side="left"))
+                i1 = n if t1 is None else int(np.searchsorted(ot, t1, side="right"))
+                out = {}
+                for c in columns or STORE_COLUMNS:
+                    out[c] = self._column(symbol, interval, c, gen, n)[i0:i1]
+                return out
+            except FileNotFoundError:
+                if attempt == 2:  # 조회 도중 세대가 두 번 넘게 바뀜
+                    raise
+
+
+if __name__ == "__main__":
+    from multi_symbols_to_csv import DEFAULT_SYMBOLS
+
+    interval = "1h"
+    for sym in DEFAULT_SYMBOLS:
+        print(f"[OK] {sym} +{export_mmap(sym, interval)} rows")
@@ -0,0 +1,111 @@
+# kline_panel.py
+# -*- coding: utf-8 -*-
+"""
+여러 심볼의 kline을 하나의 시간 격자에 맞춘 패널(time × symbol × field)로 만듭니다.
+- 상장일/공백이 달라도 격자 하나에 정렬, 값이 없는 칸은 NaN + mask=False
+- 고정 interval은 (openTime - 시작) // step 으로 격자 위치를 바로 계산 (심볼당 한 번 훑기)
+  1M처럼 길이가 다른 interval은 전체 openTime을 한 번 정렬·병합해 격자 생성
+- 패널 위 수익률 / 롤링 상관행렬 (pairwise-complete) 유틸 포함
+"""
+
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from multi_symbols_to_csv import INTERVAL_MS
+from kline_mmap import KlineMmapReader
+
+
+class Panel(NamedTuple):
+    times: np.ndarray    # (T,) openTime UTC ms
+    symbols: List[str]   # (S,)
+    fields: List[str]    # (F,)
+    values: np.ndarray   # (T, S, F) float64, 없는 칸은 NaN
+    mask: np.ndarray     # (T, S) bool, 해당 시각에 봉이 있으면 True
+
+    def field(self, name: str) -> np.ndarray:
+        """(T, S) 한 필드."""
+        return self.values[:, :, self.fields.index(name)]
+
+
+def build_panel(symbols: Sequence[str], interval: str, fields: Sequence[str] = ("close",),
+                t0: Optional[int] = None, t1: Optional[int] = None,
+                reader: Optional[KlineMmapReader] = None) -> Panel:
+    """kline_mmap에 저장된 symbols를 [t0, t1] (UTC ms) 구간에서 패널로 정렬."""
+    reader = reader or KlineMmapReader()
+    fields = list(fields)
+    data = [reader.get(s, interval, t0, t1, columns=["openTime"] + fields) for s in symbols]
+    opens = [d["openTime"] for d in data]
+    nonempty = [o for o in opens if len(o)]
+    if not nonempty:
+        return Panel(np.empty(0, np.int64), list(symbols), fields,
+                     np.empty((0, len(symbols), len(fields))), np.empty((0, len(symbols)), bool))
+
+    step = INTERVAL_MS.get(interval)
+    if step is not None:
+        g0 = min(int(o[0]) for o in nonempty)
+        g1 = max(int(o[-1]) for o in nonempty)
+        times = np.arange(g0, g1 + 1, step, dtype=np.int64)
+        index = [(o - g0) // step for o in opens]
+    else:
+        times = np.unique(np.concatenate(nonempty))
+        index = [np.searchsorted(times, o) for o in opens]
+
+    values = np.full((len(times), len(symbols), len(fields)), np.nan)
+    mask = np.zeros((len(times), len(symbols)), dtype=bool)
+    for j, (d, idx) in enumerate(zip(data, index)):
+        mask[idx, j] = True
+        for k, f in enumerate(fields):
+            values[idx, j, k] = d[f]
+    return Panel(times, list(symbols), fields, values, mask)
+
+
+def log_returns(panel: Panel, field: str = "close") -> np.ndarray:
+    """(T, S) 로그수익률. 직전 칸이나 현재 칸이 비어 있으면 NaN."""
+    x = panel.field(field)
+    r = np.full_like(x, np.nan)
+    r[1:] = np.log(x[1:] / x[:-1])
+    return r
+
+
+def corr_matrix(x: np.ndarray) -> np.ndarray:
+    """(N, S) 표본 → (S, S) 상관행렬. 각 쌍마다 둘 다 값이 있는 행만 사용 (pairwise-complete)."""
+    m = ~np.isnan(x)
+    mf = m.astype(np.float64)
+    xv = np.where(m, x, 0.0)
+    n = mf.T @ mf
+    sx = xv.T @ mf          # [i, j]: j가 있는 행에서 i의 합
+    sxx = (xv * xv).T @ mf
+    sxy = xv.T @ xv
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sx.T / n
+        var_i = sxx - sx * sx / n
+        return cov / np.sqrt(var_i * var_i.T)
+
+
+def rolling_corr(x: np.ndarray, window: int, every: int = 1,
+                 min_periods: Optional[int] = None) -> np.ndarray:
+    """
+    (T, S) → (K, S, S): every 칸마다 직전 window 칸으로 계산한 상관행렬.
+    K = 격자에서 창이 다 찬 시점 수 / every. 유효 표본이 min_periods보다 적은 쌍은 NaN.
+    """
+    min_periods = min_periods or window // 2
+    ends = np.arange(window, len(x) + 1, every)
+    out = np.full((len(ends), x.shape[1], x.shape[1]), np.nan)
+    for i, e in enumerate(ends):
+        w = x[e - window:e]
+        c = corr_matrix(w)
+        m = (~np.isnan(w)).astype(np.float64)
+        c[(m.T @ m) < min_periods] = np.nan
+        out[i] = c
+    return out
+
+
+if __name__ == "__main__":
+    from multi_symbols_to_csv import DEFAULT_SYMBOLS
+
+    panel = build_panel(DEFAULT_SYMBOLS, "1h", fields=("close", "volume"))
+    print(f"panel T={len(panel.times)} S={len(panel.symbols)} F={len(panel.fields)} "
+          f"coverage={panel.mask.mean():.1%}")
+    r = log_returns(panel)
+    print(np.round(corr_matrix(r[-24 * 90:]), 2))
@@ -0,0 +1,105 @@
+# kline_resample.py
+# -*- coding: utf-8 -*-
+"""
+저장된 1m kline으로 상위 interval(3m ~ 1w, 1M) 봉을 로컬에서 만듭니다.
+- 집계: open=첫 값, high=max, low=min, close=마지막 값, 거래량/거래대금/체결수/taker*=합계
+- 경계: 바이낸스와 동일 (UTC epoch 정렬, 1w는 월요일 00:00 UTC, 1M은 달력 월)
+- 증분: 마지막으로 저장된 상위 봉 이후의 1m만 읽어 마감된 봉만 추가
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+
+from multi_symbols_to_csv import DEFAULT_SYMBOLS, INTERVAL_MS
+from kline_store import STORE_ROOT, last_open_ms, read_table, write_klines
+
+WEEK_OFFSET_MS = 4 * 86_400_000  # 1970-01-01은 목요일 → 첫 월요일(01-05)까지 4일
+RESAMPLE_TARGETS = ["3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "1w", "1M"]
+
+FIRST_COLS = ["open"]
+LAST_COLS = ["close"]
+SUM_COLS = ["volume", "quoteAssetVolume", "numberOfTrades", "takerBuyBase", "takerBuyQuote"]
+
+
+def bucket_open(open_ms: np.ndarray, interval: str) -> np.ndarray:
+    """각 openTime이 속한 상위 봉의 openTime(ms)."""
+    open_ms = np.asarray(open_ms, dtype=np.int64)
+    if interval == "1M":
+        months = open_ms.astype("datetime64[ms]").astype("datetime64[M]")
+        return months.astype("datetime64[ms]").astype(np.int64)
+    step = INTERVAL_MS[interval]
+    if interval == "1w":
+        return (open_ms - WEEK_OFFSET_MS) // step * step + WEEK_OFFSET_MS
+    return open_ms // step * step
+
+
+def bucket_close(bucket: np.ndarray, interval: str) -> np.ndarray:
+    """상위 봉 openTime → closeTime (= 다음 봉 openTime - 1)."""
+    if interval == "1M":
+        months = bucket.astype("datetime64[ms]").astype("datetime64[M]") + 1
+        return months.astype("datetime64[ms]").astype(np.int64) - 1
+    return bucket + INTERVAL_MS[interval] - 1
+
+
+def resample(cols: Dict[str, np.ndarray], interval: str,
+             complete_only: bool = False) -> Dict[str, np.ndarray]:
+    """
+    openTime 오름차순 1m 컬럼 dict → interval 봉 컬럼 dict (kline_store 스키마).
+    complete_only=True면 원본이 봉 끝(closeTime)까지 닿지 않은 마지막 봉은 제외.
+    """
+    ot = np.asarray(cols["openTime"], dtype=np.int64)
+    if not len(ot):
+        return {c: np.asarray(v)[:0] for c, v in cols.items()}
+    bucket = bucket_open(ot, interval)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(ot)] - 1
+
+    out = {"openTime": bucket[starts]}
+    out["closeTime"] = bucket_close(out["openTime"], interval)
+    for c in FIRST_COLS:
+        out[c] = np.asarray(cols[c])[starts]
+    for c in LAST_COLS:
+        out[c] = np.asarray(cols[c])[ends]
+    out["high"] = np.maximum.reduceat(np.asarray(cols["high"]), starts)
+    out["low"] = np.minimum.reduceat(np.asarray(cols["low"]), starts)
+    for c in SUM_COLS:
+        v = np.asarray(cols[c])
+        if v.dtype.kind == "i":  # 체결수는 합산 시 int32 범위를 넘을 수 있음
+            v = v.astype(np.int64)
+        out[c] = np.add.reduceat(v, starts)
+
+    if complete_only and np.asarray(cols["closeTime"])[-1] < out["closeTime"][-1]:
+        out = {c: v[:-1] for c, v in out.items()}
+    return out
+
+
+def update_resampled(symbol: str, targets: Optional[List[str]] = None, src: str = "1m",
+                     root: str = STORE_ROOT) -> Dict[str, int]:
+    """
+    저장소의 src 봉으로 targets 봉을 증분 갱신. interval → 추가된 봉 수.
+    각 target의 마지막 저장 봉 이후 1m만 읽고, 마감된 봉만 기록.
+    """
+    targets = targets or RESAMPLE_TARGETS
+    added = {}
+    for interval in targets:
+        last = last_open_ms(symbol, interval, root)
+        start_ms = int(bucket_close(np.array([last], dtype=np.int64), interval)[0]) + 1 \
+            if last is not None else None
+        table = read_table(symbol, src, start_ms=start_ms, root=root)
+        cols = {c: table.column(c).to_numpy() for c in table.column_names}
+        bars = resample(cols, interval, complete_only=True)
+        table = pa.Table.from_pydict(bars)
+        added[interval] = write_klines(table, symbol, interval, root)
+    return added
+
+
+if __name__ == "__main__":
+    # 🔧 설정: 1m만 받아두고(kline_store / kline_archive) 나머지 interval은 로컬에서 생성
+    symbols = DEFAULT_SYMBOLS[:]
+    targets = ["5m", "15m", "1h", "4h", "1d", "1w"]
+
+    for sym in symbols:
+        added = update_resampled(sym, targets)
+        print(f"[OK] {sym} " + ", ".join(f"{k}+{v}" for k, v in added.items()))
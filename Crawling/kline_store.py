@@ -0,0 +1,291 @@
+# kline_store.py
+# -*- coding: utf-8 -*-
+"""
+바이낸스 kline 컬럼형 저장소 (Parquet).
+- 경로: {root}/{symbol}/{interval}/{year}.parquet  (연도는 openTime UTC 기준)
+- 실시간 추가분: {root}/{symbol}/{interval}/_tail/{YYYYMMDD}.parquet (일별 작은 파일, append_tail)
+  → compact_tail로 연도 파일에 합침 (읽기/last_open_ms는 tail까지 포함)
+- dtype: openTime/closeTime int64(UTC ms epoch), 가격/거래량 float64, numberOfTrades int32
+- 읽기: 컬럼 선택(projection) + 기간 필터(row group 통계로 pushdown)
+- 시간대 변환(Asia/Seoul)은 읽을 때만 수행, CSV 내보내기는 save_symbol_csv와 같은 형식
+"""
+
+import os
+import glob
+import datetime as dt
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import requests
+
+from kline_cache import KlineCache
+from multi_symbols_to_csv import (
+    DEFAULT_SYMBOLS, KLINE_COLUMNS, KlineBuffer, WeightBudget, find_gaps, iter_binance_klines, run_symbols,
+    to_ms,
+)
+
+STORE_ROOT = "kline_store"
+TAIL_DIR   = "_tail"
+DAY_MS     = 86_400_000
+
+SCHEMA = pa.schema([
+    ("openTime", pa.int64()),
+    ("open", pa.float64()),
+    ("high", pa.float64()),
+    ("low", pa.float64()),
+    ("close", pa.float64()),
+    ("volume", pa.float64()),
+    ("closeTime", pa.int64()),
+    ("quoteAssetVolume", pa.float64()),
+    ("numberOfTrades", pa.int32()),
+    ("takerBuyBase", pa.float64()),
+    ("takerBuyQuote", pa.float64()),
+])
+STORE_COLUMNS = SCHEMA.names
+
+
+def partition_dir(root: str, symbol: str, interval: str) -> str:
+    return os.path.join(root, symbol.upper(), interval)
+
+
+def buffer_to_table(buf: KlineBuffer) -> pa.Table:
+    """KlineBuffer 컬럼 배열 → SCHEMA 타입의 Table (배열 복사 없이 감쌈)."""
+    arrays = buf.arrays()
+    return pa.Table.from_arrays([pa.array(arrays[c]) for c in STORE_COLUMNS], schema=SCHEMA)
+
+
+def raw_to_table(raw: list) -> pa.Table:
+    """raw klines(list of 12-list) → SCHEMA 타입의 Table ('ignore' 컬럼 제외)."""
+    return buffer_to_table(KlineBuffer(max(len(raw), 1)).extend(raw))
+
+
+def _sorted_unique(table: pa.Table) -> pa.Table:
+    """openTime 정렬 + 중복 제거. 같은 openTime이면 뒤에 온 행(새 데이터)을 남김."""
+    ot = table.column("openTime").to_numpy()
+    order = np.argsort(ot, kind="stable")
+    ot = ot[order]
+    keep = np.ones(len(ot), dtype=bool)
+    keep[:-1] = ot[1:] != ot[:-1]
+    return table.take(pa.array(order[keep]))
+
+
+def write_klines(table: pa.Table, symbol: str, interval: str, root: str = STORE_ROOT) -> int:
+    """연도별 파티션에 병합 저장 (tmp 파일 → os.replace로 원자적 교체). 쓴 행 수 반환."""
+    if table.num_rows == 0:
+        return 0
+    table = table.select(STORE_COLUMNS).cast(SCHEMA)
+    base = partition_dir(root, symbol, interval)
+    os.makedirs(base, exist_ok=True)
+
+    years = pd.to_datetime(table.column("openTime").to_numpy(), unit="ms").year.to_numpy()
+    for year in np.unique(years):
+        part = table.filter(pa.array(years == year))
+        path = os.path.join(base, f"{year}.parquet")
+        if os.path.exists(path):
+            part = pa.concat_tables([pq.read_table(path, schema=SCHEMA), part])
+        part = _sorted_unique(part)
+        tmp = path + ".tmp"
+        pq.write_table(part, tmp, row_group_size=8760, compression="zstd")
+        os.replace(tmp, path)
+    return table.num_rows
+
+
+def _year_files(root: str, symbol: str, interval: str,
+                start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> List[str]:
+    files = sorted(glob.glob(os.path.join(partition_dir(root, symbol, interval), "*.parquet")))
+    out = []
+    for f in files:
+        year = int(os.path.basename(f).split(".")[0])
+        y0 = int(dt.datetime(year, 1, 1, tzinfo=dt.timezone.utc).timestamp() * 1000)
+        y1 = int(dt.datetime(year + 1, 1, 1, tzinfo=dt.timezone.utc).timestamp() * 1000)
+        if (start_ms is None or start_ms < y1) and (end_ms is None or end_ms >= y0):
+            out.append(f)
+    return out
+
+
+def _tail_files(root: str, symbol: str, interval: str,
+                start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> List[str]:
+    files = sorted(glob.glob(os.path.join(partition_dir(root, symbol, interval), TAIL_DIR, "*.parquet")))
+    out = []
+    for f in files:
+        d0 = int(dt.datetime.strptime(os.path.basename(f)[:8], "%Y%m%d")
+                 .replace(tzinfo=dt.timezone.utc).timestamp() * 1000)
+        if (start_ms is None or start_ms < d0 + DAY_MS) and (end_ms is None or end_ms >= d0):
+            out.append(f)
+    return out
+
+
+def store_files(symbol: str, interval: str, root: str = STORE_ROOT) -> List[Tuple[str, int]]:
+    """파티션의 연도 파일 + tail 파일 → [(경로, 그 파일이 담는 기간의 시작 openTime)]."""
+    out = []
+    for f in _year_files(root, symbol, interval):
+        year = int(os.path.basename(f).split(".")[0])
+        out.append((f, int(dt.datetime(year, 1, 1, tzinfo=dt.timezone.utc).timestamp() * 1000)))
+    for f in _tail_files(root, symbol, interval):
+        out.append((f, int(dt.datetime.strptime(os.path.basename(f)[:8], "%Y%m%d")
+                           .replace(tzinfo=dt.timezone.utc).timestamp() * 1000)))
+    return out
+
+
+def append_tail(table: pa.Table, symbol: str, interval: str, root: str = STORE_ROOT) -> int:
+    """
+    실시간으로 들어온 봉을 일별 tail 파일에 병합 (그날 파일만 다시 씀 → 연도 파일은 건드리지 않음).
+    쓴 행 수 반환. 연도 파일로 옮기는 건 compact_tail.
+    """
+    if table.num_rows == 0:
+        return 0
+    table = table.select(STORE_COLUMNS).cast(SCHEMA)
+    base = os.path.join(partition_dir(root, symbol, interval), TAIL_DIR)
+    os.makedirs(base, exist_ok=True)
+
+    days = table.column("openTime").to_numpy() // DAY_MS
+    for day in np.unique(days):
+        part = table.filter(pa.array(days == day))
+        name = dt.datetime.fromtimestamp(int(day) * DAY_MS / 1000, dt.timezone.utc).strftime("%Y%m%d")
+        path = os.path.join(base, f"{name}.parquet")
+        if os.path.exists(path):
+            part = pa.concat_tables([pq.read_table(path, schema=SCHEMA), part])
+        part = _sorted_unique(part)
+        tmp = path + ".tmp"
+        pq.write_table(part, tmp, compression="zstd")
+        os.replace(tmp, path)
+    return table.num_rows
+
+
+def compact_tail(symbol: str, interval: str, root: str = STORE_ROOT) -> int:
+    """
+    tail 파일 전부를 연도 파일에 병합한 뒤 삭제. 옮긴 행 수 반환.
+    연도 파일을 먼저 바꾸고 지우므로 중간에 죽어도 데이터는 남음 (겹친 행은 읽을 때/다음 병합 때 정리).
+    """
+    files = _tail_files(root, symbol, interval)
+    if not files:
+        return 0
+    rows = write_klines(pa.concat_tables([pq.read_table(f, schema=SCHEMA) for f in files]), symbol, interval, root)
+    for f in files:
+        os.remove(f)
+    return rows
+
+
+def read_table(symbol: str, interval: str, start_ms: Optional[int] = None,
+               end_ms: Optional[int] = None, columns: Optional[List[str]] = None,
+               root: str = STORE_ROOT) -> pa.Table:
+    """openTime ∈ [start_ms, end_ms] 구간을 Arrow Table로 읽음 (필요한 연도/tail 파일, row group만)."""
+    filters = []
+    if start_ms is not None:
+        filters.append(("openTime", ">=", start_ms))
+    if end_ms is not None:
+        filters.append(("openTime", "<=", end_ms))
+    cols = list(columns) if columns else STORE_COLUMNS
+    tails = _tail_files(root, symbol, interval, start_ms, end_ms)
+    # tail이 있으면 연도 파일과 겹칠 수 있음 → openTime까지 읽어 정리 후 요청 컬럼만
+    read_cols = cols if not tails or "openTime" in cols else ["openTime"] + cols
+    tables = [pq.read_table(f, columns=read_cols, filters=filters or None, schema=SCHEMA)
+              for f in _year_files(root, symbol, interval, start_ms, end_ms) + tails]
+    if not tables:
+        return SCHEMA.empty_table().select(cols)
+    table = pa.concat_tables(tables)
+    if tails:
+        table = _sorted_unique(table).select(cols)
+    return table
+
+
+def read_klines(symbol: str, interval: str, start: Optional[dt.datetime] = None,
+                end: Optional[dt.datetime] = None, columns: Optional[List[str]] = None,
+                tz: Optional[str] = None, root: str = STORE_ROOT) -> pd.DataFrame:
+    """
+    저장된 kline을 DataFrame으로 반환.
+    tz=None이면 시간 컬럼은 UTC ms epoch 그대로, tz="Asia/Seoul"이면 그 시간대로 변환 후 tz 제거.
+    """
+    start_ms = to_ms(start) if start is not None else None
+    end_ms = to_ms(end) if end is not None else None
+    df = read_table(symbol, interval, start_ms, end_ms, columns, root).to_pandas()
+    if tz is not None:
+        for c in ("openTime", "closeTime"):
+            if c in df:
+                df[c] = pd.to_datetime(df[c], unit="ms", utc=True).dt.tz_convert(tz).dt.tz_localize(None)
+    return df
+
+
+def last_open_ms(symbol: str, interval: str, root: str = STORE_ROOT) -> Optional[int]:
+    """마지막 연도 파일과 마지막 tail 파일의 openTime 컬럼만 읽어 최신 openTime 반환. 없으면 None."""
+    files = _year_files(root, symbol, interval)[-1:] + _tail_files(root, symbol, interval)[-1:]
+    last = None
+    for f in files:
+        ot = pq.read_table(f, columns=["openTime"]).column("openTime")
+        if len(ot):
+            v = int(pc.max(ot).as_py())
+            last = v if last is None else max(last, v)
+    return last
+
+
+def save_symbol_store(symbol: str, interval: str,
+                      start: dt.datetime, end: Optional[dt.datetime] = None, workers: int = 1,
+                      budget: Optional[WeightBudget] = None,
+                      session: Optional[requests.Session] = None,
+                      cache: Optional[KlineCache] = None,
+                      root: str = STORE_ROOT, flush_rows: int = 200_000) -> bool:
+    """
+    심볼 하나를 저장소에 기록 (run_symbols의 saver로 사용 가능).
+    이미 저장된 구간 이후만 받고, 마감된 봉(closeTime < 현재)만 기록.
+    flush_rows 행마다 파티션에 반영 → 중간에 죽어도 마지막 반영분 이후부터 재개.
+    받은 봉에 빠진 구간이 있으면 경고 (kline_gaps.repair_store로 다시 받을 수 있음).
+    """
+    last = last_open_ms(symbol, interval, root)
+    if last is not None:
+        start = dt.datetime.fromtimestamp((last + 1) / 1000, dt.timezone.utc)
+    if end is None:
+        end = dt.datetime.now(dt.timezone.utc)
+    now_ms = int(dt.datetime.now(dt.timezone.utc).timestamp() * 1000)
+
+    rows = 0
+    pending = KlineBuffer(flush_rows)
+    try:
+        for chunk in iter_binance_klines(symbol, interval, start, end, workers=workers,
+                                         budget=budget, session=session, cache=cache):
+            chunk = [row for row in chunk if row[6] < now_ms]
+            for a, b in find_gaps(last, [row[0] for row in chunk], interval):
+                print(f"[WARN] {symbol}: no klines for openTime {a}~{b}")
+            if chunk:
+                last = chunk[-1][0]
+            pending.extend(chunk)
+            if len(pending) >= flush_rows:
+                rows += write_klines(buffer_to_table(pending), symbol, interval, root)
+                pending.clear()
+        rows += write_klines(buffer_to_table(pending), symbol, interval, root)
+    except Exception as e:
+        print(f"[ERROR] {symbol}: fetch failed → {e} (stored rows={rows})")
+        return False
+
+    print(f"[OK] stored {symbol} {interval} (+{rows} rows)")
+    return True
+
+
+def export_csv(symbol: str, interval: str, out_name: Optional[str] = None,
+               start: Optional[dt.datetime] = None, end: Optional[dt.datetime] = None,
+               root: str = STORE_ROOT) -> str:
+    """save_symbol_csv와 같은 형식(Asia/Seoul, utf-8-sig)으로 CSV 내보내기."""
+    df = read_klines(symbol, interval, start, end, tz="Asia/Seoul", root=root)
+    df["numberOfTrades"] = df["numberOfTrades"].astype("Int64")
+    df["ignore"] = "0"
+    if out_name is None:
+        out_name = f"{symbol}_{interval}.csv"
+    df[KLINE_COLUMNS].to_csv(out_name, index=False, encoding="utf-8-sig")
+    return out_name
+
+
+if __name__ == "__main__":
+    # 🔧 설정
+    symbols: List[str] = DEFAULT_SYMBOLS[:]
+    interval = "1h"
+    start = dt.datetime(2017, 1, 1)
+    end   = None  # None이면 현재까지 (이미 받은 구간 이후만 추가)
+    workers = 8
+    max_symbols = 4
+
+    ok, fail = run_symbols(symbols, interval, start, end, max_symbols=max_symbols, workers=workers,
+                           saver=save_symbol_store)
+    print(f"\nDONE. success={ok}, skipped/failed={fail}, total={len(symbols)}")
@@ -0,0 +1,186 @@
+# kline_ws.py
+# -*- coding: utf-8 -*-
+"""
+바이낸스 <symbol>@kline_<interval> 웹소켓으로 kline_store를 실시간에 가깝게 유지하는 상시 서비스.
+- 심볼 목록을 per_conn개씩 묶어 combined stream 커넥션 몇 개로 구독
+- 마감된 봉(k.x == true)만 모아 flush_interval마다 kline_store의 일별 tail 파일에 기록 (save_symbol_csv와 같은 컬럼)
+  → 연도 파일 전체를 매번 다시 쓰지 않음, compact_every초마다(그리고 종료 시) 연도 파일로 병합
+- (재)접속할 때마다 마지막 저장 openTime 이후를 get_binance_klines로 보충 → 끊긴 동안의 공백 없음
+- 로컬 테스트: mock_binance.MockKlineStream + BINANCE_WS_BASE/BINANCE_API_BASE 환경변수
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+import datetime as dt
+from typing import Dict, List, Optional
+
+import websockets
+
+from multi_symbols_to_csv import DEFAULT_SYMBOLS, KlineBuffer, WeightBudget, fetch_kline_arrays, make_session
+from kline_store import STORE_ROOT, append_tail, buffer_to_table, compact_tail, last_open_ms
+
+WS_BASE = os.getenv("BINANCE_WS_BASE", "wss://stream.binance.com:9443")
+MAX_STREAMS_PER_CONN = 1024  # 바이낸스 combined stream 한도
+
+
+def stream_urls(symbols: List[str], interval: str, per_conn: int = 200) -> List[str]:
+    """심볼 목록 → combined stream URL 목록 (커넥션당 per_conn개)."""
+    per_conn = min(per_conn, MAX_STREAMS_PER_CONN)
+    urls = []
+    for i in range(0, len(symbols), per_conn):
+        streams = "/".join(f"{s.lower()}@kline_{interval}" for s in symbols[i:i + per_conn])
+        urls.append(f"{WS_BASE}/stream?streams={streams}")
+    return urls
+
+
+def kline_event_to_row(k: dict) -> list:
+    """웹소켓 kline 이벤트의 k → REST klines와 같은 12열 row."""
+    return [k["t"], k["o"], k["h"], k["l"], k["c"], k["v"], k["T"], k["q"], k["n"],
+            k["V"], k["Q"], "0"]
+
+
+class KlineStreamService:
+    def __init__(self, symbols: List[str], interval: str = "1m", root: str = STORE_ROOT,
+                 flush_interval: float = 5.0, compact_every: float = 3600.0, per_conn: int = 200,
+                 backfill_workers: int = 4):
+        self.symbols = [s.upper() for s in symbols]
+        self.interval = interval
+        self.root = root
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self.per_conn = per_conn
+        self.backfill_workers = backfill_workers
+        self.budget = WeightBudget()
+        self.session = make_session(backfill_workers)
+        # 심볼별 미기록 봉 / 파티션 쓰기 잠금 (보충 스레드와 flush가 같은 파일을 건드림)
+        self._pending: Dict[str, KlineBuffer] = {s: KlineBuffer(64) for s in self.symbols}
+        self._locks: Dict[str, threading.Lock] = {s: threading.Lock() for s in self.symbols}
+        self.received = 0
+        self.written = 0
+        self.reconnects = 0
+
+    # ---- 보충 (REST) ----
+    def _backfill_one(self, symbol: str) -> int:
+        last = last_open_ms(symbol, self.interval, self.root)
+        if last is None:
+            return 0  # 처음부터 받는 건 kline_store / kline_archive 몫
+        start = dt.datetime.fromtimestamp((last + 1) / 1000, dt.timezone.utc)
+        end = dt.datetime.now(dt.timezone.utc)
+        buf = fetch_kline_arrays(symbol, self.interval, start, end, budget=self.budget,
+                                 session=self.session)
+        cols = buf.arrays()
+        closed = cols["closeTime"] < int(time.time() * 1000)
+        tail = KlineBuffer(max(int(closed.sum()), 1)).extend_arrays({c: a[closed] for c, a in cols.items()})
+        with self._locks[symbol]:
+            return append_tail(buffer_to_table(tail), symbol, self.interval, self.root)
+
+    async def backfill(self, symbols: List[str]) -> None:
+        sem = asyncio.Semaphore(self.backfill_workers)
+
+        async def one(sym):
+            async with sem:
+                try:
+                    n = await asyncio.to_thread(self._backfill_one, sym)
+                    if n:
+                        print(f"[BACKFILL] {sym} +{n}")
+                except Exception as e:
+                    print(f"[BACKFILL ERR] {sym}: {e}")
+
+        await asyncio.gather(*(one(s) for s in symbols))
+
+    # ---- 기록 ----
+    def _flush_one(self, symbol: str, buf: KlineBuffer) -> int:
+        with self._locks[symbol]:
+            return append_tail(buffer_to_table(buf), symbol, self.interval, self.root)
+
+    def _compact_one(self, symbol: str) -> int:
+        with self._locks[symbol]:
+            return compact_tail(symbol, self.interval, self.root)
+
+    async def flush(self) -> None:
+        for sym in self.symbols:
+            buf = self._pending[sym]
+            if not len(buf):
+                continue
+            self._pending[sym] = KlineBuffer(64)
+            self.written += await asyncio.to_thread(self._flush_one, sym, buf)
+
+    async def compact(self) -> None:
+        for sym in self.symbols:
+            try:
+                await asyncio.to_thread(self._compact_one, sym)
+            except Exception as e:
+                print(f"[COMPACT ERR] {sym}: {e}")
+
+    async def _flush_loop(self) -> None:
+        last_compact = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            if time.monotonic() - last_compact >= self.compact_every:
+                await self.compact()
+                last_compact = time.monotonic()
+
+    # ---- 수신 ----
+    def on_message(self, msg) -> None:
+        data = json.loads(msg).get("data", {})
+        k = data.get("k")
+        if data.get("e") != "kline" or not k or not k.get("x"):
+            return  # 진행 중인 봉 갱신은 무시
+        sym = data["s"].upper()
+        if sym in self._pending:
+            self._pending[sym].extend([kline_event_to_row(k)])
+            self.received += 1
+
+    async def _conn_loop(self, url: str, symbols: List[str]) -> None:
+        retry = 1.0
+        while True:
+            backfill: Optional[asyncio.Task] = None
+            try:
+                async with websockets.connect(url, max_size=None) as ws:
+                    print(f"[WS] connected ({len(symbols)} streams)")
+                    retry = 1.0
+                    # 접속 직후 보충: 끊긴 동안(또는 서비스 시작 전) 빠진 봉
+                    backfill = asyncio.create_task(self.backfill(symbols))
+                    async for msg in ws:
+                        self.on_message(msg)
+                    await backfill
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[WS] {e}; reconnect in {retry:.0f}s")
+            finally:
+                # 끊기거나 취소되면 보충 태스크도 정리 (다음 접속에서 새로 보충)
+                if backfill is not None and not backfill.done():
+                    backfill.cancel()
+            self.reconnects += 1
+            await asyncio.sleep(retry)
+            retry = min(retry * 2, 60.0)
+
+    async def run(self) -> None:
+        groups = [self.symbols[i:i + self.per_conn] for i in range(0, len(self.symbols), self.per_conn)]
+        urls = stream_urls(self.symbols, self.interval, self.per_conn)
+        tasks = [asyncio.create_task(self._conn_loop(u, g)) for u, g in zip(urls, groups)]
+        tasks.append(asyncio.create_task(self._flush_loop()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                t.cancel()
+            await self.flush()
+            await self.compact()
+
+
+def main(symbols: Optional[List[str]] = None, interval: str = "1m") -> None:
+    service = KlineStreamService(symbols or DEFAULT_SYMBOLS, interval)
+    try:
+        asyncio.run(service.run())
+    except KeyboardInterrupt:
+        print(f"bye (received={service.received}, written={service.written})")
+
+
+if __name__ == "__main__":
+    main(DEFAULT_SYMBOLS[:], "1m")
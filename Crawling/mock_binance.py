@@ -0,0 +1,461 @@
+# mock_binance.py
+# -*- coding: utf-8 -*-
+"""
+바이낸스 REST 로컬 대역 서버 (성능 측정/회귀 확인용, 실 API 호출 없음).
+- /api/v3/klines: 심볼/봉 시각으로 결정되는 합성 데이터 (같은 요청 → 항상 같은 응답)
+- /api/v3/aggTrades: 상장 시각부터 약 AGG_SPACING_MS 간격의 합성 체결 (id는 0부터 연속)
+- 심볼별 상장 시각도 결정적으로 정해 상장 전 구간(빈 응답) 경로까지 재현
+- latency: 응답 지연(초), rate_429: 무작위 429 비율, weight_limit: 1분 가중치 한도 (넘으면 429)
+- 응답마다 X-MBX-USED-WEIGHT-1M 헤더 포함
+- MockKlineStream: /stream?streams=<symbol>@kline_<interval>/... combined stream 대역
+  (실제 시각 기준으로 마감된 봉을 REST 대역과 같은 값으로 보냄, drop_after로 강제 끊김 재현)
+- /api/v3/ticker/24hr, /api/v3/ticker/price: universe 전체 심볼 (가격 = 그 분 1m 종가, 거래량은 심볼마다 자릿수가 크게 다름)
+- MockMiniTickerStream: <symbol>@miniTicker 대역 (c = 그 분 1m 봉 종가)
+- MockDepthBook + /api/v3/depth + MockDepthStream: 합성 호가창 하나를 REST 스냅샷과
+  <symbol>@depth@100ms diff stream이 공유 (drop_every로 이벤트 유실 → 재동기화 경로 재현)
+
+사용:
+    server = MockBinance(latency=0.02).start()
+    os.environ["BINANCE_API_BASE"] = server.url   # multi_symbols_to_csv import 전에
+"""
+
+import json
+import time
+import random
+import zlib
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import websockets
+
+INTERVAL_MS = {
+    "1s": 1_000,
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000,
+    "1d": 86_400_000, "3d": 259_200_000, "1w": 604_800_000,
+}
+EPOCH_2017 = 1483228800000
+EPOCH_2020 = 1577836800000
+ROUTES = {"/api/v3/klines": "klines", "/api/v3/aggTrades": "agg_trades", "/api/v3/depth": "depth",
+          "/api/v3/ticker/24hr": "ticker_24hr", "/api/v3/ticker/price": "ticker_price"}
+WEIGHTS = {"/api/v3/klines": 2, "/api/v3/aggTrades": 4, "/api/v3/depth": 250,
+           "/api/v3/ticker/24hr": 80, "/api/v3/ticker/price": 4}
+AGG_SPACING_MS = 2_000
+
+
+def listing_ms(symbol: str) -> int:
+    """심볼별 상장 시각 (2017~2020 사이, 시간 단위 정렬)."""
+    h = zlib.crc32(symbol.encode())
+    return EPOCH_2017 + (h % ((EPOCH_2020 - EPOCH_2017) // 3_600_000)) * 3_600_000
+
+
+def synth_klines(symbol: str, interval: str, open_ms: np.ndarray) -> list:
+    """openTime 배열 → 바이낸스 응답과 같은 12열 row 리스트 (가격은 문자열)."""
+    step = INTERVAL_MS[interval]
+    seed = zlib.crc32(symbol.encode()) % 1000
+    t = open_ms / 86_400_000.0
+    base = 10.0 + seed / 10.0
+    o = base * (1.0 + 0.3 * np.sin(t / 30.0 + seed) + 0.05 * np.sin(t * 7.0 + open_ms % 97))
+    c = base * (1.0 + 0.3 * np.sin((t + step / 86_400_000.0) / 30.0 + seed)
+                + 0.05 * np.sin(t * 11.0 + open_ms % 89))
+    hi = np.maximum(o, c) * (1.0 + (open_ms % 13) / 1000.0)
+    lo = np.minimum(o, c) * (1.0 - (open_ms % 11) / 1000.0)
+    vol = 100.0 + (open_ms // step) % 1000
+    trades = (50 + (open_ms // step) % 500).astype(np.int64)
+    rows = []
+    for i in range(len(open_ms)):
+        ot = int(open_ms[i])
+        rows.append([ot, f"{o[i]:.8f}", f"{hi[i]:.8f}", f"{lo[i]:.8f}", f"{c[i]:.8f}",
+                     f"{vol[i]:.8f}", ot + step - 1, f"{vol[i] * c[i]:.8f}", int(trades[i]),
+                     f"{vol[i] / 2:.8f}", f"{vol[i] * c[i] / 2:.8f}", "0"])
+    return rows
+
+
+def agg_time(symbol: str, ids: np.ndarray) -> np.ndarray:
+    """aggTrade id → 체결 시각 (id가 커질수록 증가, 간격은 1~3초)."""
+    return listing_ms(symbol) + ids * AGG_SPACING_MS + (ids * 7919) % 1000
+
+
+def synth_agg_trades(symbol: str, ids: np.ndarray) -> list:
+    """id 배열 → aggTrades 응답과 같은 dict 리스트."""
+    seed = zlib.crc32(symbol.encode()) % 1000
+    t = agg_time(symbol, ids)
+    price = (10.0 + seed / 10.0) * (1.0 + 0.3 * np.sin(t / 86_400_000.0 / 30.0 + seed)
+                                    + 0.001 * np.sin(ids * 0.37))
+    qty = 0.01 + (ids * 2654435761 % 10_000) / 1000.0
+    n = 1 + ids % 3
+    return [{"a": int(ids[i]), "p": f"{price[i]:.8f}", "q": f"{qty[i]:.8f}", "f": int(ids[i] * 3),
+             "l": int(ids[i] * 3 + n[i] - 1), "T": int(t[i]), "m": bool(ids[i] * 31 % 7 < 3), "M": True}
+            for i in range(len(ids))]
+
+
+class MockDepthBook:
+    """
+    심볼별 합성 호가창 (가격은 0.01 tick 정수로 보관). step()마다 최우선 근처 몇 호가를 바꾸고
+    update id를 1~3 올려 depthUpdate 이벤트를 만듦. REST/WS 스레드가 함께 쓰므로 잠금 사용.
+    """
+
+    def __init__(self, symbols, levels: int = 2000, changes: int = 20, seed: int = 0):
+        self.changes = changes
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._books = {}
+        for sym in symbols:
+            sym = sym.upper()
+            mid = 100_000 + zlib.crc32(sym.encode()) % 100_000
+            bids = {mid - 1 - i: self._qty() for i in range(levels)}
+            asks = {mid + 1 + i: self._qty() for i in range(levels)}
+            self._books[sym] = {"bids": bids, "asks": asks, "mid": mid,
+                                "last": 1_000 + zlib.crc32(sym.encode()) % 1_000}
+
+    def _qty(self) -> float:
+        return round(self._rng.uniform(0.001, 5.0), 3)
+
+    def step(self, symbol: str) -> dict:
+        with self._lock:
+            book = self._books[symbol.upper()]
+            book["mid"] += self._rng.choice((-1, 0, 0, 1))
+            mid = book["mid"]
+            out = {"b": {}, "a": {}}
+            for _ in range(self.changes):
+                side = self._rng.choice(("bids", "asks"))
+                off = int(self._rng.expovariate(1 / 20.0))
+                tick = mid - 1 - off if side == "bids" else mid + 1 + off
+                qty = 0.0 if self._rng.random() < 0.3 else self._qty()
+                if qty:
+                    book[side][tick] = qty
+                else:
+                    book[side].pop(tick, None)
+                out[side[0]][tick] = qty
+            # mid는 한 번에 1 tick만 움직이므로 mid에 걸친 호가만 정리하면 양쪽이 겹치지 않음
+            for side in ("bids", "asks"):
+                if book[side].pop(mid, None) is not None:
+                    out[side[0]][mid] = 0.0
+            first = book["last"] + 1
+            book["last"] += self._rng.randint(1, 3)
+            return {"e": "depthUpdate", "E": int(time.time() * 1000), "s": symbol.upper(),
+                    "U": first, "u": book["last"],
+                    "b": [[f"{t / 100:.2f}", f"{q:.3f}"] for t, q in out["b"].items()],
+                    "a": [[f"{t / 100:.2f}", f"{q:.3f}"] for t, q in out["a"].items()]}
+
+    def snapshot(self, symbol: str, limit: int = 100) -> dict:
+        with self._lock:
+            book = self._books[symbol.upper()]
+            bids = sorted(book["bids"].items(), reverse=True)[:limit]
+            asks = sorted(book["asks"].items())[:limit]
+            return {"lastUpdateId": book["last"],
+                    "bids": [[f"{t / 100:.2f}", f"{q:.3f}"] for t, q in bids],
+                    "asks": [[f"{t / 100:.2f}", f"{q:.3f}"] for t, q in asks]}
+
+
+class MockBinance:
+    # 경로 → 처리 메서드 이름. "/"로 끝나는 키는 접두사로 매칭 (하위 클래스에서 교체 가능)
+    routes = ROUTES
+    weights = WEIGHTS
+
+    def __init__(self, latency: float = 0.0, rate_429: float = 0.0, weight_limit: int = 6000,
+                 retry_after: float = 0.2, now_ms: Optional[int] = None, seed: int = 0,
+                 host: str = "127.0.0.1", port: int = 0, depth: Optional[MockDepthBook] = None,
+                 universe: Optional[list] = None):
+        self.depth_book = depth
+        self.universe = universe or [f"S{i:04d}USDT" for i in range(400)]
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.weight_limit = weight_limit
+        self.retry_after = retry_after
+        self.now_ms = now_ms  # None이면 실제 현재 시각 (진행 중인 봉 포함)
+        self.requests = 0
+        self.throttled = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._minute = -1
+        self._used = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockBinance":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _charge(self, weight: int):
+        """(사용 가중치, 429 여부)"""
+        with self._lock:
+            self.requests += 1
+            minute = int(time.time() // 60)
+            if minute != self._minute:
+                self._minute, self._used = minute, 0
+            self._used += weight
+            throttle = self._used > self.weight_limit or self._rng.random() < self.rate_429
+            if throttle:
+                self.throttled += 1
+            return self._used, throttle
+
+    def klines(self, q: dict) -> list:
+        symbol = q["symbol"].upper()
+        step = INTERVAL_MS[q["interval"]]
+        limit = min(int(q.get("limit", 500)), 1000)
+        now = self.now_ms if self.now_ms is not None else int(time.time() * 1000)
+        start = max(int(q.get("startTime", 0)), listing_ms(symbol))
+        end = min(int(q.get("endTime", now)), now)
+        first = -(-start // step) * step
+        if first > end:
+            return []
+        opens = np.arange(first, min(end, first + (limit - 1) * step) + 1, step, dtype=np.int64)
+        return synth_klines(symbol, q["interval"], opens)
+
+    def agg_trades(self, q: dict) -> list:
+        symbol = q["symbol"].upper()
+        limit = min(int(q.get("limit", 500)), 1000)
+        now = self.now_ms if self.now_ms is not None else int(time.time() * 1000)
+        last = (now - listing_ms(symbol)) // AGG_SPACING_MS
+        while last >= 0 and agg_time(symbol, np.array([last]))[0] > now:
+            last -= 1
+        if last < 0:
+            return []
+        if "fromId" in q:
+            first = int(q["fromId"])
+        elif "startTime" in q:
+            start = int(q["startTime"])
+            first = max((start - listing_ms(symbol) - 999) // AGG_SPACING_MS, 0)
+            while first <= last and agg_time(symbol, np.array([first]))[0] < start:
+                first += 1
+        else:
+            first = last - limit + 1
+        first = max(first, 0)
+        ids = np.arange(first, min(first + limit - 1, last) + 1, dtype=np.int64)
+        if "endTime" in q:
+            ids = ids[agg_time(symbol, ids) <= int(q["endTime"])]
+        return synth_agg_trades(symbol, ids)
+
+    def depth(self, q: dict) -> dict:
+        if self.depth_book is None:
+            raise KeyError("depth book not configured")
+        return self.depth_book.snapshot(q["symbol"], min(int(q.get("limit", 100)), 5000))
+
+    def _tickers(self):
+        now = self.now_ms if self.now_ms is not None else int(time.time() * 1000)
+        minute = np.array([now // 60_000 * 60_000], dtype=np.int64)
+        for i, sym in enumerate(self.universe):
+            row = synth_klines(sym, "1m", minute)[0]
+            yield sym, row, now, 10.0 ** (i % 12)  # 거래량 배율 1 ~ 1e11
+
+    def ticker_price(self, q: dict) -> list:
+        return [{"symbol": sym, "price": row[4]} for sym, row, _, _ in self._tickers()]
+
+    def ticker_24hr(self, q: dict) -> list:
+        out = []
+        for sym, row, now, mult in self._tickers():
+            close = float(row[4])
+            vol = float(row[5]) * mult
+            out.append({
+                "symbol": sym, "lastPrice": row[4], "bidPrice": f"{close * 0.9999:.8f}", "bidQty": "1.50000000",
+                "askPrice": f"{close * 1.0001:.8f}", "askQty": "2.25000000", "openPrice": row[1],
+                "highPrice": row[2], "lowPrice": row[3], "volume": f"{vol:.8f}",
+                "quoteVolume": f"{vol * close:.8f}", "openTime": now - 86_400_000, "closeTime": now,
+                "count": int(row[8]) * 100,
+            })
+        return out
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, headers: dict):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                name = mock.routes.get(url.path) or next(
+                    (v for k, v in mock.routes.items() if k.endswith("/") and url.path.startswith(k)), "")
+                route = getattr(mock, name, None)
+                if route is None:
+                    self._send(404, b'{"code":-1,"msg":"not found"}', {})
+                    return
+                q = {k: v[0] for k, v in parse_qs(url.query).items()}
+                q["_path"] = url.path
+                if mock.latency:
+                    time.sleep(mock.latency)
+                used, throttle = mock._charge(mock.weights.get(url.path, 1))
+                headers = {"X-MBX-USED-WEIGHT-1M": str(used)}
+                if throttle:
+                    headers["Retry-After"] = str(mock.retry_after)
+                    self._send(429, b'{"code":-1003,"msg":"Too many requests"}', headers)
+                    return
+                try:
+                    body = json.dumps(route(q), separators=(",", ":")).encode()
+                except (KeyError, ValueError) as e:
+                    self._send(400, json.dumps({"code": -1100, "msg": str(e)}).encode(), headers)
+                    return
+                self._send(200, body, headers)
+
+        return Handler
+
+
+class _WsServer:
+    """별도 스레드의 이벤트 루프에서 self._handler를 websockets 서버로 띄우는 공통 부분."""
+
+    host: str
+    port: int
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    @staticmethod
+    def _streams(ws, path: Optional[str]) -> list:
+        path = path or ws.request.path  # 구버전 websockets는 path를 인자로 넘김
+        return [s for s in parse_qs(urlparse(path).query).get("streams", [""])[0].split("/") if s]
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+
+            async def serve():
+                server = await websockets.serve(self._handler, self.host, self.port)
+                self.port = server.sockets[0].getsockname()[1]
+                ready.set()
+                await asyncio.Future()
+
+            loop.run_until_complete(serve())
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+        return self
+
+
+class MockKlineStream(_WsServer):
+    """
+    바이낸스 combined kline stream 대역 (websockets 서버, 별도 스레드의 이벤트 루프에서 동작).
+    period초마다 구독한 스트림별로 새로 마감된 봉이 있으면 {"stream", "data"} 이벤트 전송.
+    drop_after: 커넥션당 이 개수만큼 보낸 뒤 끊음 (재접속/보충 경로 확인용).
+    """
+
+    def __init__(self, period: float = 0.2, drop_after: Optional[int] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.period = period
+        self.drop_after = drop_after
+        self.host, self.port = host, port
+        self.sent = 0
+        self.connections = 0
+
+    async def _handler(self, ws, path: Optional[str] = None):
+        subs = []
+        for st in self._streams(ws, path):
+            sym, kind = st.split("@")
+            subs.append((st, sym.upper(), kind.split("_", 1)[1]))
+        self.connections += 1
+        last_sent = {st: None for st, _, _ in subs}
+        n = 0
+        while True:
+            now = int(time.time() * 1000)
+            for st, sym, interval in subs:
+                step = INTERVAL_MS[interval]
+                ot = now // step * step - step  # 가장 최근에 마감된 봉
+                if last_sent[st] is not None and ot <= last_sent[st]:
+                    continue
+                row = synth_klines(sym, interval, np.array([ot], dtype=np.int64))[0]
+                k = {"t": row[0], "T": row[6], "s": sym, "i": interval, "o": row[1], "c": row[4],
+                     "h": row[2], "l": row[3], "v": row[5], "n": row[8], "x": True,
+                     "q": row[7], "V": row[9], "Q": row[10], "B": "0"}
+                await ws.send(json.dumps({"stream": st, "data": {"e": "kline", "E": now, "s": sym, "k": k}}))
+                last_sent[st] = ot
+                self.sent += 1
+                n += 1
+                if self.drop_after is not None and n >= self.drop_after:
+                    await ws.close()
+                    return
+            await asyncio.sleep(self.period)
+
+
+class MockDepthStream(_WsServer):
+    """
+    <symbol>@depth@100ms combined stream 대역. period초마다 구독 심볼별로 events개씩 diff 전송.
+    drop_every: 이 개수마다 이벤트 하나를 보내지 않고 버림 (update id 공백 → 클라이언트 재동기화).
+    """
+
+    def __init__(self, book: MockDepthBook, period: float = 0.1, events: int = 1,
+                 drop_every: Optional[int] = None, host: str = "127.0.0.1", port: int = 0):
+        self.book = book
+        self.period = period
+        self.events = events
+        self.drop_every = drop_every
+        self.host, self.port = host, port
+        self.sent = 0
+        self.dropped = 0
+
+    async def _handler(self, ws, path: Optional[str] = None):
+        subs = [(st, st.split("@")[0].upper()) for st in self._streams(ws, path)]
+        n = 0
+        while True:
+            for st, sym in subs:
+                for _ in range(self.events):
+                    ev = self.book.step(sym)
+                    n += 1
+                    if self.drop_every and n % self.drop_every == 0:
+                        self.dropped += 1
+                        continue
+                    await ws.send(json.dumps({"stream": st, "data": ev}))
+                    self.sent += 1
+            await asyncio.sleep(self.period)
+
+
+class MockMiniTickerStream(_WsServer):
+    """<symbol>@miniTicker combined stream 대역. period초마다 구독 심볼별 현재가(그 분 1m 종가) 전송."""
+
+    def __init__(self, period: float = 0.2, host: str = "127.0.0.1", port: int = 0):
+        self.period = period
+        self.host, self.port = host, port
+        self.sent = 0
+
+    async def _handler(self, ws, path: Optional[str] = None):
+        subs = [(st, st.split("@")[0].upper()) for st in self._streams(ws, path)]
+        while True:
+            now = int(time.time() * 1000)
+            minute = np.array([now // 60_000 * 60_000], dtype=np.int64)
+            for st, sym in subs:
+                row = synth_klines(sym, "1m", minute)[0]
+                data = {"e": "24hrMiniTicker", "E": now, "s": sym, "c": row[4], "o": row[1],
+                        "h": row[2], "l": row[3], "v": row[5], "q": row[7]}
+                await ws.send(json.dumps({"stream": st, "data": data}))
+                self.sent += 1
+            await asyncio.sleep(self.period)
+
+
+if __name__ == "__main__":
+    server = MockBinance(port=8765).start()
+    print(f"[MOCK] serving on {server.url}  (BINANCE_API_BASE={server.url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,112 @@
+# mock_upbit.py
+# -*- coding: utf-8 -*-
+"""
+업비트 REST/웹소켓 로컬 대역 (김프 계산 회귀 확인용, 실 API 호출 없음).
+- KRW-USDT 가격 = fx_krw(t), KRW-X 가격 = 바이낸스 대역의 XUSDT 가격 × fx_krw(t) × (1 + premium(t))
+  → 계산한 김프가 premium(t)와 같으면 정답
+- /v1/market/all, /v1/candles/minutes/{unit}, /v1/candles/days (to 이전 count개, 최신순)
+- MockUpbitStream: 구독 메시지의 codes에 대해 period초마다 ticker(trade_price) 전송 (바이너리 프레임)
+
+사용:
+    rest = MockUpbit(["BTC", "ETH"]).start()
+    os.environ["UPBIT_API_BASE"] = rest.url   # upbit_klines import 전에
+"""
+
+import json
+import time
+import asyncio
+import datetime as dt
+from typing import List, Optional
+
+import numpy as np
+
+from mock_binance import INTERVAL_MS, MockBinance, _WsServer, listing_ms, synth_klines
+
+UNIT_INTERVALS = {"1": "1m", "3": "3m", "5": "5m", "15": "15m", "30": "30m", "60": "1h", "240": "4h"}
+
+
+def fx_krw(t_ms: np.ndarray) -> np.ndarray:
+    """원/달러(USDT) 환율."""
+    return 1300.0 + 30.0 * np.sin(np.asarray(t_ms) / 86_400_000.0 / 10.0)
+
+
+def premium(t_ms: np.ndarray) -> np.ndarray:
+    """김프 (0.03 = 3%)."""
+    return 0.03 + 0.02 * np.sin(np.asarray(t_ms) / 86_400_000.0 * 2 * np.pi / 7.0)
+
+
+def krw_ohlc(base: str, interval: str, open_ms: np.ndarray) -> np.ndarray:
+    """(n, 4) open/high/low/close (원). 환율/김프는 봉 시작 시각 값으로 고정."""
+    open_ms = np.asarray(open_ms, dtype=np.int64)
+    scale = fx_krw(open_ms)
+    if base == "USDT":
+        return np.repeat(scale[:, None], 4, axis=1)
+    rows = synth_klines(base + "USDT", interval, open_ms)
+    usdt = np.array([[float(r[1]), float(r[2]), float(r[3]), float(r[4])] for r in rows]).reshape(-1, 4)
+    return usdt * (scale * (1.0 + premium(open_ms)))[:, None]
+
+
+class MockUpbit(MockBinance):
+    routes = {"/v1/market/all": "markets", "/v1/candles/": "candles"}
+    weights = {}
+
+    def __init__(self, bases: List[str], **kw):
+        super().__init__(**kw)
+        self.bases = [b.upper() for b in bases]
+
+    def markets(self, q: dict) -> list:
+        return [{"market": f"KRW-{b}", "korean_name": b, "english_name": b}
+                for b in self.bases + ["USDT"]]
+
+    def candles(self, q: dict) -> list:
+        kind = q["_path"].rsplit("/candles/", 1)[1]
+        interval = "1d" if kind == "days" else UNIT_INTERVALS[kind.split("/")[1]]
+        step = INTERVAL_MS[interval]
+        base = q["market"].split("-", 1)[1]
+        count = min(int(q.get("count", 1)), 200)
+        now = self.now_ms if self.now_ms is not None else int(time.time() * 1000)
+        to = q.get("to")
+        to_ms = now if to is None else int(dt.datetime.fromisoformat(to.replace("Z", "+00:00")).timestamp() * 1000)
+        last = (min(to_ms, now) - 1) // step * step  # to 이전에 시작한 마지막 봉 (진행 중 봉 포함)
+        first = max(last - (count - 1) * step, -(-listing_ms(base + "USDT") // step) * step)
+        if first > last:
+            return []
+        opens = np.arange(last, first - 1, -step, dtype=np.int64)
+        ohlc = krw_ohlc(base, interval, opens)
+        out = []
+        for i, ot in enumerate(opens):
+            utc = dt.datetime.fromtimestamp(ot / 1000, dt.timezone.utc)
+            vol = 1.0 + (ot // step) % 100
+            out.append({
+                "market": q["market"],
+                "candle_date_time_utc": utc.strftime("%Y-%m-%dT%H:%M:%S"),
+                "candle_date_time_kst": (utc + dt.timedelta(hours=9)).strftime("%Y-%m-%dT%H:%M:%S"),
+                "opening_price": ohlc[i, 0], "high_price": ohlc[i, 1],
+                "low_price": ohlc[i, 2], "trade_price": ohlc[i, 3],
+                "timestamp": int(ot + step - 1), "candle_acc_trade_price": vol * ohlc[i, 3],
+                "candle_acc_trade_volume": vol,
+            })
+        return out
+
+
+class MockUpbitStream(_WsServer):
+    """업비트 웹소켓 ticker 대역. trade_price = 그 분 1m 봉 종가 (바이낸스 MockMiniTickerStream과 같은 분 기준)."""
+
+    def __init__(self, period: float = 0.2, host: str = "127.0.0.1", port: int = 0):
+        self.period = period
+        self.host, self.port = host, port
+        self.sent = 0
+
+    async def _handler(self, ws, path: Optional[str] = None):
+        req = json.loads(await ws.recv())
+        codes = next(r["codes"] for r in req if r.get("type") == "ticker")
+        while True:
+            now = int(time.time() * 1000)
+            minute = np.array([now // 60_000 * 60_000], dtype=np.int64)
+            for code in codes:
+                price = float(krw_ohlc(code.split("-", 1)[1], "1m", minute)[0, 3])
+                msg = {"type": "ticker", "code": code, "trade_price": price,
+                       "timestamp": now, "trade_timestamp": now, "stream_type": "REALTIME"}
+                await ws.send(json.dumps(msg).encode())
+                self.sent += 1
+            await asyncio.sleep(self.period)
@@ -6,15 +6,43 @@
 - 기본: 1시간봉, 2017-01-01 ~ 2025-12-31 (UTC 기준)
 - 시간 컬럼은 Asia/Seoul로 변환 후 tz 제거 → CSV에 ISO 문자열로 기록
 - 빈 데이터/미상장 심볼은 자동 건너뜀
+- workers > 1이면 기간을 interval×limit 구간으로 잘라 동시 요청 (샤딩 모드)
+- 여러 심볼을 동시에 처리하되 커넥션 풀/가중치 예산은 하나를 공유
+- 증분 모드: 기존 CSV의 마지막 openTime 이후만 받아 append
 """
 
+import os
 import time
+import threading
 import datetime as dt
-from typing import List
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Iterator, Optional, Callable
+from zoneinfo import ZoneInfo
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 
-BASE_URL = "https://api.binance.com/api/v3/klines"
+from kline_cache import KlineCache
+
+# 로컬 대역 서버(mock_binance.py)로 돌릴 때는 BINANCE_API_BASE=http://127.0.0.1:포트
+API_BASE = os.getenv("BINANCE_API_BASE", "https://api.binance.com")
+BASE_URL = f"{API_BASE}/api/v3/klines"
+KST = ZoneInfo("Asia/Seoul")
+
+KLINES_WEIGHT = 2        # /api/v3/klines 요청 1회 가중치
+WEIGHT_LIMIT_1M = 6000   # 스팟 REQUEST_WEIGHT 한도 (IP당 1분)
+
+# 고정 길이 interval (ms). 1M(월봉)은 길이가 달라 제외
+INTERVAL_MS = {
+    "1s": 1_000,
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000,
+    "1d": 86_400_000, "3d": 259_200_000, "1w": 604_800_000,
+}
 
 DEFAULT_SYMBOLS = [
     # 2017~2025 사이 장기간 활발 (알트 위주)
@@ -24,23 +52,146 @@ DEFAULT_SYMBOLS = [
     # 필요 시 추가: "XEMUSDT","ZECUSDT","DASHUSDT" 등 (상태에 따라 빈 데이터 가능)
 ]
 
-def get_binance_klines(symbol: str, interval: str, start: dt.datetime, end: dt.datetime,
-                       limit: int = 1000, pause: float = 0.25, max_retries: int = 4) -> list:
-    """start~end 구간의 모든 klines를 수집하여 raw list로 반환."""
-    # datetime -> ms epoch (naive는 UTC로 가정)
-    if start.tzinfo is None:
-        start = start.replace(tzinfo=dt.timezone.utc)
-    if end.tzinfo is None:
-        end = end.replace(tzinfo=dt.timezone.utc)
-    start_ms = int(start.timestamp() * 1000)
-    end_ms = int(end.timestamp() * 1000)
+def to_ms(t: dt.datetime) -> int:
+    """datetime -> ms epoch (naive는 UTC로 가정)"""
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=dt.timezone.utc)
+    return int(t.timestamp() * 1000)
+
+
+class WeightBudget:
+    """
+    1분 단위 REQUEST_WEIGHT 예산. 여러 스레드/심볼이 하나를 공유.
+    - 바이낸스 한도(6000)보다 여유 있게 잡아 다른 프로세스/수동 호출 몫을 남김
+    - 응답 헤더 X-MBX-USED-WEIGHT-1M으로 서버 집계와 동기화
+    - 429/418 수신 시 Retry-After 동안 모든 요청 정지
+    """
+
+    def __init__(self, limit: int = int(WEIGHT_LIMIT_1M * 0.8)):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._minute = -1
+        self._used = 0
+        self._blocked_until = 0.0
+
+    def acquire(self, weight: int = KLINES_WEIGHT) -> None:
+        while True:
+            with self._lock:
+                now = time.time()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    minute = int(now // 60)
+                    if minute != self._minute:  # 분이 바뀌면 리셋
+                        self._minute, self._used = minute, 0
+                    if self._used + weight <= self.limit:
+                        self._used += weight
+                        return
+                    wait = 60 - now % 60
+            time.sleep(wait)
+
+    def update(self, headers) -> None:
+        """서버가 알려준 사용 가중치로 보정 (다른 프로세스 사용분까지 반영)."""
+        used = headers.get("X-MBX-USED-WEIGHT-1M") or headers.get("X-MBX-USED-WEIGHT")
+        if not used:
+            return
+        with self._lock:
+            minute = int(time.time() // 60)
+            if minute != self._minute:
+                self._minute, self._used = minute, 0
+            self._used = max(self._used, int(used))
+
+    def block(self, seconds: float) -> None:
+        """429(한도 초과)/418(IP 차단) → seconds 동안 전체 정지."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.time() + seconds)
+
 
+def make_session(pool_size: int = 16) -> requests.Session:
+    """keep-alive 커넥션 풀을 여러 스레드가 같이 쓰는 세션."""
     session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     session.headers.update({"Accept": "application/json"})
-    all_data: list = []
+    return session
+
+
+def request_json(session: requests.Session, url: str, params: dict,
+                 weight: int = KLINES_WEIGHT, pause: float = 0.25, max_retries: int = 4,
+                 budget: Optional[WeightBudget] = None):
+    """REST 한 번 호출 (재시도 with 백오프). 끝내 실패하면 None."""
+    for attempt in range(max_retries):
+        if budget is not None:
+            budget.acquire(weight)
+        try:
+            r = session.get(url, params=params, timeout=20)
+            if budget is not None:
+                budget.update(r.headers)
+            # 429/418 등 레이트 제한 → 잠시 대기 후 재시도
+            if r.status_code in (429, 418):
+                retry_after = float(r.headers.get("Retry-After") or (1.0 + attempt))
+                if budget is not None:
+                    budget.block(retry_after)
+                else:
+                    time.sleep(retry_after)
+                continue
+            r.raise_for_status()
+            return r.json()
+        except requests.RequestException:
+            time.sleep(pause * (attempt + 1))
+    return None
+
+
+def split_windows(start_ms: int, end_ms: int, interval: str, limit: int = 1000) -> List[Tuple[int, int]]:
+    """[start_ms, end_ms]를 interval×limit 크기의 (startTime, endTime) 구간들로 분할."""
+    step = INTERVAL_MS[interval] * limit
+    return [(s, min(s + step - 1, end_ms)) for s in range(start_ms, end_ms + 1, step)]
+
+
+def find_gaps(prev_open: Optional[int], open_ms: List[int], interval: str) -> List[Tuple[int, int]]:
+    """
+    이어 붙일 openTime들(prev_open = 이미 저장된 마지막 openTime)에서 빠진 구간 → [(첫 빠진 openTime, 마지막)].
+    1M처럼 길이가 일정하지 않은 interval은 검사하지 않음 (빈 목록).
+    """
+    step = INTERVAL_MS.get(interval)
+    if step is None or not open_ms:
+        return []
+    ot = np.asarray(([prev_open] if prev_open is not None else []) + list(open_ms), dtype=np.int64)
+    pos = np.flatnonzero(np.diff(ot) > step)
+    return [(int(ot[i]) + step, int(ot[i + 1]) - step) for i in pos]
+
+
+def _fetch_klines(session, params, pause, max_retries, budget, cache):
+    """
+    klines window 하나 → (chunk, 캐시 적중 여부).
+    cache가 있으면 먼저 조회(endTime 이후 행은 잘라냄), 마감된 window는 받은 뒤 저장.
+    마지막 봉이 아직 진행 중(closeTime ≥ 현재)이면 저장하지 않음.
+    limit행이 안 되는 캐시(상장 전 등)는 요청 범위가 그 window 안일 때만 사용.
+    """
+    key = (params["symbol"], params["interval"], params["startTime"], params["limit"])
+    step = INTERVAL_MS.get(params["interval"])
+    window_ms = step * params["limit"] if step is not None else None
+    in_window = window_ms is not None and params["endTime"] - params["startTime"] + 1 <= window_ms
+    if cache is not None:
+        chunk = cache.get(*key)
+        if chunk is not None and (len(chunk) == params["limit"] or in_window):
+            return [row for row in chunk if row[0] <= params["endTime"]], True
+    chunk = request_json(session, BASE_URL, params, KLINES_WEIGHT, pause, max_retries, budget)
+    if cache is not None and chunk is not None:
+        # endTime이 지났어도 startTime이 봉 경계가 아니면 마지막 봉은 endTime 뒤에 마감 → 받은 봉 기준으로 판단
+        now_ms = time.time() * 1000
+        window_closed = (window_ms is not None and params["endTime"] < now_ms
+                         and params["endTime"] - params["startTime"] + 1 == window_ms
+                         and (not chunk or chunk[-1][6] < now_ms))
+        cache.put(*key, chunk, window_closed=window_closed)
+    return chunk, False
+
+
+def _iter_sequential(session, symbol, interval, start_ms, end_ms, limit, pause, max_retries,
+                     budget, cache):
     cursor = start_ms
     last_progress = None
-
     while True:
         params = {
             "symbol": symbol.upper(),
@@ -49,21 +200,7 @@ def get_binance_klines(symbol: str, interval: str, start: dt.datetime, end: dt.d
             "startTime": cursor,
             "endTime": end_ms
         }
-
-        # 재시도 with 백오프
-        chunk = None
-        for attempt in range(max_retries):
-            try:
-                r = session.get(BASE_URL, params=params, timeout=20)
-                # 429/418 등 레이트 제한 → 잠시 대기 후 재시도
-                if r.status_code == 429:
-                    time.sleep(1.0 + attempt)
-                    continue
-                r.raise_for_status()
-                chunk = r.json()
-                break
-            except requests.RequestException:
-                time.sleep(pause * (attempt + 1))
+        chunk, cached = _fetch_klines(session, params, pause, max_retries, budget, cache)
         if chunk is None:  # 끝내 실패
             print(f"[WARN] {symbol}: request failed at cursor={cursor}, skip this window.")
             break
@@ -72,7 +209,7 @@ def get_binance_klines(symbol: str, interval: str, start: dt.datetime, end: dt.d
             # 더 이상 받을 데이터 없음
             break
 
-        all_data.extend(chunk)
+        yield chunk
 
         last_close = chunk[-1][6]  # closeTime(ms)
         if last_progress == last_close or last_close >= end_ms:
@@ -80,44 +217,220 @@ def get_binance_klines(symbol: str, interval: str, start: dt.datetime, end: dt.d
         last_progress = last_close
         cursor = last_close + 1
 
-        time.sleep(pause)
+        if budget is None and not cached:  # 공유 예산이 있으면 속도 조절은 예산에 맡김
+            time.sleep(pause)
+
+
+def _iter_sharded(session, symbol, interval, start_ms, end_ms, limit, pause, max_retries,
+                  workers, budget, cache):
+    """
+    구간을 미리 잘라 동시에 받고, 순서대로 이어 붙이며 openTime 중복 제거.
+    한 구간이 끝내 실패하면 거기서 멈춤 (뒤 구간을 이어 붙이면 중간에 구멍이 남고,
+    마지막 openTime부터 재개하는 증분 저장은 그 구멍을 다시 채우지 않음) → 순차 모드처럼 잘린 채 종료.
+    """
+    windows = split_windows(start_ms, end_ms, interval, limit)
 
+    def fetch(win):
+        params = {
+            "symbol": symbol.upper(),
+            "interval": interval,
+            "limit": limit,
+            "startTime": win[0],
+            "endTime": win[1]
+        }
+        chunk, _ = _fetch_klines(session, params, pause, max_retries, budget, cache)
+        if chunk is None:
+            print(f"[WARN] {symbol}: request failed at window={win[0]}~{win[1]}, stop here.")
+        return chunk
+
+    last_open = None
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        # 앞서 나간 구간은 최대 workers×2개까지만 → 소비가 느려도 메모리가 쌓이지 않음
+        pending: deque = deque()
+        it = iter(windows)
+        for win in islice(it, workers * 2):
+            pending.append(ex.submit(fetch, win))
+        while pending:
+            chunk = pending.popleft().result()  # 구간 순서대로 꺼냄
+            if chunk is None:
+                for fut in pending:  # 아직 시작 안 한 뒤 구간은 취소, 진행 중인 것은 결과를 버림
+                    fut.cancel()
+                return
+            for win in islice(it, 1):
+                pending.append(ex.submit(fetch, win))
+            if not chunk:
+                continue
+            if last_open is not None:
+                chunk = [row for row in chunk if row[0] > last_open]
+                if not chunk:
+                    continue
+            last_open = chunk[-1][0]
+            yield chunk
+
+
+def iter_binance_klines(symbol: str, interval: str, start: dt.datetime, end: dt.datetime,
+                        limit: int = 1000, pause: float = 0.25, max_retries: int = 4,
+                        workers: int = 1, budget: Optional[WeightBudget] = None,
+                        session: Optional[requests.Session] = None,
+                        cache: Optional[KlineCache] = None) -> Iterator[list]:
+    """
+    start~end 구간의 klines를 chunk(최대 limit행) 단위로 시간순 yield.
+    - workers == 1: 기존 방식 (cursor = 직전 closeTime + 1, 고정 pause)
+    - workers > 1 : 샤딩 모드 (interval×limit 구간 동시 요청, budget으로 가중치 제한)
+    - session/budget을 넘기면 여러 심볼이 커넥션 풀과 가중치 예산을 공유
+    - cache(KlineCache)를 넘기면 마감된 window는 디스크 캐시에서 읽음
+    """
+    start_ms = to_ms(start)
+    end_ms = to_ms(end)
+
+    if session is None:
+        session = make_session(max(workers, 1))
+
+    if workers > 1 and interval in INTERVAL_MS:
+        # 1M(월봉)은 구간 길이가 일정하지 않아 순차 모드로 처리
+        if budget is None:
+            budget = WeightBudget()
+        yield from _iter_sharded(session, symbol, interval, start_ms, end_ms, limit,
+                                 pause, max_retries, workers, budget, cache)
+    else:
+        yield from _iter_sequential(session, symbol, interval, start_ms, end_ms, limit,
+                                    pause, max_retries, budget, cache)
+
+
+def get_binance_klines(symbol: str, interval: str, start: dt.datetime, end: dt.datetime,
+                       limit: int = 1000, pause: float = 0.25, max_retries: int = 4,
+                       workers: int = 1, budget: Optional[WeightBudget] = None,
+                       session: Optional[requests.Session] = None,
+                       cache: Optional[KlineCache] = None) -> list:
+    """start~end 구간의 모든 klines를 수집하여 raw list로 반환. (workers > 1이면 샤딩 모드)"""
+    all_data: list = []
+    for chunk in iter_binance_klines(symbol, interval, start, end, limit, pause, max_retries,
+                                     workers, budget, session, cache):
+        all_data.extend(chunk)
     return all_data
 
 
+KLINE_COLUMNS = ["openTime","open","high","low","close","volume",
+                 "closeTime","quoteAssetVolume","numberOfTrades",
+                 "takerBuyBase","takerBuyQuote","ignore"]
+
+# KlineBuffer 컬럼 dtype ('ignore'는 항상 "0"이라 보관하지 않음)
+KLINE_DTYPES = {
+    "openTime": np.int64, "open": np.float64, "high": np.float64, "low": np.float64,
+    "close": np.float64, "volume": np.float64, "closeTime": np.int64,
+    "quoteAssetVolume": np.float64, "numberOfTrades": np.int32,
+    "takerBuyBase": np.float64, "takerBuyQuote": np.float64,
+}
+
+
+class KlineBuffer:
+    """
+    kline chunk를 받는 즉시 컬럼별 NumPy 배열로 디코딩해 쌓는 버퍼.
+    - 용량이 차면 2배로 늘림 (raw list/DataFrame 중간 복사본 없이 최종 크기의 최대 2배)
+    - 시간은 UTC ms epoch(int64) 그대로 보관, 시간대 변환은 to_frame(tz=...)에서만
+    - openTime 기준으로 이미 받은 행/역행하는 행은 버림 (chunk는 시간순으로 들어온다고 가정)
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._cols = {c: np.empty(capacity, dtype=t) for c, t in KLINE_DTYPES.items()}
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _reserve(self, n: int) -> None:
+        cap = len(self._cols["openTime"])
+        if n <= cap:
+            return
+        while cap < n:
+            cap *= 2
+        for c, arr in self._cols.items():
+            grown = np.empty(cap, dtype=arr.dtype)
+            grown[:self._n] = arr[:self._n]
+            self._cols[c] = grown
+
+    def extend(self, chunk: list) -> "KlineBuffer":
+        if not chunk:
+            return self
+        raw = np.array(chunk)  # 12열 문자열 배열, 열 단위로 한 번에 캐스팅
+        return self.extend_arrays({c: raw[:, i] for i, c in enumerate(KLINE_COLUMNS[:-1])})
+
+    def extend_arrays(self, cols: dict) -> "KlineBuffer":
+        """컬럼명 → 배열 dict를 이어 붙임 (아카이브 CSV 등 이미 컬럼 단위인 입력용)."""
+        ot = np.asarray(cols["openTime"]).astype(np.int64)
+        if not len(ot):
+            return self
+        prev = self._cols["openTime"][self._n - 1] if self._n else np.iinfo(np.int64).min
+        running = np.maximum.accumulate(np.concatenate(([prev], ot)))[:-1]
+        keep = ot > running
+        k = int(keep.sum())
+        if k == 0:
+            return self
+        self._reserve(self._n + k)
+        for c, t in KLINE_DTYPES.items():
+            col = ot if c == "openTime" else np.asarray(cols[c]).astype(t)
+            self._cols[c][self._n:self._n + k] = col[keep]
+        self._n += k
+        return self
+
+    def clear(self) -> None:
+        self._n = 0
+
+    def arrays(self) -> dict:
+        """컬럼명 → 길이 n짜리 배열 view."""
+        return {c: arr[:self._n] for c, arr in self._cols.items()}
+
+    def to_frame(self, tz: Optional[str] = None) -> pd.DataFrame:
+        """
+        save_symbol_csv 스키마의 DataFrame.
+        tz를 주면 openTime/closeTime을 그 시간대로 변환 후 tz 제거 (CSV 저장 시 Asia/Seoul).
+        """
+        df = pd.DataFrame({c: arr.copy() for c, arr in self.arrays().items()})
+        if tz is not None:
+            for c in ("openTime", "closeTime"):
+                df[c] = pd.to_datetime(df[c], unit="ms", utc=True).dt.tz_convert(tz).dt.tz_localize(None)
+        df["numberOfTrades"] = df["numberOfTrades"].astype("Int64")
+        df["ignore"] = "0"
+        return df[KLINE_COLUMNS]
+
+
+def fetch_kline_arrays(symbol: str, interval: str, start: dt.datetime, end: dt.datetime,
+                       workers: int = 1, budget: Optional[WeightBudget] = None,
+                       session: Optional[requests.Session] = None,
+                       buffer: Optional[KlineBuffer] = None,
+                       cache: Optional[KlineCache] = None) -> KlineBuffer:
+    """get_binance_klines와 같은 구간을 받되, chunk마다 바로 KlineBuffer에 디코딩."""
+    if buffer is None:
+        buffer = KlineBuffer()
+    for chunk in iter_binance_klines(symbol, interval, start, end, workers=workers,
+                                     budget=budget, session=session, cache=cache):
+        buffer.extend(chunk)
+    return buffer
+
+
+def klines_to_frame(raw: list) -> pd.DataFrame:
+    """raw klines → save_symbol_csv 스키마의 DataFrame (시간은 Asia/Seoul, tz 제거)."""
+    return KlineBuffer(max(len(raw), 1)).extend(raw).to_frame(tz="Asia/Seoul")
+
+
 def save_symbol_csv(symbol: str, interval: str,
-                    start: dt.datetime, end: dt.datetime) -> bool:
+                    start: dt.datetime, end: dt.datetime, workers: int = 1,
+                    budget: Optional[WeightBudget] = None,
+                    session: Optional[requests.Session] = None,
+                    cache: Optional[KlineCache] = None) -> bool:
     """심볼 하나를 내려받아 CSV로 저장. 성공 여부 반환."""
     try:
-        raw = get_binance_klines(symbol, interval, start, end)
+        buf = fetch_kline_arrays(symbol, interval, start, end, workers=workers,
+                                 budget=budget, session=session, cache=cache)
     except Exception as e:
         print(f"[ERROR] {symbol}: fetch failed → {e}")
         return False
 
-    if not raw:
+    if not len(buf):
         print(f"[INFO] {symbol}: no data in given range. skipped.")
         return False
 
-    cols = ["openTime","open","high","low","close","volume",
-            "closeTime","quoteAssetVolume","numberOfTrades",
-            "takerBuyBase","takerBuyQuote","ignore"]
-    df = pd.DataFrame(raw, columns=cols)
-
-    # 시간 변환 (UTC → Asia/Seoul), tz 제거
-    df["openTime"]  = pd.to_datetime(df["openTime"], unit="ms", utc=True)\
-                        .dt.tz_convert("Asia/Seoul").dt.tz_localize(None)
-    df["closeTime"] = pd.to_datetime(df["closeTime"], unit="ms", utc=True)\
-                        .dt.tz_convert("Asia/Seoul").dt.tz_localize(None)
-
-    # 숫자형 캐스팅
-    num_cols = ["open","high","low","close","volume",
-                "quoteAssetVolume","takerBuyBase","takerBuyQuote"]
-    for c in num_cols:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-    df["numberOfTrades"] = pd.to_numeric(df["numberOfTrades"], errors="coerce").astype("Int64")
-
-    # 중복 제거 & 시간 정렬
-    df = df.drop_duplicates(subset=["openTime"]).sort_values("openTime").reset_index(drop=True)
+    df = buf.to_frame(tz="Asia/Seoul")
 
     out_name = f"{symbol}_{interval}_{start.date()}_{end.date()}.csv"
     df.to_csv(out_name, index=False, encoding="utf-8-sig")
@@ -125,22 +438,143 @@ def save_symbol_csv(symbol: str, interval: str,
     return True
 
 
+def _repair_tail(path: str) -> None:
+    """append 도중 죽어서 남은 불완전한 마지막 줄을 잘라냄."""
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        pos = max(size - 4096, 0)
+        while True:
+            f.seek(pos)
+            nl = f.read(size - pos).rfind(b"\n")
+            if nl >= 0 or pos == 0:
+                f.truncate(pos + nl + 1 if nl >= 0 else 0)
+                return
+            pos = max(pos - 4096, 0)
+
+
+def last_stored_open_ms(path: str) -> Optional[int]:
+    """CSV 마지막 행의 openTime(Asia/Seoul 문자열) → UTC ms epoch. 데이터가 없으면 None."""
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(size - 4096, 0))
+        lines = f.read().splitlines()
+    if len(lines) < 2 and size <= 4096:  # 헤더만 있음
+        return None
+    last = lines[-1].decode("utf-8-sig").split(",")[0]
+    t = dt.datetime.fromisoformat(last).replace(tzinfo=KST)
+    return int(t.timestamp() * 1000)
+
+
+def update_symbol_csv(symbol: str, interval: str,
+                      start: dt.datetime, end: Optional[dt.datetime] = None, workers: int = 1,
+                      budget: Optional[WeightBudget] = None,
+                      session: Optional[requests.Session] = None,
+                      cache: Optional[KlineCache] = None) -> bool:
+    """
+    증분 모드: {symbol}_{interval}.csv 에 저장된 마지막 openTime 이후만 받아 이어 붙임.
+    - 파일이 없으면 start부터 새로 생성
+    - 마감된 봉(closeTime < 현재)만 기록 → 진행 중인 봉이 잘못 남지 않음
+    - chunk마다 한 번에 write + fsync, 중간에 죽어도 다음 실행에서 마지막 행부터 이어 받음
+    - 마지막 행부터 재개하므로 한번 생긴 구멍은 다시 채우지 않음 → 수집기는 실패 구간에서 멈추고(건너뛰지 않음),
+      기록 전에 이어지는지 확인해 빠진 구간(거래소 점검 등)은 경고로 남김 (CSV는 kline_gaps 검사 대상이 아님)
+    """
+    out_name = f"{symbol}_{interval}.csv"
+    now_ms = int(time.time() * 1000)
+    if end is None:
+        end = dt.datetime.now(dt.timezone.utc)
+
+    if os.path.exists(out_name):
+        _repair_tail(out_name)
+    last_open = None
+    if os.path.exists(out_name) and os.path.getsize(out_name) > 0:
+        last_open = last_stored_open_ms(out_name)
+        if last_open is not None:
+            start = dt.datetime.fromtimestamp((last_open + 1) / 1000, dt.timezone.utc)
+    else:
+        with open(out_name, "w", encoding="utf-8-sig", newline="") as f:
+            f.write(",".join(KLINE_COLUMNS) + "\n")
+
+    rows = 0
+    try:
+        with open(out_name, "a", encoding="utf-8", newline="") as f:
+            for chunk in iter_binance_klines(symbol, interval, start, end, workers=workers,
+                                             budget=budget, session=session, cache=cache):
+                chunk = [row for row in chunk if row[6] < now_ms]
+                if not chunk:
+                    continue
+                for a, b in find_gaps(last_open, [row[0] for row in chunk], interval):
+                    print(f"[WARN] {symbol}: no klines for openTime {a}~{b} ({out_name})")
+                f.write(klines_to_frame(chunk).to_csv(index=False, header=False))
+                f.flush()
+                os.fsync(f.fileno())
+                rows += len(chunk)
+                last_open = chunk[-1][0]
+    except Exception as e:
+        print(f"[ERROR] {symbol}: fetch failed → {e} (appended rows={rows})")
+        return False
+
+    print(f"[OK] appended {out_name} (+{rows} rows)")
+    return True
+
+
+def run_symbols(symbols: List[str], interval: str, start: dt.datetime, end: Optional[dt.datetime],
+                max_symbols: int = 4, workers: int = 1,
+                budget: Optional[WeightBudget] = None,
+                saver: Callable[..., bool] = save_symbol_csv,
+                cache: Optional[KlineCache] = None) -> Tuple[int, int]:
+    """
+    여러 심볼을 동시에 처리. 커넥션 풀과 가중치 예산(budget)은 전체 심볼이 공유하므로
+    처리량은 직렬 루프가 아니라 바이낸스 레이트 리밋에 의해 결정됨.
+    - max_symbols: 동시에 진행할 심볼 수 / workers: 심볼당 샤딩 동시 요청 수
+    - pandas 변환/저장도 각 심볼 스레드에서 이어서 수행
+    - cache(KlineCache)는 전체 심볼이 공유
+    반환: (success, skipped/failed)
+    """
+    if budget is None:
+        budget = WeightBudget()
+    session = make_session(max_symbols * max(workers, 1))
+
+    ok, fail = 0, 0
+    with ThreadPoolExecutor(max_workers=max_symbols) as ex:
+        futures = [ex.submit(saver, sym, interval, start, end, workers=workers,
+                             budget=budget, session=session, cache=cache) for sym in symbols]
+        for fut in futures:
+            if fut.result():
+                ok += 1
+            else:
+                fail += 1
+    return ok, fail
+
+
 if __name__ == "__main__":
     # 🔧 설정
     symbols: List[str] = DEFAULT_SYMBOLS[:]  # 필요 시 여기서 교체/추가
     interval = "1h"
     start = dt.datetime(2017, 1, 1)
     end   = dt.datetime(2024, 12, 31, 23, 59, 59)
+    workers = 8  # 1이면 순차 수집, 2 이상이면 구간 샤딩 동시 수집
     # start = dt.datetime(2025, 1, 1)
     # end   = dt.datetime(2025, 12, 31, 23, 59, 59)
 
     # BTC/ETH도 같이 받고 싶으면:
     # symbols = ["BTCUSDT","ETHUSDT"] + DEFAULT_SYMBOLS
 
-    ok, fail = 0, 0
-    for sym in symbols:
-        if save_symbol_csv(sym, interval, start, end):
-            ok += 1
-        else:
-            fail += 1
+    max_symbols = 4  # 동시에 진행할 심볼 수 (가중치 예산은 전체 공유)
+    incremental = False  # True면 {symbol}_{interval}.csv 에 마지막 openTime 이후 ~ 지금까지 이어 붙임 (cron용, end 무시)
+
+    use_cache = True  # 마감된 window를 kline_cache/에 보관 → 기간/심볼을 바꿔 다시 받을 때 재사용
+
+    saver = update_symbol_csv if incremental else save_symbol_csv
+    if incremental:
+        end = None  # 증분(cron)은 항상 지금까지 (고정 end면 그 뒤로는 더 받지 않음)
+    cache = KlineCache() if use_cache else None
+    ok, fail = run_symbols(symbols, interval, start, end, max_symbols=max_symbols, workers=workers,
+                           saver=saver, cache=cache)
+    if cache is not None:
+        print(f"[CACHE] {cache.stats()}")
     print(f"\nDONE. success={ok}, skipped/failed={fail}, total={len(symbols)}")
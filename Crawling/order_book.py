@@ -0,0 +1,315 @@
+# order_book.py
+# -*- coding: utf-8 -*-
+"""
+바이낸스 스팟 로컬 호가창 (REST depth 스냅샷 + <symbol>@depth@100ms diff stream).
+- 동기화 절차 (바이낸스 문서 기준):
+  1) 스트림을 먼저 열고 이벤트를 버퍼링 → 2) /api/v3/depth 스냅샷 (lastUpdateId)
+  3) u <= lastUpdateId 인 버퍼 이벤트는 버림, 첫 이벤트는 U <= lastUpdateId+1 <= u 여야 함
+  4) 이후 이벤트는 U == 직전 u + 1 → 아니면 공백이므로 그 심볼만 스냅샷부터 다시
+- 호가 한쪽(BookSide) = 정렬된 가격 배열 + 수량 배열 (bisect), 최우선 호가가 배열 끝
+  → 변경이 몰리는 최우선 근처 삽입/삭제는 원소 몇 개만 이동
+- 누적 수량은 바뀐 위치부터만 다시 계산해 두고, 누적 깊이/체결 가격 조회는 이진 탐색 O(log n)
+- 스냅샷은 기본 limit=1000 (가중치 50, 5000은 250) → (재)접속 때 모든 심볼이 한꺼번에 재동기화해도
+  동시 요청 수와 분당 스냅샷 가중치(공유 WeightBudget의 일부)를 제한해 429/418 차단을 피함
+- 로컬 테스트: mock_binance.MockDepthBook/MockDepthStream + BINANCE_WS_BASE/BINANCE_API_BASE
+"""
+
+import json
+import asyncio
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+import websockets
+
+from multi_symbols_to_csv import API_BASE, WeightBudget, make_session, request_json
+from kline_ws import MAX_STREAMS_PER_CONN, WS_BASE
+
+DEPTH_URL = f"{API_BASE}/api/v3/depth"
+
+
+def depth_weight(limit: int) -> int:
+    """/api/v3/depth 요청 가중치 (limit 구간별)."""
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 25
+    if limit <= 1000:
+        return 50
+    return 250
+
+
+class BookSide:
+    """
+    한쪽 호가. 키 = 가격(bid) 또는 -가격(ask)을 오름차순으로 보관 → 최우선 호가가 항상 마지막 원소.
+    _cum[i] = _qtys[0..i] 합 (가장 먼 호가부터). 최우선부터 j번째 호가까지의 누적 = 전체 - _cum[j-1].
+    """
+
+    def __init__(self, is_bid: bool):
+        self.sign = 1.0 if is_bid else -1.0
+        self._keys: List[float] = []
+        self._qtys: List[float] = []
+        self._cum: List[float] = []
+        self._dirty = 0  # 이 위치부터 _cum이 낡음
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def clear(self) -> None:
+        self._keys, self._qtys, self._cum, self._dirty = [], [], [], 0
+
+    def load(self, levels: List[list]) -> None:
+        """스냅샷 [[price, qty], ...] (순서 무관)로 통째로 교체."""
+        pairs = sorted((float(p) * self.sign, float(q)) for p, q in levels if float(q))
+        self._keys = [k for k, _ in pairs]
+        self._qtys = [q for _, q in pairs]
+        self._cum, self._dirty = [], 0
+
+    def set(self, price: float, qty: float) -> None:
+        """가격 price의 수량을 qty로 (0이면 삭제)."""
+        k = price * self.sign
+        keys = self._keys
+        i = bisect_left(keys, k)
+        if i < len(keys) and keys[i] == k:
+            if qty:
+                self._qtys[i] = qty
+            else:
+                del keys[i]
+                del self._qtys[i]
+        elif qty:
+            keys.insert(i, k)
+            self._qtys.insert(i, qty)
+        else:
+            return
+        if i < self._dirty:
+            self._dirty = i
+
+    def _prefix(self) -> List[float]:
+        n, d = len(self._qtys), self._dirty
+        if d < n or len(self._cum) != n:
+            del self._cum[d:]
+            base = self._cum[d - 1] if d else 0.0
+            self._cum.extend(accumulate(self._qtys[d:], initial=base))
+            del self._cum[d]  # initial 값 제거
+            self._dirty = n
+        return self._cum
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        if not self._keys:
+            return None
+        return self._keys[-1] * self.sign, self._qtys[-1]
+
+    def top(self, n: int) -> List[Tuple[float, float]]:
+        """최우선부터 n개 (price, qty)."""
+        lo = max(len(self._keys) - n, 0)
+        return [(k * self.sign, q) for k, q in zip(reversed(self._keys[lo:]), reversed(self._qtys[lo:]))]
+
+    def total(self) -> float:
+        cum = self._prefix()
+        return cum[-1] if cum else 0.0
+
+    def depth(self, n: int) -> float:
+        """최우선부터 n개 호가의 누적 수량."""
+        cum = self._prefix()
+        lo = len(cum) - n
+        if lo <= 0:
+            return cum[-1] if cum else 0.0
+        return cum[-1] - cum[lo - 1]
+
+    def qty_within(self, price: float) -> float:
+        """최우선부터 price(포함)까지의 누적 수량 (bid는 price 이상, ask는 price 이하)."""
+        cum = self._prefix()
+        j = bisect_left(self._keys, price * self.sign)
+        if j >= len(cum):
+            return 0.0
+        return cum[-1] - (cum[j - 1] if j else 0.0)
+
+    def price_for_qty(self, qty: float) -> Optional[float]:
+        """최우선부터 qty만큼 채우려면 내려가야 하는 마지막 호가. 호가가 모자라면 None."""
+        cum = self._prefix()
+        if not cum or cum[-1] < qty:
+            return None
+        j = min(bisect_right(cum, cum[-1] - qty), len(cum) - 1)  # _qtys[j:] 합 >= qty 인 가장 큰 j
+        return self._keys[j] * self.sign
+
+
+class OrderBook:
+    """심볼 하나의 로컬 호가창."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol.upper()
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+        self.last_update_id: Optional[int] = None
+
+    @property
+    def synced(self) -> bool:
+        return self.last_update_id is not None
+
+    def reset(self) -> None:
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+
+    def load_snapshot(self, snap: dict) -> None:
+        self.bids.load(snap["bids"])
+        self.asks.load(snap["asks"])
+        self.last_update_id = int(snap["lastUpdateId"])
+
+    def apply(self, ev: dict) -> bool:
+        """
+        depthUpdate 이벤트 반영. 이미 반영된 이벤트는 무시하고 True,
+        update id 공백(U > 직전 u + 1)이면 반영하지 않고 False → 스냅샷부터 다시.
+        """
+        u = ev["u"]
+        if u <= self.last_update_id:
+            return True
+        if ev["U"] > self.last_update_id + 1:
+            return False
+        bids, asks = self.bids, self.asks
+        for p, q in ev["b"]:
+            bids.set(float(p), float(q))
+        for p, q in ev["a"]:
+            asks.set(float(p), float(q))
+        self.last_update_id = u
+        return True
+
+    def top(self, n: int = 10) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
+        return self.bids.top(n), self.asks.top(n)
+
+    def mid(self) -> Optional[float]:
+        b, a = self.bids.best(), self.asks.best()
+        return (b[0] + a[0]) / 2 if b and a else None
+
+    def spread(self) -> Optional[float]:
+        b, a = self.bids.best(), self.asks.best()
+        return a[0] - b[0] if b and a else None
+
+
+class DepthBookService:
+    """
+    여러 심볼의 로컬 호가창을 유지하는 상시 서비스.
+    combined stream 커넥션마다 심볼별로 스냅샷을 받아 동기화하고, 공백이 보이면 그 심볼만 재동기화.
+    """
+
+    def __init__(self, symbols: List[str], limit: int = 1000, speed: str = "100ms",
+                 per_conn: int = 200, budget: Optional[WeightBudget] = None,
+                 snapshot_share: float = 0.5, max_inflight: int = 4):
+        self.symbols = [s.upper() for s in symbols]
+        self.limit = limit
+        self.speed = speed
+        self.per_conn = min(per_conn, MAX_STREAMS_PER_CONN)
+        self.budget = budget or WeightBudget()
+        # 스냅샷 전용 분당 한도 (공유 예산의 snapshot_share만 사용 → 나머지는 다른 요청 몫)
+        self._snap_budget = WeightBudget(max(int(self.budget.limit * snapshot_share), depth_weight(limit)))
+        self._inflight = asyncio.Semaphore(max_inflight)  # 동시에 받는 스냅샷 수 (세션 풀 크기와 같게)
+        self.session = make_session(max_inflight)
+        self.books: Dict[str, OrderBook] = {s: OrderBook(s) for s in self.symbols}
+        self._buffer: Dict[str, List[dict]] = {s: [] for s in self.symbols}
+        self._resyncing: Dict[str, asyncio.Task] = {}
+        self.updates = 0
+        self.resyncs = 0
+
+    def stream_url(self, symbols: List[str]) -> str:
+        streams = "/".join(f"{s.lower()}@depth@{self.speed}" for s in symbols)
+        return f"{WS_BASE}/stream?streams={streams}"
+
+    def _snapshot(self, symbol: str) -> Optional[dict]:
+        self._snap_budget.acquire(depth_weight(self.limit))
+        return request_json(self.session, DEPTH_URL, {"symbol": symbol, "limit": self.limit},
+                            depth_weight(self.limit), budget=self.budget)
+
+    async def _resync(self, symbol: str) -> None:
+        """스냅샷을 받아 버퍼 이벤트와 이어 붙임. 스냅샷이 버퍼보다 오래됐으면 다시 받음."""
+        book = self.books[symbol]
+        while True:
+            async with self._inflight:  # 재접속 때 심볼 수만큼 몰려도 max_inflight개씩 차례로
+                snap = await asyncio.to_thread(self._snapshot, symbol)
+            if snap is None:
+                await asyncio.sleep(1.0)
+                continue
+            buf = [ev for ev in self._buffer[symbol] if ev["u"] > snap["lastUpdateId"]]
+            if buf and buf[0]["U"] > snap["lastUpdateId"] + 1:
+                self._buffer[symbol] = buf
+                continue  # 스냅샷이 버퍼 첫 이벤트보다 앞 → 더 새 스냅샷 필요
+            book.load_snapshot(snap)
+            self._buffer[symbol] = []
+            if all(book.apply(ev) for ev in buf):
+                self.updates += len(buf)
+                return
+            book.reset()  # 버퍼 안에 공백 → 처음부터
+
+    def _start_resync(self, symbol: str) -> None:
+        self.books[symbol].reset()
+        task = self._resyncing.get(symbol)
+        if task is None or task.done():
+            self.resyncs += 1
+            self._resyncing[symbol] = asyncio.create_task(self._resync(symbol))
+
+    def on_message(self, msg) -> None:
+        ev = json.loads(msg).get("data", {})
+        if ev.get("e") != "depthUpdate":
+            return
+        sym = ev["s"].upper()
+        book = self.books.get(sym)
+        if book is None:
+            return
+        if not book.synced:
+            self._buffer[sym].append(ev)
+            return
+        if book.apply(ev):
+            self.updates += 1
+        else:
+            print(f"[DEPTH] {sym}: gap (U={ev['U']}, last={book.last_update_id}) → resync")
+            self._buffer[sym] = [ev]
+            self._start_resync(sym)
+
+    async def _conn_loop(self, symbols: List[str]) -> None:
+        url = self.stream_url(symbols)
+        retry = 1.0
+        while True:
+            try:
+                async with websockets.connect(url, max_size=None) as ws:
+                    print(f"[DEPTH] connected ({len(symbols)} streams)")
+                    retry = 1.0
+                    for sym in symbols:  # (재)접속마다 스냅샷부터
+                        self._buffer[sym] = []
+                        self._start_resync(sym)
+                    async for msg in ws:
+                        self.on_message(msg)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[DEPTH] {e}; reconnect in {retry:.0f}s")
+            await asyncio.sleep(retry)
+            retry = min(retry * 2, 60.0)
+
+    async def run(self) -> None:
+        groups = [self.symbols[i:i + self.per_conn] for i in range(0, len(self.symbols), self.per_conn)]
+        await asyncio.gather(*(self._conn_loop(g) for g in groups))
+
+
+async def _report(service: DepthBookService, every: float = 5.0) -> None:
+    while True:
+        await asyncio.sleep(every)
+        for sym, book in service.books.items():
+            if book.synced:
+                b, a = book.bids.best(), book.asks.best()  # 한쪽이 빈 호가창이면 None
+                print(f"{sym:10s} bid={b[0] if b else None} ask={a[0] if a else None} levels={len(book.bids)}/{len(book.asks)} "
+                      f"depth10={book.bids.depth(10):.3f}/{book.asks.depth(10):.3f}")
+        print(f"updates={service.updates} resyncs={service.resyncs}")
+
+
+if __name__ == "__main__":
+    # 🔧 설정
+    symbols = ["BTCUSDT", "ETHUSDT", "BNBUSDT"]
+
+    service = DepthBookService(symbols, limit=1000)
+
+    async def main():
+        await asyncio.gather(service.run(), _report(service))
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print(f"bye (updates={service.updates}, resyncs={service.resyncs})")
@@ -0,0 +1,320 @@
+# ticker_recorder.py
+# -*- coding: utf-8 -*-
+"""
+전 심볼 시세 스냅샷 기록기: /api/v3/ticker/24hr (또는 /ticker/price) 한 번으로 모든 심볼을 받아
+스냅샷 하나를 Arrow record batch 하나로 저장 → 심볼별 get_binance_klines 수백 번 대신 분당 요청 1회.
+- 파일: {root}/{YYYYMMDD}/{HHMMSS}_{endpoint}.arrows (Arrow IPC stream, zstd), 실행/날짜마다 새 파일
+- symbol: dictionary<int16, string> 컬럼 (새 심볼만 dictionary delta로 추가)
+- 값: 문자열 그대로 10^d 배 정수(int64)로 바꾼 뒤 같은 심볼의 직전 스냅샷 대비 차분만 저장
+  (파일 첫 batch는 0 대비 = 원값). d는 파일을 열 때 컬럼별로 실제 값에 나온 가장 긴 소수부로 정함 → 자리수를 버리지 않음
+  그 자리수로 (최댓값 × GROWTH)가 2^53을 넘는 컬럼(큰 거래량 등)은 float64 원값으로 저장 (읽은 값 == float(문자열))
+  자리수가 더 긴 값이 오거나 범위를 넘으면 새 파일로 넘어감
+- 스냅샷 시각은 batch custom metadata "ts" (UTC ms)
+- read_snapshots: 파일을 순서대로 읽어 심볼별 누적합으로 원값 복원 → 긴 형식 DataFrame
+"""
+
+import os
+import glob
+import json
+import time
+import datetime as dt
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import requests
+
+from multi_symbols_to_csv import API_BASE, KST, WeightBudget, make_session, request_json, to_ms
+
+TICKER_ROOT = "ticker_store"
+
+# endpoint → (URL 경로, 가중치(전 심볼), 기록할 필드: 최대 소수 자리수)
+ENDPOINTS = {
+    "24hr": ("/api/v3/ticker/24hr", 80, {
+        "lastPrice": 8, "bidPrice": 8, "bidQty": 8, "askPrice": 8, "askQty": 8,
+        "openPrice": 8, "highPrice": 8, "lowPrice": 8, "volume": 8, "quoteVolume": 8,
+        "count": 0, "closeTime": 0,
+    }),
+    "price": ("/api/v3/ticker/price", 4, {"price": 8}),
+}
+EXACT_LIMIT = 2 ** 53  # 이 아래 정수 / 10^d 는 float(문자열)과 정확히 같음
+GROWTH      = 10       # 파일을 연 뒤 값이 이만큼 커져도 같은 자리수로
+
+
+def _to_scaled(values: List[str], d: int) -> np.ndarray:
+    """10진 문자열 → 10^d 배 정수 (float 거치지 않음, d보다 긴 소수부는 버림)."""
+    out = np.empty(len(values), dtype=object)
+    pad = "0" * d
+    for i, s in enumerate(values):
+        s = str(s)
+        neg = s.startswith("-")
+        whole, _, frac = s.lstrip("-").partition(".")
+        v = int(whole or 0) * 10 ** d + (int((frac + pad)[:d]) if d else 0)
+        out[i] = -v if neg else v
+    return out
+
+
+def _frac_digits(s) -> int:
+    """10진 문자열의 유효 소수 자리수 (끝의 0 제외)."""
+    return len(str(s).partition(".")[2].rstrip("0"))
+
+
+def choose_scales(rows: List[dict], fields: Dict[str, int]) -> Dict[str, Optional[int]]:
+    """
+    필드별 소수 자리수 d = 실제 값에 나온 가장 긴 소수부 → 정수 변환에 버리는 자리수 없음.
+    d가 최대 자리수를 넘거나 (최댓값 × GROWTH × 10^d)가 EXACT_LIMIT을 넘으면 None (float64 원값으로 저장).
+    """
+    scales: Dict[str, Optional[int]] = {}
+    for f, d_max in fields.items():
+        d = max((_frac_digits(r[f]) for r in rows), default=0)
+        m = max((abs(float(r[f])) for r in rows), default=0.0)
+        scales[f] = d if d <= d_max and m * GROWTH * 10 ** d < EXACT_LIMIT else None
+    return scales
+
+
+class TickerLog:
+    """스냅샷 하나씩 받아 IPC stream 파일 하나에 차분 batch로 추가."""
+
+    def __init__(self, path: str, fields: Dict[str, int], scales: Dict[str, Optional[int]]):
+        self.path = path
+        self.fields = list(fields)
+        self.scales = scales
+        self.int_fields = [f for f in self.fields if scales[f] is not None]  # 차분 정수, 나머지는 float64 원값
+        self.schema = pa.schema(
+            [("symbol", pa.dictionary(pa.int16(), pa.string()))]
+            + [(f, pa.int64() if scales[f] is not None else pa.float64()) for f in self.fields],
+            metadata={"scales": json.dumps(scales)},
+        )
+        self._symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._prev = np.zeros((0, len(self.int_fields)), dtype=object)  # dictionary 번호별 직전 정수값
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._sink = open(path, "wb")
+        opts = ipc.IpcWriteOptions(compression="zstd", emit_dictionary_deltas=True)
+        self._writer = ipc.new_stream(self._sink, self.schema, options=opts)
+        self.batches = 0
+
+    def append(self, ts_ms: int, rows: List[dict]) -> bool:
+        """
+        스냅샷 추가. 이 파일의 자리수보다 긴 소수부가 오거나 정수가 EXACT_LIMIT을 넘으면
+        쓰지 않고 False (새 파일 필요).
+        """
+        cur = np.empty((len(rows), len(self.int_fields)), dtype=object)
+        for j, f in enumerate(self.int_fields):
+            vals = [r[f] for r in rows]
+            if any(_frac_digits(v) > self.scales[f] for v in vals):
+                return False
+            cur[:, j] = _to_scaled(vals, self.scales[f])
+        if len(rows) and cur.size and np.abs(cur).max() >= EXACT_LIMIT:
+            return False
+
+        for r in rows:
+            if r["symbol"] not in self._index:
+                self._index[r["symbol"]] = len(self._symbols)
+                self._symbols.append(r["symbol"])
+        if len(self._symbols) > len(self._prev):
+            grow = np.zeros((len(self._symbols) - len(self._prev), len(self.int_fields)), dtype=object)
+            self._prev = np.vstack([self._prev, grow])
+        idx = np.array([self._index[r["symbol"]] for r in rows], dtype=np.int16)
+        delta = (cur - self._prev[idx]).astype(np.int64)
+        self._prev[idx] = cur
+
+        sym = pa.DictionaryArray.from_arrays(pa.array(idx, pa.int16()), pa.array(self._symbols, pa.string()))
+        cols = [sym]
+        for f in self.fields:
+            if self.scales[f] is None:
+                cols.append(pa.array([float(r[f]) for r in rows], pa.float64()))
+            else:
+                cols.append(pa.array(delta[:, self.int_fields.index(f)], pa.int64()))
+        batch = pa.record_batch(cols, schema=self.schema)
+        self._writer.write_batch(batch, custom_metadata={"ts": str(ts_ms)})
+        self._sink.flush()
+        self.batches += 1
+        return True
+
+    def close(self) -> None:
+        self._writer.close()
+        self._sink.close()
+
+
+def fetch_tickers(endpoint: str = "24hr", session: Optional[requests.Session] = None,
+                  budget: Optional[WeightBudget] = None) -> Optional[List[dict]]:
+    path, weight, _ = ENDPOINTS[endpoint]
+    session = session or make_session(1)
+    return request_json(session, f"{API_BASE}{path}", {}, weight, budget=budget)
+
+
+def _new_log(root: str, endpoint: str, ts_ms: int, rows: List[dict]) -> TickerLog:
+    t = dt.datetime.fromtimestamp(ts_ms / 1000, dt.timezone.utc)
+    path = os.path.join(root, t.strftime("%Y%m%d"), f"{t:%H%M%S}_{endpoint}.arrows")
+    fields = ENDPOINTS[endpoint][2]
+    return TickerLog(path, fields, choose_scales(rows, fields))
+
+
+def _append(log: Optional[TickerLog], root: str, endpoint: str, ts: int, rows: List[dict]) -> TickerLog:
+    """스냅샷 하나 기록 (날짜가 바뀌었거나 자리수/범위를 넘으면 새 파일). 이후 쓸 log 반환."""
+    day = dt.datetime.fromtimestamp(ts / 1000, dt.timezone.utc).strftime("%Y%m%d")
+    if log is not None and os.path.basename(os.path.dirname(log.path)) != day:
+        log.close()
+        log = None
+    if log is None or not log.append(ts, rows):
+        if log is not None:
+            log.close()  # 자리수/범위 초과 → 새 파일 (현재 값 기준으로 자리수 다시 정함)
+        log = _new_log(root, endpoint, ts, rows)
+        log.append(ts, rows)
+    return log
+
+
+def record(every: float = 60.0, endpoint: str = "24hr", root: str = TICKER_ROOT,
+           count: Optional[int] = None, budget: Optional[WeightBudget] = None) -> int:
+    """every초 간격(시계 정렬)으로 전 심볼 스냅샷 기록. count번 뒤 종료 (None이면 계속). 기록한 스냅샷 수 반환."""
+    session = make_session(1)
+    budget = budget or WeightBudget()
+    log: Optional[TickerLog] = None
+    n = 0
+    try:
+        while count is None or n < count:
+            time.sleep(every - time.time() % every)
+            rows = fetch_tickers(endpoint, session, budget)
+            ts = int(time.time() * 1000)
+            if not rows:
+                print(f"[WARN] ticker/{endpoint}: request failed, skip this snapshot.")
+                continue
+            log = _append(log, root, endpoint, ts, rows)
+            n += 1
+    finally:
+        if log is not None:
+            log.close()
+    return n
+
+
+def _iter_batches(path: str) -> Iterator[Tuple[pa.RecordBatch, int]]:
+    """(batch, ts). 기록 중 끊겨 마지막 batch가 잘린 파일은 읽을 수 있는 데까지만."""
+    with pa.OSFile(path, "rb") as f:
+        reader = ipc.open_stream(f)
+        while True:
+            try:
+                batch, meta = reader.read_next_batch_with_custom_metadata()
+            except StopIteration:
+                return
+            except (pa.ArrowInvalid, OSError):
+                print(f"[WARN] {path}: truncated after last complete snapshot.")
+                return
+            yield batch, int(meta[b"ts"] if b"ts" in meta else meta["ts"])
+
+
+def read_log(path: str, symbols: Optional[List[str]] = None) -> pd.DataFrame:
+    """파일 하나 → 긴 형식 DataFrame (time, symbol, 필드들). 차분을 심볼별로 누적해 원값 복원."""
+    with pa.OSFile(path, "rb") as f:
+        schema = ipc.open_stream(f).schema
+    scales = json.loads(schema.metadata[b"scales"])
+    fields = [n for n in schema.names if n != "symbol"]
+    int_fields = [f for f in fields if scales[f] is not None]
+    state = np.zeros((0, len(int_fields)), dtype=np.int64)
+    frames = []
+    for batch, ts in _iter_batches(path):
+        sym = batch.column(0)
+        idx = sym.indices.to_numpy()
+        names = sym.dictionary.to_numpy(zero_copy_only=False)
+        if len(names) > len(state):
+            state = np.vstack([state, np.zeros((len(names) - len(state), len(int_fields)), np.int64)])
+        if int_fields:
+            delta = np.column_stack([batch.column(f).to_numpy() for f in int_fields])
+            state[idx] += delta  # 한 batch 안에서 심볼은 한 번씩
+        vals = state[idx]
+        df = pd.DataFrame({f: vals[:, int_fields.index(f)] / 10 ** scales[f] if scales[f] is not None
+                           else batch.column(f).to_numpy() for f in fields})
+        df.insert(0, "symbol", names[idx])
+        df.insert(0, "time", ts)
+        if symbols is not None:
+            df = df[df["symbol"].isin(symbols)]
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["time", "symbol"] + fields)
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_snapshots(start: Optional[dt.datetime] = None, end: Optional[dt.datetime] = None,
+                   endpoint: str = "24hr", symbols: Optional[List[str]] = None,
+                   tz: Optional[str] = None, root: str = TICKER_ROOT) -> pd.DataFrame:
+    """[start, end] 구간 스냅샷 (time은 UTC ms, tz를 주면 그 시간대로 변환 후 tz 제거)."""
+    t0 = to_ms(start) if start is not None else None
+    t1 = to_ms(end) if end is not None else None
+
+    def day(ms):
+        return dt.datetime.fromtimestamp(ms / 1000, dt.timezone.utc).strftime("%Y%m%d")
+
+    files = []
+    for p in sorted(glob.glob(os.path.join(root, "*", f"*_{endpoint}.arrows"))):
+        d = os.path.basename(os.path.dirname(p))
+        if (t0 is None or d >= day(t0)) and (t1 is None or d <= day(t1)):
+            files.append(p)
+    if not files:
+        return pd.DataFrame()
+    df = pd.concat([read_log(p, symbols) for p in files], ignore_index=True)
+    if t0 is not None:
+        df = df[df["time"] >= t0]
+    if t1 is not None:
+        df = df[df["time"] <= t1]
+    if tz is not None:
+        df["time"] = pd.to_datetime(df["time"], unit="ms", utc=True).dt.tz_convert(tz).dt.tz_localize(None)
+    return df.reset_index(drop=True)
+
+
+def check_roundtrip(snapshots: List[Tuple[int, List[dict]]], endpoint: str = "24hr",
+                    root: str = TICKER_ROOT) -> int:
+    """
+    (ts, rows) 스냅샷들을 기록한 뒤 다시 읽어 모든 값이 float(원문자열)과 정확히 같은지 비교 (허용 오차 없음).
+    다른 값 개수 반환 (0이면 무손실).
+    """
+    log: Optional[TickerLog] = None
+    try:
+        for ts, rows in snapshots:
+            log = _append(log, root, endpoint, ts, rows)
+    finally:
+        if log is not None:
+            log.close()
+    fields = list(ENDPOINTS[endpoint][2])
+    df = read_snapshots(endpoint=endpoint, root=root)
+    got = {(int(t), s): r for t, s, r in zip(df["time"], df["symbol"], df[fields].to_numpy())}
+    bad = 0
+    for ts, rows in snapshots:
+        for row in rows:
+            vals = got.get((ts, row["symbol"]))
+            for j, f in enumerate(fields):
+                if vals is None or vals[j] != float(row[f]):
+                    bad += 1
+                    if bad <= 5:
+                        print(f"[MISMATCH] {ts} {row['symbol']} {f}: {row[f]} → {None if vals is None else vals[j]}")
+    return bad
+
+
+if __name__ == "__main__":
+    # 🔧 설정
+    endpoint = "24hr"  # "price"면 가중치 4 (가격만)
+    every = 60.0
+    check = False  # True면 mock_binance 스냅샷으로 기록→읽기 왕복이 정확한지만 확인하고 종료
+
+    if check:
+        import tempfile
+        from mock_binance import MockBinance
+
+        mock = MockBinance(now_ms=0).start()
+        t0 = int(time.time() // 60 * 60_000)
+        snaps = []
+        for i in range(30):  # 분마다 값이 바뀜
+            mock.now_ms = t0 + i * 60_000
+            snaps.append((mock.now_ms, mock.ticker_24hr({}) if endpoint == "24hr" else mock.ticker_price({})))
+        mock.stop()
+        with tempfile.TemporaryDirectory() as tmp:
+            bad = check_roundtrip(snaps, endpoint, tmp)
+        print(f"roundtrip {endpoint}: {len(snaps)} snapshots, mismatches={bad}")
+        raise SystemExit(1 if bad else 0)
+
+    try:
+        record(every, endpoint)
+    except KeyboardInterrupt:
+        df = read_snapshots(dt.datetime.now(dt.timezone.utc) - dt.timedelta(hours=1), endpoint=endpoint, tz=str(KST))
+        print(df.tail())
@@ -0,0 +1,187 @@
+# trade_bars.py
+# -*- coding: utf-8 -*-
+"""
+저장된 aggTrades(agg_trades.py)로 시간 대신 체결량 기준 봉을 만듭니다.
+- tick: 체결 수, volume: 수량 합, dollar: 금액(price×qty) 합이 threshold를 넘을 때마다 봉 하나
+  누적합이 threshold의 배수를 넘는 지점을 경계로 → 파트 단위 cumsum 한 번 (넘친 양은 다음 봉으로 이월)
+- *_imbalance: 부호(매수 주도 +1, 매도 주도 -1) × 측정값의 봉 내 누적이 ±threshold에 닿으면 봉 마감 (봉마다 0부터)
+- 파트 파일을 하나씩 읽어 처리 → 메모리는 전체 체결 수와 무관
+- 출력: save_symbol_csv와 같은 컬럼의 CSV ({symbol}_{kind}_{threshold}.csv, 시간은 Asia/Seoul)
+  openTime/closeTime = 봉의 첫/마지막 체결 시각
+- 증분: 다음 시작 id/이월량/CSV 크기를 .state.json에 저장 → 새로 받은 체결만큼만 봉을 이어 붙임
+"""
+
+import os
+import json
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from multi_symbols_to_csv import KLINE_COLUMNS, KST
+from agg_trades import TRADES_ROOT, iter_parts
+
+BAR_KINDS = ("tick", "volume", "dollar", "tick_imbalance", "volume_imbalance", "dollar_imbalance")
+TRADE_COLUMNS = ["id", "time", "price", "qty", "firstId", "lastId", "maker"]
+
+
+def _measure(kind: str, c: Dict[str, np.ndarray]) -> np.ndarray:
+    base = kind.replace("_imbalance", "")
+    if base == "tick":
+        m = np.ones(len(c["id"]))
+    elif base == "volume":
+        m = c["qty"]
+    elif base == "dollar":
+        m = c["price"] * c["qty"]
+    else:
+        raise ValueError(f"unknown bar kind: {kind}")
+    if kind.endswith("_imbalance"):
+        m = np.where(c["maker"], -m, m)  # buyer가 maker면 매도 주도 체결
+    return m
+
+
+def _cum_ends(m: np.ndarray, threshold: float, acc: float) -> Tuple[np.ndarray, float, float]:
+    """누적합이 threshold 배수를 넘는 위치들. (ends, 마지막 end 시점 이월량, 남은 누적량)"""
+    cs = acc + np.cumsum(m)
+    k = np.floor(cs / threshold)
+    prev = np.concatenate(([0.0], k[:-1]))
+    ends = np.flatnonzero(k > prev)
+    if not len(ends):
+        return ends, acc, float(cs[-1])
+    e = ends[-1]
+    return ends, float(cs[e] - k[e] * threshold), float(cs[-1] - k[e] * threshold)
+
+
+def _imbalance_ends(s: np.ndarray, threshold: float, acc: float) -> Tuple[np.ndarray, float, float]:
+    """봉 안 부호 누적의 절댓값이 threshold에 닿는 위치들 (봉마다 0부터). 구간을 늘려 가며 탐색."""
+    ends: List[int] = []
+    i, n, block = 0, len(s), 1024
+    while i < n:
+        cs = acc + np.cumsum(s[i:i + block])
+        hit = np.flatnonzero(np.abs(cs) >= threshold)
+        if len(hit):
+            ends.append(i + int(hit[0]))
+            i += int(hit[0]) + 1
+            acc = 0.0
+            block = max(1024, 2 * (int(hit[0]) + 1))
+        else:
+            acc = float(cs[-1])
+            i += len(cs)
+            block *= 2
+    return np.array(ends, dtype=np.int64), 0.0, acc
+
+
+def bar_ends(kind: str, c: Dict[str, np.ndarray], threshold: float,
+             acc: float = 0.0) -> Tuple[np.ndarray, float, float]:
+    """체결 컬럼 c에서 봉이 끝나는 행 번호들. (ends, 마지막 봉 마감 시점 이월량, 끝까지의 누적량)"""
+    m = _measure(kind, c)
+    if kind.endswith("_imbalance"):
+        return _imbalance_ends(m, threshold, acc)
+    return _cum_ends(m, threshold, acc)
+
+
+def aggregate_bars(c: Dict[str, np.ndarray], ends: np.ndarray) -> Dict[str, np.ndarray]:
+    """ends로 나뉜 체결 구간([0, ends[0]], (ends[0], ends[1]], ...)마다 kline 컬럼 집계 (reduceat)."""
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    c = {k: v[:ends[-1] + 1] for k, v in c.items()}  # reduceat 마지막 구간이 배열 끝까지 가지 않도록
+    price, qty = c["price"], c["qty"]
+    quote = price * qty
+    taker = ~c["maker"]  # buyer가 taker = 매수 주도
+    return {
+        "openTime": c["time"][starts],
+        "open": price[starts],
+        "high": np.maximum.reduceat(price, starts),
+        "low": np.minimum.reduceat(price, starts),
+        "close": price[ends],
+        "volume": np.add.reduceat(qty, starts),
+        "closeTime": c["time"][ends],
+        "quoteAssetVolume": np.add.reduceat(quote, starts),
+        "numberOfTrades": np.add.reduceat(c["lastId"] - c["firstId"] + 1, starts),
+        "takerBuyBase": np.add.reduceat(np.where(taker, qty, 0.0), starts),
+        "takerBuyQuote": np.add.reduceat(np.where(taker, quote, 0.0), starts),
+    }
+
+
+def bars_to_frame(bars: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """save_symbol_csv 스키마의 DataFrame (시간은 Asia/Seoul, tz 제거)."""
+    df = pd.DataFrame(bars)
+    for col in ("openTime", "closeTime"):
+        df[col] = pd.to_datetime(df[col], unit="ms", utc=True).dt.tz_convert(KST).dt.tz_localize(None)
+    df["numberOfTrades"] = df["numberOfTrades"].astype("Int64")
+    df["ignore"] = "0"
+    return df[KLINE_COLUMNS]
+
+
+def bar_csv_path(symbol: str, kind: str, threshold: float, out_dir: str = ".") -> str:
+    return os.path.join(out_dir, f"{symbol.upper()}_{kind}_{threshold:g}.csv")
+
+
+def _load_state(path: str) -> dict:
+    if not os.path.exists(path):
+        return {"next_id": 0, "acc": 0.0, "csv_bytes": 0}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_state(path: str, state: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def update_bars(symbol: str, kind: str, threshold: float, root: str = TRADES_ROOT,
+                out_dir: str = ".") -> int:
+    """
+    {symbol}_{kind}_{threshold}.csv 를 저장된 체결 끝까지 이어 붙임. 추가한 봉 수 반환.
+    마지막 미완성 봉은 기록하지 않고, 그 봉의 첫 체결 id를 상태에 남겨 다음 실행 때 다시 읽음.
+    """
+    if kind not in BAR_KINDS:
+        raise ValueError(f"unknown bar kind: {kind}")
+    out_name = bar_csv_path(symbol, kind, threshold, out_dir)
+    state_path = out_name + ".state.json"
+    state = _load_state(state_path)
+
+    # 상태 저장 전에 죽었으면 CSV에 상태보다 뒤의 봉이 남아 있음 → 상태 시점 크기로 되돌림
+    if os.path.exists(out_name) and state["csv_bytes"]:
+        if os.path.getsize(out_name) != state["csv_bytes"]:
+            os.truncate(out_name, state["csv_bytes"])
+    else:
+        with open(out_name, "w", encoding="utf-8-sig", newline="") as f:
+            f.write(",".join(KLINE_COLUMNS) + "\n")
+        state = {"next_id": 0, "acc": 0.0, "csv_bytes": os.path.getsize(out_name)}
+
+    added = 0
+    acc = state["acc"]
+    carry: Optional[Dict[str, np.ndarray]] = None  # 아직 안 끝난 봉의 체결
+    with open(out_name, "a", encoding="utf-8", newline="") as f:
+        for t in iter_parts(symbol, state["next_id"], TRADE_COLUMNS, root):
+            new = {col: t.column(col).to_numpy() for col in TRADE_COLUMNS}
+            ends, acc_at_end, acc = bar_ends(kind, new, threshold, acc)
+            c = new if carry is None else {k: np.concatenate([carry[k], new[k]]) for k in new}
+            if not len(ends):
+                carry = c
+                continue
+            ends = ends + (len(c["id"]) - len(new["id"]))
+            f.write(bars_to_frame(aggregate_bars(c, ends)).to_csv(index=False, header=False))
+            f.flush()
+            os.fsync(f.fileno())
+            added += len(ends)
+            last = int(ends[-1])
+            carry = {k: v[last + 1:] for k, v in c.items()}
+            state = {"next_id": int(c["id"][last]) + 1, "acc": acc_at_end,
+                     "csv_bytes": os.fstat(f.fileno()).st_size}
+            _save_state(state_path, state)
+
+    print(f"[OK] {out_name} (+{added} bars)")
+    return added
+
+
+if __name__ == "__main__":
+    # 🔧 설정
+    symbols = ["BTCUSDT", "ETHUSDT"]
+    specs = [("tick", 1000), ("volume", 100), ("dollar", 5_000_000), ("tick_imbalance", 200)]
+
+    for sym in symbols:
+        for kind, threshold in specs:
+            update_bars(sym, kind, threshold)
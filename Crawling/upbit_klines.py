@@ -0,0 +1,199 @@
+# upbit_klines.py
+# -*- coding: utf-8 -*-
+"""
+업비트 KRW 마켓 캔들 수집 → kline_store와 같은 Parquet 레이아웃으로 저장.
+- 경로: {root}/{market}/{interval}/{year}.parquet  (market 예: KRW-BTC, KRW-USDT)
+- interval은 바이낸스 표기 사용 (1m/3m/5m/15m/30m/1h/4h/1d → 업비트 분/일 캔들)
+- 업비트 캔들 API는 to(그 시각 이전) 기준 과거 방향 200개씩 → 기간을 봉 격자에 맞춘 200봉 구간으로 잘라
+  구간마다 to=구간 마지막 봉 + 1봉으로 요청하고 구간 밖 행은 버림 (체결 없는 분은 캔들이 없어도 구간은 빠짐없음)
+- 요청 제한(캔들 그룹 초당 10회)은 UpbitBudget 하나를 공유 (request_json의 budget 자리에 그대로 사용)
+- numberOfTrades/takerBuy*는 업비트 캔들에 없어 0/NaN으로 저장
+"""
+
+import os
+import time
+import threading
+import datetime as dt
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+
+import numpy as np
+import requests
+
+from multi_symbols_to_csv import INTERVAL_MS, KlineBuffer, make_session, request_json, split_windows, to_ms
+from kline_store import buffer_to_table, last_open_ms, write_klines
+
+UPBIT_API_BASE = os.getenv("UPBIT_API_BASE", "https://api.upbit.com")
+UPBIT_ROOT = "upbit_store"
+UPBIT_LIMIT = 200  # 캔들 요청당 최대 개수
+
+# 바이낸스 interval → 업비트 캔들 경로
+UPBIT_CANDLE_PATHS = {
+    "1m": "minutes/1", "3m": "minutes/3", "5m": "minutes/5", "15m": "minutes/15",
+    "30m": "minutes/30", "1h": "minutes/60", "4h": "minutes/240", "1d": "days",
+}
+
+
+class UpbitBudget:
+    """
+    초당 요청 수 제한. WeightBudget과 같은 acquire/update/block 인터페이스.
+    - 응답 헤더 Remaining-Req (group=candles; min=..; sec=..)의 sec가 0이면 다음 초까지 대기
+    """
+
+    def __init__(self, per_sec: int = 8):
+        self.per_sec = per_sec
+        self._lock = threading.Lock()
+        self._second = -1
+        self._used = 0
+        self._blocked_until = 0.0
+
+    def acquire(self, weight: int = 1) -> None:
+        while True:
+            with self._lock:
+                now = time.time()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    sec = int(now)
+                    if sec != self._second:
+                        self._second, self._used = sec, 0
+                    if self._used + weight <= self.per_sec:
+                        self._used += weight
+                        return
+                    wait = 1 - now % 1
+            time.sleep(wait)
+
+    def update(self, headers) -> None:
+        remaining = headers.get("Remaining-Req")
+        if not remaining:
+            return
+        fields = dict(part.strip().split("=", 1) for part in remaining.split(";") if "=" in part)
+        if fields.get("sec") == "0":
+            self.block(1 - time.time() % 1)
+
+    def block(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.time() + seconds)
+
+
+def krw_markets(session: Optional[requests.Session] = None,
+                budget: Optional[UpbitBudget] = None) -> List[str]:
+    """업비트 KRW 마켓 코드 목록 (예: ['KRW-BTC', 'KRW-ETH', ...])."""
+    session = session or make_session(1)
+    markets = request_json(session, f"{UPBIT_API_BASE}/v1/market/all", {}, 1, budget=budget) or []
+    return sorted(m["market"] for m in markets if m["market"].startswith("KRW-"))
+
+
+def _iso_utc(ms: int) -> str:
+    return dt.datetime.fromtimestamp(ms / 1000, dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def candles_to_arrays(candles: list, interval: str) -> dict:
+    """업비트 캔들 응답(list of dict, 최신순) → KlineBuffer 컬럼 dict (openTime 오름차순)."""
+    candles = candles[::-1]
+    ot = np.array([c["candle_date_time_utc"] for c in candles], dtype="datetime64[ms]").astype(np.int64)
+    n = len(ot)
+    return {
+        "openTime": ot,
+        "open": np.array([c["opening_price"] for c in candles], dtype=np.float64),
+        "high": np.array([c["high_price"] for c in candles], dtype=np.float64),
+        "low": np.array([c["low_price"] for c in candles], dtype=np.float64),
+        "close": np.array([c["trade_price"] for c in candles], dtype=np.float64),
+        "volume": np.array([c["candle_acc_trade_volume"] for c in candles], dtype=np.float64),
+        "closeTime": ot + INTERVAL_MS[interval] - 1,
+        "quoteAssetVolume": np.array([c["candle_acc_trade_price"] for c in candles], dtype=np.float64),
+        "numberOfTrades": np.zeros(n, dtype=np.int32),
+        "takerBuyBase": np.full(n, np.nan),
+        "takerBuyQuote": np.full(n, np.nan),
+    }
+
+
+def iter_upbit_candles(market: str, interval: str, start: dt.datetime, end: dt.datetime,
+                       workers: int = 4, budget: Optional[UpbitBudget] = None,
+                       session: Optional[requests.Session] = None) -> Iterator[dict]:
+    """
+    start~end 캔들을 200봉 구간 단위 컬럼 dict로 시간순 yield (구간은 동시에 요청).
+    한 구간이 끝내 실패하면 거기서 멈춤 (save_upbit_store는 마지막 openTime부터 재개하므로
+    뒤 구간을 이어 붙이면 구멍이 영구히 남음) → 잘린 채 종료하고 다음 실행이 이어서 채움.
+    """
+    url = f"{UPBIT_API_BASE}/v1/candles/{UPBIT_CANDLE_PATHS[interval]}"
+    session = session or make_session(max(workers, 1))
+    budget = budget or UpbitBudget()
+    step = INTERVAL_MS[interval]
+    # 구간 경계를 봉 격자에 맞춤 (시작은 올림, 끝은 마지막 봉 시작으로 내림)
+    s0 = -(-to_ms(start) // step) * step
+    e0 = to_ms(end) // step * step
+    windows = split_windows(s0, e0, interval, UPBIT_LIMIT) if s0 <= e0 else []
+
+    def fetch(win):
+        # to는 그 시각 '이전' 캔들 → 구간 마지막 봉 시작 + 1봉 (격자 위라 초 단위 절사 없음)
+        last_open = win[1] // step * step
+        params = {"market": market, "to": _iso_utc(last_open + step), "count": UPBIT_LIMIT}
+        chunk = request_json(session, url, params, 1, budget=budget)
+        if chunk is None:
+            print(f"[WARN] {market}: request failed at window={win[0]}~{win[1]}, stop here.")
+            return None
+        cols = candles_to_arrays(chunk, interval)
+        keep = (cols["openTime"] >= win[0]) & (cols["openTime"] <= win[1])
+        return {c: a[keep] for c, a in cols.items()}
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        pending: deque = deque()
+        it = iter(windows)
+        for win in islice(it, workers * 2):
+            pending.append(ex.submit(fetch, win))
+        while pending:
+            cols = pending.popleft().result()
+            if cols is None:
+                for fut in pending:  # 아직 시작 안 한 뒤 구간은 취소, 진행 중인 것은 결과를 버림
+                    fut.cancel()
+                return
+            for win in islice(it, 1):
+                pending.append(ex.submit(fetch, win))
+            if len(cols["openTime"]):
+                yield cols
+
+
+def save_upbit_store(market: str, interval: str, start: dt.datetime,
+                     end: Optional[dt.datetime] = None, workers: int = 4,
+                     budget: Optional[UpbitBudget] = None,
+                     session: Optional[requests.Session] = None,
+                     root: str = UPBIT_ROOT, flush_rows: int = 200_000) -> bool:
+    """마켓 하나를 저장소에 증분 기록 (마감된 캔들만, flush_rows마다 반영)."""
+    last = last_open_ms(market, interval, root)
+    if last is not None:
+        start = dt.datetime.fromtimestamp((last + INTERVAL_MS[interval]) / 1000, dt.timezone.utc)
+    if end is None:
+        end = dt.datetime.now(dt.timezone.utc)
+    now_ms = int(time.time() * 1000)
+
+    rows = 0
+    pending = KlineBuffer(flush_rows)
+    try:
+        for cols in iter_upbit_candles(market, interval, start, end, workers, budget, session):
+            closed = cols["closeTime"] < now_ms
+            pending.extend_arrays({c: a[closed] for c, a in cols.items()})
+            if len(pending) >= flush_rows:
+                rows += write_klines(buffer_to_table(pending), market, interval, root)
+                pending.clear()
+        rows += write_klines(buffer_to_table(pending), market, interval, root)
+    except Exception as e:
+        print(f"[ERROR] {market}: fetch failed → {e} (stored rows={rows})")
+        return False
+
+    print(f"[OK] stored {market} {interval} (+{rows} rows)")
+    return True
+
+
+if __name__ == "__main__":
+    # 🔧 설정
+    interval = "1h"
+    start = dt.datetime(2018, 1, 1)
+    workers = 4
+
+    budget = UpbitBudget()
+    session = make_session(workers)
+    for market in krw_markets(session, budget):
+        save_upbit_store(market, interval, start, workers=workers, budget=budget, session=session)
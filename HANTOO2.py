@@ -6,13 +6,15 @@
 
 import os
 import json
-import time
 import asyncio
-import requests
 import websockets
 from typing import List, Tuple, Optional
 from dotenv import load_dotenv
 
+import kis_auth
+import kis_ticks
+import kis_tick_store
+
 load_dotenv()
 
 APP_KEY     = os.getenv("KIS_APP_KEY")
@@ -23,11 +25,11 @@ ENV         = os.getenv("KIS_ENV", "real").lower()
 SYMBOLS_RAW = os.getenv("KIS_SYMBOLS")   # "AMS:BITI,AMS:SBIT,AMS:SETH"
 EXCD3       = os.getenv("KIS_EXCD", "AMS")
 SYMBOL      = os.getenv("KIS_SYMBOL", "BITI")
+SAVE_TICKS  = os.getenv("KIS_SAVE_TICKS", "1") == "1"   # 체결 저장 (kis_tick_store, 경로 KIS_TICK_ROOT)
 
 # REST (실전)
 REST_BASE      = "https://openapi.koreainvestment.com:9443"
 TOKEN_PATH     = "/oauth2/token"       # 모의는 /oauth2/tokenP
-APPROVAL_PATH  = "/oauth2/Approval"
 
 # WebSocket tryitout (샘플/지연 채널): 평문 WS 사용
 WS_URL   = "ws://ops.koreainvestment.com:21000/tryitout/HDFSCNT0"
@@ -51,48 +53,14 @@ def build_tr_key(excd3: str, symbol: str) -> str:
     return f"D{excd3}{symbol}"
 
 # -------------------- REST: 토큰/승인키 --------------------
+# 발급값은 kis_auth 캐시 파일에 만료와 함께 저장 → 재시작/다른 프로세스에서도 유효하면 재사용
 def get_access_token() -> str:
-    url = f"{REST_BASE}{TOKEN_PATH}"
-    payload = {"grant_type": "client_credentials", "appkey": APP_KEY, "appsecret": APP_SECRET}
-    r = requests.post(url, headers={"Content-Type": "application/json; charset=UTF-8"},
-                      json=payload, timeout=10)
-    try:
-        r.raise_for_status()
-    except requests.HTTPError:
-        print("[TOKEN ERR]", r.status_code, r.text)
-        raise
-    data = r.json()
-    tok = data.get("access_token")
-    if not tok:
-        raise RuntimeError(f"Token error: {data}")
-    return tok
+    return kis_auth.access_token(REST_BASE, TOKEN_PATH, APP_KEY, APP_SECRET)
 
 def get_approval_key() -> str:
-    url = f"{REST_BASE}{APPROVAL_PATH}"
-    payload = {"grant_type": "client_credentials", "appkey": APP_KEY, "secretkey": APP_SECRET}
-    r = requests.post(url, headers={"Content-Type": "application/json; charset=UTF-8"},
-                      json=payload, timeout=10)
-    try:
-        r.raise_for_status()
-    except requests.HTTPError:
-        print("[APPROVAL ERR]", r.status_code, r.text)
-        raise
-    data = r.json()
-    key = data.get("approval_key") or data.get("approvalkey")
-    if not key:
-        raise RuntimeError(f"Approval key error: {data}")
-    return key
+    return kis_auth.approval_key(REST_BASE, APP_KEY, APP_SECRET)
 
 # -------------------- WS 처리 --------------------
-def parse_tick_payload(payload: str):
-    """
-    payload: '^' 구분 필드 문자열.
-    실제 필드맵은 KIS 문서 참고. 예시로 index 11을 현재가로 출력.
-    """
-    f = payload.split("^")
-    last = f[11] if len(f) > 11 else None
-    return last, payload
-
 async def subscribe_one(ws, approval_key: str, tr_id: str, tr_key: str):
     header = {
         "approval_key": approval_key,
@@ -105,14 +73,18 @@ async def subscribe_one(ws, approval_key: str, tr_id: str, tr_key: str):
     await ws.send(msg)
     print(f"[WS] Subscribed -> {tr_id} {tr_key}")
 
-async def ws_loop(approval_key: str, pairs: List[Tuple[str, str]]):
+async def ws_loop(pairs: List[Tuple[str, str]],
+                  writer: Optional[kis_tick_store.TickWriter] = None):
     """
     단일 커넥션에 여러 종목 구독. 끊기면 자동 재접속.
+    승인키는 (재)접속마다 kis_auth 캐시에서 다시 가져옴 (백그라운드 갱신분 반영, 만료 키로 재구독 안 함).
     구버전 websockets 호환을 위해 extra_headers / open_timeout 제거.
+    writer가 있으면 체결을 큐에 넣기만 하고(저장은 writer 태스크가) 출력은 생략.
     """
     retry = 3
     while True:
         try:
+            approval_key = await asyncio.to_thread(get_approval_key)
             async with websockets.connect(
                 WS_URL,
                 ping_interval=None,   # 서버 PINGPONG 사용
@@ -132,13 +104,17 @@ async def ws_loop(approval_key: str, pairs: List[Tuple[str, str]]):
                         continue
 
                     if msg[0] == "0":
-                        # 데이터 프레임: '0|...|...|payload(^-separated)'
-                        parts = msg.split("|")
-                        if len(parts) >= 4:
-                            payload = parts[3]
-                            last, raw = parse_tick_payload(payload)
-                            ts = time.strftime("%Y-%m-%d %H:%M:%S")
-                            print(f"[{ts}] last={last} raw={raw[:80]}...")
+                        # 데이터 프레임: '0|HDFSCNT0|<건수>|payload' → 건수만큼 체결 레코드로 분리
+                        try:
+                            ticks = kis_ticks.decode_frame(msg, WS_TR_ID)
+                        except ValueError as e:
+                            print(f"[WS BAD FRAME] {e}")
+                            continue
+                        if writer is not None:
+                            writer.put(ticks)
+                        else:
+                            for t in ticks if ticks is not None else ():
+                                print(kis_ticks.format_tick(t))
                         continue
 
                     # 제어 프레임(JSON): PINGPONG / SUBSCRIBE SUCCESS 등
@@ -163,12 +139,17 @@ async def ws_loop(approval_key: str, pairs: List[Tuple[str, str]]):
 async def main_async():
     # (선택) REST 토큰 필요 시 활성화
     # token = get_access_token()
-    approval_key = get_approval_key()
-    print("[LOGIN] approval_key OK")
+    # 승인키는 ws_loop가 (재)접속할 때마다 kis_auth 캐시에서 받음
+    kis_auth.start_refresher()  # 만료 전 백그라운드 재발급
 
     pairs = parse_symbols(SYMBOLS_RAW)
     print("[TARGETS]", ", ".join(f"{ex}:{sy}" for ex, sy in pairs))
-    await ws_loop(approval_key, pairs)
+    if not SAVE_TICKS:
+        await ws_loop(pairs)
+        return
+    writer = kis_tick_store.TickWriter()
+    print(f"[STORE] {writer.root}")
+    await asyncio.gather(writer.run(), writer.report(), ws_loop(pairs, writer))
 
 def main():
     try:
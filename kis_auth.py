@@ -0,0 +1,237 @@
+# kis_auth.py
+# KIS 접근토큰 / 웹소켓 승인키 공용 캐시
+# - 발급받은 값을 만료 시각과 함께 로컬 JSON 파일에 저장 → 다음 실행/다른 스크립트/다른 프로세스가 그대로 재사용
+#   (토큰 발급은 1분당 1회 제한이 있어 재시작마다 발급하면 느리고 거절되기도 함)
+# - 파일 접근은 잠금 파일(.lock)로 직렬화 (유닉스 fcntl, 윈도우 msvcrt), 쓰기는 임시 파일 → os.replace
+#   잠금을 잡은 채로 다시 확인 후 발급하므로 여러 프로세스가 동시에 떠도 발급은 한 번
+# - start_refresher(): 백그라운드 스레드가 만료 REFRESH_BEFORE초 전에 미리 재발급
+# - 캐시 키 = (종류, REST 호스트, 앱키 해시): 같은 앱키면 발급 경로(/oauth2/token, /oauth2/tokenP)가 달라도
+#   토큰 하나를 공유 (둘 다 같은 앱키의 토큰을 발급하므로 경로별로 따로 받으면 1분 1회 제한에 걸림)
+# - 캐시 경로: KIS_AUTH_CACHE (기본 ~/.kis_auth.json, 권한 600)
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # 윈도우
+    fcntl = None
+    import msvcrt
+
+load_dotenv()
+
+CACHE_PATH     = os.getenv("KIS_AUTH_CACHE", os.path.join(os.path.expanduser("~"), ".kis_auth.json"))
+REST_BASE      = "https://openapi.koreainvestment.com:9443"
+TOKEN_PATH     = "/oauth2/tokenP"
+APPROVAL_PATH  = "/oauth2/Approval"
+
+TOKEN_TTL      = 86400   # expires_in이 없을 때 (접근토큰 24시간)
+APPROVAL_TTL   = 86400   # 승인키는 응답에 만료가 없음 → 24시간으로 간주
+REFRESH_BEFORE = 3600    # 만료 1시간 전부터 재발급 대상
+MIN_VALID      = 60      # 남은 시간이 이보다 짧은 값은 쓰지 않음
+
+# (kind, base, path, appkey, appsecret, cache_path) → (값, 만료 epoch) : 프로세스 안 캐시 (파일을 매번 읽지 않음)
+_memory: Dict[Tuple[str, str, str, str, str, str], Tuple[str, float]] = {}
+_mem_lock = threading.Lock()
+
+
+# -------------------- 발급 (REST) --------------------
+def issue_access_token(base: str, token_path: str, appkey: str, appsecret: str) -> Tuple[str, float]:
+    """접근토큰 발급 → (토큰, 만료 epoch)."""
+    url = f"{base}{token_path}"
+    payload = {"grant_type": "client_credentials", "appkey": appkey, "appsecret": appsecret}
+    r = requests.post(url, headers={"Content-Type": "application/json; charset=UTF-8"},
+                      json=payload, timeout=10)
+    try:
+        r.raise_for_status()
+    except requests.HTTPError:
+        print("[TOKEN ERR]", r.status_code, r.text)
+        raise
+    data = r.json()
+    tok = data.get("access_token")
+    if not tok:
+        raise RuntimeError(f"Token error: {data}")
+    ttl = int(data.get("expires_in") or TOKEN_TTL)
+    return tok, time.time() + ttl
+
+
+def issue_approval_key(base: str, appkey: str, appsecret: str) -> Tuple[str, float]:
+    """웹소켓 승인키 발급 → (승인키, 만료 epoch)."""
+    url = f"{base}{APPROVAL_PATH}"
+    payload = {"grant_type": "client_credentials", "appkey": appkey, "secretkey": appsecret}
+    r = requests.post(url, headers={"Content-Type": "application/json; charset=UTF-8"},
+                      json=payload, timeout=10)
+    try:
+        r.raise_for_status()
+    except requests.HTTPError:
+        print("[APPROVAL ERR]", r.status_code, r.text)
+        raise
+    data = r.json()
+    key = data.get("approval_key") or data.get("approvalkey")
+    if not key:
+        raise RuntimeError(f"Approval key error: {data}")
+    return key, time.time() + APPROVAL_TTL
+
+
+# -------------------- 잠금 파일 캐시 --------------------
+def _entry_key(kind: str, base: str, appkey: str) -> str:
+    # 앱키 원문은 파일에 남기지 않음. 발급 경로는 키에 넣지 않음 (경로가 달라도 같은 토큰)
+    return f"{kind}|{base}|{hashlib.sha256(appkey.encode()).hexdigest()[:16]}"
+
+
+class _Locked:
+    """캐시 파일 전용 잠금 (with 블록 동안 배타). 유닉스는 fcntl.flock, 윈도우는 msvcrt.locking(첫 바이트)."""
+
+    def __init__(self, path: str):
+        self.path = path + ".lock"
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._f = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._f, fcntl.LOCK_EX)
+            return self
+        self._f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(self._f.fileno(), msvcrt.LK_LOCK, 1)  # 1초 간격 10번 재시도 후 OSError
+                return self
+            except OSError:
+                continue
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._f, fcntl.LOCK_UN)
+        else:
+            self._f.seek(0)
+            msvcrt.locking(self._f.fileno(), msvcrt.LK_UNLCK, 1)
+        self._f.close()
+
+
+def _load(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save(path: str, data: dict) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+
+
+def _issue(kind: str, base: str, path: str, appkey: str, appsecret: str) -> Tuple[str, float]:
+    if kind == "token":
+        return issue_access_token(base, path, appkey, appsecret)
+    return issue_approval_key(base, appkey, appsecret)
+
+
+def _get(kind: str, base: str, path: str, appkey: str, appsecret: str,
+         min_valid: float, cache_path: str) -> str:
+    """메모리 → 파일 → 발급 순. 남은 시간이 min_valid초 이상인 값만 돌려줌."""
+    url = f"{base}{path}"
+    mkey = (kind, base, path, appkey, appsecret, cache_path)
+    with _mem_lock:
+        hit = _memory.get(mkey)
+    if hit and hit[1] - time.time() >= min_valid:
+        return hit[0]
+
+    ekey = _entry_key(kind, base, appkey)
+    with _Locked(cache_path):
+        data = _load(cache_path)
+        ent = data.get(ekey)
+        if not ent or ent["expires_at"] - time.time() < min_valid:
+            try:
+                value, expires_at = _issue(kind, base, path, appkey, appsecret)
+            except Exception as e:
+                # 발급 제한(1분 1회 등)으로 실패해도 아직 유효한 값이 있으면 그대로 사용
+                if ent and ent["expires_at"] - time.time() >= MIN_VALID:
+                    print(f"[AUTH] {kind} refresh failed ({e}); keep cached one")
+                    value, expires_at = ent["value"], ent["expires_at"]
+                else:
+                    raise
+            else:
+                ent = {"value": value, "expires_at": expires_at, "issued_at": time.time()}
+                data[ekey] = ent
+                _save(cache_path, data)
+                print(f"[AUTH] issued {kind} ({url}), expires "
+                      f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(expires_at))}")
+    with _mem_lock:
+        _memory[mkey] = (ent["value"], ent["expires_at"])
+    return ent["value"]
+
+
+# -------------------- 공개 함수 --------------------
+def _creds(appkey: Optional[str], appsecret: Optional[str]) -> Tuple[str, str]:
+    appkey = appkey or os.getenv("KIS_APP_KEY") or os.getenv("KIS_APPKEY")
+    appsecret = appsecret or os.getenv("KIS_APP_SECRET") or os.getenv("KIS_APPSECRET")
+    if not appkey or not appsecret:
+        raise RuntimeError("KIS_APP_KEY / KIS_APP_SECRET 환경변수를 설정하세요 (.env)")
+    return appkey, appsecret
+
+
+def access_token(base: str = REST_BASE, token_path: str = TOKEN_PATH,
+                 appkey: Optional[str] = None, appsecret: Optional[str] = None,
+                 min_valid: float = MIN_VALID, cache_path: str = CACHE_PATH) -> str:
+    """캐시된 접근토큰 (없거나 곧 만료면 발급해서 저장)."""
+    appkey, appsecret = _creds(appkey, appsecret)
+    return _get("token", base, token_path, appkey, appsecret, min_valid, cache_path)
+
+
+def approval_key(base: str = REST_BASE, appkey: Optional[str] = None, appsecret: Optional[str] = None,
+                 min_valid: float = MIN_VALID, cache_path: str = CACHE_PATH) -> str:
+    """캐시된 웹소켓 승인키 (없거나 곧 만료면 발급해서 저장)."""
+    appkey, appsecret = _creds(appkey, appsecret)
+    return _get("approval", base, APPROVAL_PATH, appkey, appsecret, min_valid, cache_path)
+
+
+# -------------------- 백그라운드 갱신 --------------------
+_refresher: Optional[threading.Thread] = None
+
+
+def _refresh_loop(check_every: float) -> None:
+    while True:
+        time.sleep(check_every)
+        with _mem_lock:
+            specs = [(k, v[1]) for k, v in _memory.items()]
+        for (kind, base, path, appkey, appsecret, cache_path), expires_at in specs:
+            if expires_at - time.time() >= REFRESH_BEFORE:
+                continue
+            try:
+                # 잠금 안에서 파일을 다시 보므로 다른 프로세스가 먼저 갱신했으면 발급 없이 그 값을 가져옴
+                _get(kind, base, path, appkey, appsecret, REFRESH_BEFORE, cache_path)
+            except Exception as e:
+                print(f"[AUTH] background refresh of {kind} failed: {e}")
+
+
+def start_refresher(check_every: float = 60.0) -> None:
+    """이 프로세스에서 한 번이라도 쓴 토큰/승인키를 만료 전에 미리 재발급하는 데몬 스레드 (중복 실행 안 함)."""
+    global _refresher
+    if _refresher is not None and _refresher.is_alive():
+        return
+    _refresher = threading.Thread(target=_refresh_loop, args=(check_every,), name="kis-auth-refresh", daemon=True)
+    _refresher.start()
+
+
+if __name__ == "__main__":
+    # 🔧 설정
+    base = REST_BASE
+
+    tok = access_token(base)
+    key = approval_key(base)
+    print(f"token   ...{tok[-12:]}")
+    print(f"approval...{key[-12:]}")
+    for k, v in _load(CACHE_PATH).items():
+        left = v["expires_at"] - time.time()
+        print(f"{k.split('|')[0]:9s} {k.split('|')[1]}  {left / 3600:.1f}h left")
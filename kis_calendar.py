@@ -0,0 +1,146 @@
+# kis_calendar.py
+# 미국 주식시장(NAS/NYS/AMS) 거래일 달력
+# - 정규장 09:30~16:00 (America/New_York), 조기 폐장일은 13:00
+# - NYSE 휴장 규칙: 신정, MLK, 대통령의 날, 성금요일, 메모리얼, 준틴스(2022~), 독립기념일, 노동절, 추수감사절, 성탄절
+#   토요일 휴일은 금요일, 일요일 휴일은 월요일로 대체 (단, 신정이 토요일이면 대체 휴장 없음)
+# - 임시 휴장(국장 등)은 SPECIAL_CLOSURES에 추가
+# - trading_date(): "지금 적용되는 거래일" = ROLL(개장 전 04:00 ET)을 지난 가장 최근 거래일
+#   → 그 거래일의 전일종가는 다음 거래일 ROLL 전까지 바뀌지 않음
+
+import datetime as dt
+from functools import lru_cache
+from typing import Dict, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+NY = ZoneInfo("America/New_York")
+US_EXCHANGES = {"NAS", "NYS", "AMS"}
+
+OPEN_TIME        = dt.time(9, 30)
+CLOSE_TIME       = dt.time(16, 0)
+EARLY_CLOSE_TIME = dt.time(13, 0)
+ROLL_TIME        = dt.time(4, 0)   # 프리마켓 시작 = 거래일이 바뀌는 시각
+
+SPECIAL_CLOSURES = {
+    dt.date(2012, 10, 29): "Hurricane Sandy",
+    dt.date(2012, 10, 30): "Hurricane Sandy",
+    dt.date(2018, 12, 5): "National Day of Mourning (G. H. W. Bush)",
+    dt.date(2025, 1, 9): "National Day of Mourning (J. Carter)",
+}
+
+
+def _easter(year: int) -> dt.date:
+    """그레고리력 부활절 (익명 알고리즘)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return dt.date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> dt.date:
+    """month월의 n번째 weekday (n=-1이면 마지막)."""
+    if n > 0:
+        first = dt.date(year, month, 1)
+        return first + dt.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = dt.date(year + month // 12, month % 12 + 1, 1) - dt.timedelta(days=1)
+    return last - dt.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(d: dt.date) -> dt.date:
+    if d.weekday() == 5:
+        return d - dt.timedelta(days=1)
+    if d.weekday() == 6:
+        return d + dt.timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=None)
+def us_holidays(year: int) -> Dict[dt.date, str]:
+    """year년 휴장일 → 이름 (대체 휴장 반영, 임시 휴장 포함)."""
+    days = {}
+    ny = dt.date(year, 1, 1)
+    if ny.weekday() != 5:  # 토요일 신정은 대체 없음 (전년 12/31 금요일은 개장)
+        days[_observed(ny)] = "New Year's Day"
+    if year >= 1998:
+        days[_nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    days[_nth_weekday(year, 2, 0, 3)] = "Washington's Birthday"
+    days[_easter(year) - dt.timedelta(days=2)] = "Good Friday"
+    days[_nth_weekday(year, 5, 0, -1)] = "Memorial Day"
+    if year >= 2022:
+        days[_observed(dt.date(year, 6, 19))] = "Juneteenth"
+    days[_observed(dt.date(year, 7, 4))] = "Independence Day"
+    days[_nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    days[_nth_weekday(year, 11, 3, 4)] = "Thanksgiving Day"
+    days[_observed(dt.date(year, 12, 25))] = "Christmas Day"
+    days.update({d: name for d, name in SPECIAL_CLOSURES.items() if d.year == year})
+    return days
+
+
+def is_trading_day(d: dt.date) -> bool:
+    return d.weekday() < 5 and d not in us_holidays(d.year)
+
+
+@lru_cache(maxsize=None)
+def early_closes(year: int) -> Set[dt.date]:
+    """13:00 조기 폐장일: 독립기념일 전날(7/3), 추수감사절 다음 날, 성탄 전야 (거래일인 경우만)."""
+    days = {dt.date(year, 7, 3), _nth_weekday(year, 11, 3, 4) + dt.timedelta(days=1), dt.date(year, 12, 24)}
+    return {d for d in days if is_trading_day(d)}
+
+
+def prev_trading_day(d: dt.date) -> dt.date:
+    """d 이전(d 제외) 가장 최근 거래일."""
+    d -= dt.timedelta(days=1)
+    while not is_trading_day(d):
+        d -= dt.timedelta(days=1)
+    return d
+
+
+def next_trading_day(d: dt.date) -> dt.date:
+    """d 이후(d 제외) 첫 거래일."""
+    d += dt.timedelta(days=1)
+    while not is_trading_day(d):
+        d += dt.timedelta(days=1)
+    return d
+
+
+def session(d: dt.date) -> Tuple[dt.datetime, dt.datetime]:
+    """거래일 d의 정규장 (개장, 폐장) 시각 (NY tz-aware)."""
+    close = EARLY_CLOSE_TIME if d in early_closes(d.year) else CLOSE_TIME
+    return dt.datetime.combine(d, OPEN_TIME, NY), dt.datetime.combine(d, close, NY)
+
+
+def _as_ny(now: Optional[dt.datetime]) -> dt.datetime:
+    if now is None:
+        return dt.datetime.now(NY)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=dt.timezone.utc)  # naive는 UTC로 간주
+    return now.astimezone(NY)
+
+
+def trading_date(now: Optional[dt.datetime] = None) -> dt.date:
+    """now에 적용되는 거래일 (ROLL_TIME을 지난 가장 최근 거래일)."""
+    t = _as_ny(now)
+    d = t.date()
+    if is_trading_day(d) and t.time() >= ROLL_TIME:
+        return d
+    return prev_trading_day(d)
+
+
+def next_roll(now: Optional[dt.datetime] = None) -> dt.datetime:
+    """now 이후 거래일이 바뀌는 시각 (다음 거래일 ROLL_TIME, NY tz-aware)."""
+    return dt.datetime.combine(next_trading_day(trading_date(now)), ROLL_TIME, NY)
+
+
+if __name__ == "__main__":
+    # 🔧 설정
+    year = dt.date.today().year
+
+    for d, name in sorted(us_holidays(year).items()):
+        print(f"{d} {d:%a}  {name}")
+    print("early close:", ", ".join(str(d) for d in sorted(early_closes(year))))
+    print(f"trading date now: {trading_date()}  next roll: {next_roll()}")
@@ -3,15 +3,30 @@
 # - .env의 KIS_SYMBOLS = "AMS:BITI,AMS:SBIT,AMS:SETH" 형식
 # - 실전/모의 자동 분기
 # - 응답 내 전일종가 키가 없으면 last/diff로 역산
+# - 여러 종목은 fetch_quotes로 동시 조회: keep-alive 세션 하나 + 초당 TR 한도 토큰 버킷
+#   (실전 20건/초, 모의 2건/초의 90%; KIS_TPS로 조정), 초과 응답(EGW00201)은 대기 후 재시도
+# - 전일종가는 거래일마다 한 번만 바뀌므로 PrevCloseStore(sqlite WAL + 메모리 dict)에 (EXCD, SYMB, 거래일)로 저장
+#   → 같은 거래일 안에서는 API 호출 없이 응답, 거래일이 바뀌면(kis_calendar) 빠진 종목만 한 번에 조회
+#   롤 직후 아직 전 거래일 시세(응답 tdate가 다르거나, tdate가 없으면 개장 전인데 등락이 0이 아님)면
+#   저장하지 않고 다시 조회 (재시도 횟수 제한, 개장 후에는 그 거래일 시세로 보고 저장)
 
 import os
 import json
 import time
+import sqlite3
+import threading
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Tuple, Optional
 
+import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+import kis_auth
+import kis_calendar
+
 load_dotenv()
 
 ENV        = os.getenv("KIS_ENV", "real").lower()
@@ -29,21 +44,51 @@ else:
 PRICE_PATH = "/uapi/overseas-price/v1/quotations/price"
 TR_ID_PRICE = "HHDFS00000300"  # 해외 현재가 조회 TR (REST)
 
+# 초당 TR 호출 한도 (계좌/앱키 단위: 실전 20, 모의 2). 서버는 1초 이동 구간으로 세므로 90%만 사용
+TPS = float(os.getenv("KIS_TPS") or (20 if ENV == "real" else 2) * 0.9)
+THROTTLE_CODE = "EGW00201"  # 초당 거래건수를 초과하였습니다.
+
+PREV_CLOSE_DB = os.getenv("KIS_PREV_CLOSE_DB", "kis_prev_close.sqlite")
+
+class TokenBucket:
+    """초당 rate개, 최대 burst개까지 모아 쓰는 호출 제한 (스레드 공유)."""
+
+    def __init__(self, rate: float = TPS, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def block(self, seconds: float) -> None:
+        """한도 초과 응답을 받으면 모든 스레드가 seconds초 동안 쉬도록 잔여 토큰을 음수로."""
+        with self._lock:
+            self._tokens = min(self._tokens, -seconds * self.rate)
+            self._stamp = time.monotonic()
+
+def make_session(pool_size: int = 8) -> requests.Session:
+    """keep-alive 커넥션 풀을 여러 스레드가 같이 쓰는 세션."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 def get_access_token(appkey: str, appsecret: str) -> str:
-    url = BASE + TOKEN_PATH
-    headers = {"Content-Type": "application/json; charset=UTF-8"}
-    payload = {"grant_type": "client_credentials", "appkey": appkey, "appsecret": appsecret}
-    r = requests.post(url, headers=headers, json=payload, timeout=10)
-    try:
-        r.raise_for_status()
-    except requests.HTTPError:
-        print("[TOKEN ERR]", r.status_code, r.text)
-        raise
-    data = r.json()
-    tok = data.get("access_token")
-    if not tok:
-        raise RuntimeError(f"Token error: {data}")
-    return tok
+    # kis_auth 캐시 파일 재사용 (유효한 토큰이 있으면 발급 요청 없음)
+    return kis_auth.access_token(BASE, TOKEN_PATH, appkey, appsecret)
 
 def parse_symbols(raw: str) -> List[Tuple[str, str]]:
     pairs: List[Tuple[str, str]] = []
@@ -64,10 +109,13 @@ def to_float(x: Optional[str]) -> Optional[float]:
     except Exception:
         return None
 
-def get_overseas_price(token: str, excd: str, symb: str) -> Dict[str, Any]:
+def get_overseas_price(token: str, excd: str, symb: str,
+                       session: Optional[requests.Session] = None,
+                       bucket: Optional[TokenBucket] = None, max_retries: int = 5) -> Dict[str, Any]:
     """
     해외 현재가 조회.
     반환은 KIS 응답 원본의 "output" dict (시장/상품별 키가 다를 수 있으므로 그대로 전달).
+    초당 한도 초과(EGW00201)면 버킷을 잠시 막고 재시도.
     """
     url = BASE + PRICE_PATH
     headers = {
@@ -82,13 +130,29 @@ def get_overseas_price(token: str, excd: str, symb: str) -> Dict[str, Any]:
         "EXCD": excd,    # NAS/NYS/AMS 등
         "SYMB": symb,    # 티커
     }
-    r = requests.get(url, headers=headers, params=params, timeout=10)
-    try:
-        r.raise_for_status()
-    except requests.HTTPError:
-        print(f"[PRICE ERR] {excd}:{symb}", r.status_code, r.text)
-        raise
-    return r.json().get("output", {}) or {}
+    http = session or requests
+    for attempt in range(max_retries):
+        if bucket is not None:
+            bucket.acquire()
+        r = http.get(url, headers=headers, params=params, timeout=10)
+        try:
+            data = r.json()
+        except ValueError:
+            data = {}
+        if data.get("msg_cd") == THROTTLE_CODE:
+            wait = 0.5 * (attempt + 1)
+            if bucket is not None:
+                bucket.block(wait)
+            else:
+                time.sleep(wait)
+            continue
+        try:
+            r.raise_for_status()
+        except requests.HTTPError:
+            print(f"[PRICE ERR] {excd}:{symb}", r.status_code, r.text)
+            raise
+        return data.get("output", {}) or {}
+    raise RuntimeError(f"{excd}:{symb} throttled {max_retries} times ({THROTTLE_CODE})")
 
 def extract_prev_close(output: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -145,30 +209,207 @@ def extract_prev_close(output: Dict[str, Any]) -> Dict[str, Any]:
         "raw": output,  # 필요 시 디버깅용
     }
 
+QUOTE_COLUMNS = ["excd", "symb", "prev_close", "last", "diff", "rate",
+                 "open", "high", "low", "tdate", "ttime", "error"]
+
+def fetch_quotes(token: str, pairs: List[Tuple[str, str]], workers: int = 8,
+                 session: Optional[requests.Session] = None,
+                 bucket: Optional[TokenBucket] = None) -> pd.DataFrame:
+    """
+    (EXCD, SYMB) 목록을 동시에 조회 → pairs 순서 그대로 한 행씩인 DataFrame (QUOTE_COLUMNS).
+    전체 소요 시간은 왕복 지연이 아니라 초당 한도(len(pairs) / TPS)로 정해짐.
+    실패한 종목은 값이 비고 error에 사유.
+    """
+    session = session or make_session(workers)
+    bucket = bucket or TokenBucket()
+
+    def one(pair):
+        ex, sy = pair
+        try:
+            info = extract_prev_close(get_overseas_price(token, ex, sy, session, bucket))
+            info["error"] = None
+        except Exception as e:
+            info = {"error": str(e)}
+        info["excd"], info["symb"] = ex, sy
+        return info
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        rows = list(pool.map(one, pairs))
+    return pd.DataFrame(rows, columns=QUOTE_COLUMNS)
+
+class PrevCloseStore:
+    """
+    전일종가 캐시. 키 = (EXCD, SYMB, 거래일 YYYYMMDD), 값 = 그 거래일에 적용되는 전일종가.
+    - 영구 저장: sqlite (WAL, 여러 프로세스가 같이 읽음)
+    - 조회: 현재 거래일 값만 메모리 dict에 올려 두고 get()은 dict 조회만 (API/디스크 접근 없음)
+    - 달력이 있는 미국 거래소(NAS/NYS/AMS)만 캐시, 그 외 거래소는 매번 조회
+    """
+
+    def __init__(self, path: str = PREV_CLOSE_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS prev_close ("
+            " excd TEXT NOT NULL, symb TEXT NOT NULL, tdate TEXT NOT NULL,"
+            " prev_close REAL NOT NULL, fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (excd, symb, tdate))")
+        self._conn.commit()
+        self._tdate = ""
+        self._until = 0.0  # 이 epoch까지 self._tdate가 현재 거래일
+        self._mem: Dict[Tuple[str, str], float] = {}
+        self._roller: Optional[threading.Thread] = None
+        self.trading_date()
+
+    def trading_date(self) -> str:
+        """현재 거래일 (다음 롤 시각이 지나면 다시 계산하고 그 날짜 값을 메모리에 올림)."""
+        now = time.time()
+        if now < self._until:
+            return self._tdate
+        with self._lock:
+            if now >= self._until:
+                t = dt.datetime.fromtimestamp(now, dt.timezone.utc)
+                tdate = kis_calendar.trading_date(t).strftime("%Y%m%d")
+                rows = self._conn.execute(
+                    "SELECT excd, symb, prev_close FROM prev_close WHERE tdate = ?", (tdate,)).fetchall()
+                self._mem = {(ex, sy): pc for ex, sy, pc in rows}
+                self._tdate = tdate
+                self._until = kis_calendar.next_roll(t).timestamp()
+        return self._tdate
+
+    def get(self, excd: str, symb: str) -> Optional[float]:
+        """현재 거래일 전일종가 (없으면 None). 메모리 조회만."""
+        if time.time() >= self._until:
+            self.trading_date()
+        return self._mem.get((excd, symb))
+
+    def stale(self, pairs: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """현재 거래일 값이 없는 (또는 캐시 대상이 아닌) 종목."""
+        self.trading_date()
+        return [(ex, sy) for ex, sy in pairs
+                if ex not in kis_calendar.US_EXCHANGES or (ex, sy) not in self._mem]
+
+    def put(self, tdate: str, rows: List[Tuple[str, str, float]]) -> None:
+        """거래일 tdate의 (EXCD, SYMB, 전일종가) 행 저장."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO prev_close VALUES (?, ?, ?, ?, ?)",
+                [(ex, sy, tdate, pc, now) for ex, sy, pc in rows])
+            self._conn.commit()
+            if tdate == self._tdate:
+                self._mem.update({(ex, sy): pc for ex, sy, pc in rows})
+
+    def refresh(self, pairs: List[Tuple[str, str]], token: Optional[str] = None) -> pd.DataFrame:
+        """
+        빠진 종목만 fetch_quotes 한 번으로 조회해 저장. 조회한 행 DataFrame 반환 (모두 캐시에 있으면 빈 표, 토큰도 안 씀).
+        롤 직후 아직 전 거래일 시세면 그 전일종가는 하루 묵은 값 → 저장하지 않고 다음 조회에서 다시 받음:
+        - 응답에 tdate가 있으면 현재 거래일과 다를 때 저장하지 않음
+        - 없으면(HHDFS00000300 현재가 응답은 일자 필드가 없음) 롤 때 바뀌는 등락으로 판단:
+          새 거래일로 넘어간 시세는 개장 전까지 last == 전일종가(base, 등락 0),
+          아직 안 넘어간 시세는 last = 직전 거래일 종가, base = 그 전 거래일 종가 → 등락이 0이 아니면 저장하지 않음
+          (직전 거래일이 보합이면 두 값이 같아 어느 쪽이든 같은 값을 저장). 개장 후에는 그 거래일 시세로 봄
+        """
+        tdate = self.trading_date()
+        todo = self.stale(pairs)
+        if not todo:
+            return pd.DataFrame(columns=QUOTE_COLUMNS)
+        token = token or get_access_token(APPKEY, APPSECRET)
+        df = fetch_quotes(token, todo)
+        ok = df[df["error"].isna() & df["prev_close"].notna() & df["excd"].isin(kis_calendar.US_EXCHANGES)]
+        opened = time.time() >= kis_calendar.session(dt.datetime.strptime(tdate, "%Y%m%d").date())[0].timestamp()
+        rows, waiting = [], 0
+        for r in ok.itertuples(index=False):
+            got = "".join(ch for ch in str(r.tdate) if ch.isdigit()) if r.tdate else ""
+            if got:
+                rolled = got == tdate
+            else:
+                rolled = opened or (pd.notna(r.last) and float(r.last) == float(r.prev_close))
+            if rolled:
+                rows.append((r.excd, r.symb, float(r.prev_close)))
+            else:
+                waiting += 1
+        if waiting:
+            print(f"[PREV CLOSE] {waiting} quotes not on trading date {tdate} yet; not cached")
+        self.put(tdate, rows)
+        return df
+
+    def prev_closes(self, pairs: List[Tuple[str, str]], token: Optional[str] = None) -> Dict[Tuple[str, str], Optional[float]]:
+        """pairs 전체의 전일종가 (캐시 우선, 빠진 것만 한 번에 조회)."""
+        fetched = self.refresh(pairs, token)
+        live = {(r.excd, r.symb): r.prev_close for r in fetched.itertuples(index=False)}
+        out = {}
+        for ex, sy in pairs:
+            pc = self.get(ex, sy)
+            out[(ex, sy)] = pc if pc is not None else live.get((ex, sy))
+        return out
+
+    def start_roller(self, pairs: List[Tuple[str, str]], delay: float = 60.0, max_tries: int = 10) -> None:
+        """
+        거래일이 바뀔 때마다(롤 시각 + delay초) pairs 중 빠진 종목을 한 번에 조회하는 데몬 스레드.
+        시세가 아직 새 거래일로 넘어가지 않아 저장되지 못한 종목은 delay초마다 최대 max_tries번 다시 조회,
+        그래도 남으면 개장 + delay초에 한 번 더 조회 (개장 후 시세는 그 거래일 값으로 저장됨).
+        """
+        if self._roller is not None and self._roller.is_alive():
+            return
+
+        def left() -> List[Tuple[str, str]]:
+            return [p for p in self.stale(pairs) if p[0] in kis_calendar.US_EXCHANGES]
+
+        def refresh() -> None:
+            try:
+                self.refresh(pairs)
+            except Exception as e:
+                print(f"[PREV CLOSE] roll refresh failed: {e}")
+
+        def loop():
+            while True:
+                self.trading_date()
+                time.sleep(max(self._until - time.time(), 0) + delay)
+                tdate = dt.datetime.strptime(self.trading_date(), "%Y%m%d").date()
+                for _ in range(max_tries):
+                    refresh()
+                    if not left() or time.time() + delay >= self._until:
+                        break
+                    time.sleep(delay)
+                else:
+                    wait = kis_calendar.session(tdate)[0].timestamp() + delay - time.time()
+                    print(f"[PREV CLOSE] {len(left())} quotes not rolled after {max_tries} tries; "
+                          f"retry after the open ({max(wait, 0):.0f}s)")
+                    if 0 < wait < self._until - time.time():
+                        time.sleep(wait)
+                    refresh()
+
+        self._roller = threading.Thread(target=loop, name="prev-close-roll", daemon=True)
+        self._roller.start()
+
+    def close(self) -> None:
+        self._conn.close()
+
 def main():
     assert APPKEY and APPSECRET, "KIS_APPKEY / KIS_APPSECRET 환경변수를 설정하세요 (.env)"
     pairs = parse_symbols(SYMBOLS)
 
-    token = get_access_token(APPKEY, APPSECRET)
-
-    rows = []
-    for ex, sy in pairs:
-        out = get_overseas_price(token, ex, sy)
-        info = extract_prev_close(out)
-        rows.append((ex, sy, info))
+    store = PrevCloseStore()
+    fetched = store.refresh(pairs)  # 이번 거래일에 이미 받은 종목은 API 호출 없음
+    live = {(r.excd, r.symb): r for r in fetched.itertuples(index=False)}
 
     # 출력
     print("-" * 80)
-    print(f"ENV={ENV.upper()}  BASE={BASE}")
-    for ex, sy, info in rows:
-        pc = info["prev_close"]
-        last = info["last"]
-        diff = info["diff"]
-        rate = info["rate"]
-        tdate = info["tdate"]
-        ttime = info["ttime"]
-        print(f"{ex}:{sy:5s}  prev_close={pc}  last={last}  chg={diff} ({rate}%)  "
-              f"OHLC={info['open']}/{info['high']}/{info['low']}  {tdate} {ttime}")
+    print(f"ENV={ENV.upper()}  BASE={BASE}  TPS={TPS:g}  trading_date={store.trading_date()}  "
+          f"cached={len(pairs) - len(fetched)} fetched={len(fetched)}")
+    for ex, sy in pairs:
+        r = live.get((ex, sy))
+        if r is None:
+            print(f"{ex}:{sy:5s}  prev_close={store.get(ex, sy)}  (cached)")
+        elif r.error:
+            print(f"{r.excd}:{r.symb:5s}  ERROR {r.error}")
+        else:
+            print(f"{r.excd}:{r.symb:5s}  prev_close={r.prev_close}  last={r.last}  chg={r.diff} ({r.rate}%)  "
+                  f"OHLC={r.open}/{r.high}/{r.low}  {r.tdate} {r.ttime}")
+    store.close()
 
 if __name__ == "__main__":
     main()
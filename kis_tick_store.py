@@ -0,0 +1,285 @@
+# kis_tick_store.py
+# 실시간 체결(kis_ticks.TICK_DTYPE) 추가 전용 저장소
+# - 경로: {root}/{YYYYMMDD}/{HH}.ticks (UTC 시간 단위 세그먼트), 레코드 = TICK_DTYPE 고정 폭 바이너리
+#   {root}/dtype.json 에 레코드 형식 기록 (형식이 바뀌면 기존 저장소와 섞지 않음)
+# - 희소 시간 인덱스: {HH}.idx 에 INDEX_EVERY 건마다 (시작 행, 블록 최소 ts, 블록 최대 ts) int64 3개
+#   → 구간 조회 시 겹치는 블록 + 아직 덜 찬 마지막 블록만 읽음 (종목이 섞여 ts가 살짝 뒤바뀌어도 정확)
+# - TickWriter: ws_loop는 put()만 (대기 없음), 별도 asyncio 태스크가 큐를 비우며 모아서 한 번에 기록
+#   디스크 쓰기는 asyncio.to_thread → 수신 루프를 막지 않음
+#   TickWriter.report(): 기록/버림 건수를 주기적으로 출력 (버림이 늘면 바로 경고)
+# - read_ticks: 세그먼트를 np.memmap으로 열어 필요한 블록만 복사
+# - 세그먼트 하나에 쓰는 프로세스는 하나 (여러 수집기를 띄우면 root를 나눌 것)
+
+import os
+import json
+import time
+import asyncio
+import datetime as dt
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from kis_ticks import TICK_DTYPE
+
+TICK_ROOT   = os.getenv("KIS_TICK_ROOT", "kis_tick_store")
+INDEX_EVERY = 1024
+HOUR_MS     = 3_600_000
+
+
+def _check_dtype(root: str) -> None:
+    path = os.path.join(root, "dtype.json")
+    descr = json.loads(json.dumps(TICK_DTYPE.descr))
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            if json.load(f) != descr:
+                raise ValueError(f"{root}: record layout differs from kis_ticks.TICK_DTYPE")
+        return
+    os.makedirs(root, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(descr, f)
+
+
+def segment_path(root: str, hour_ms: int) -> str:
+    t = dt.datetime.fromtimestamp(hour_ms / 1000, dt.timezone.utc)
+    return os.path.join(root, t.strftime("%Y%m%d"), f"{t:%H}.ticks")
+
+
+class _Segment:
+    """열린 세그먼트 하나 (데이터 + 인덱스 파일, 덜 찬 블록의 min/max)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.idx_path = path[:-len(".ticks")] + ".idx"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        self.rows = size // TICK_DTYPE.itemsize
+        if size % TICK_DTYPE.itemsize:  # 기록 중 끊긴 마지막 레코드는 버림
+            with open(path, "r+b") as f:
+                f.truncate(self.rows * TICK_DTYPE.itemsize)
+        # 인덱스는 완성된 블록까지만 (데이터보다 앞선 항목은 잘라냄)
+        blocks = self.rows // INDEX_EVERY
+        if os.path.exists(self.idx_path):
+            with open(self.idx_path, "r+b") as f:
+                f.truncate(min(os.path.getsize(self.idx_path) // 24, blocks) * 24)
+        n_idx = os.path.getsize(self.idx_path) // 24 if os.path.exists(self.idx_path) else 0
+        self._data = open(path, "ab")
+        self._idx = open(self.idx_path, "ab")
+        if n_idx < blocks:  # 인덱스 쓰기 전에 끊긴 블록은 다시 만듦
+            ts = np.memmap(path, dtype=TICK_DTYPE, mode="r", shape=(self.rows,))["ts"]
+            for b in range(n_idx, blocks):
+                blk = ts[b * INDEX_EVERY:(b + 1) * INDEX_EVERY]
+                self._idx.write(np.array([b * INDEX_EVERY, blk.min(), blk.max()], np.int64).tobytes())
+        tail = self.rows - blocks * INDEX_EVERY
+        if tail:
+            ts = np.memmap(path, dtype=TICK_DTYPE, mode="r", shape=(self.rows,))["ts"][-tail:]
+            self._lo, self._hi = int(ts.min()), int(ts.max())
+        else:
+            self._lo, self._hi = None, None
+
+    def append(self, recs: np.ndarray) -> None:
+        self._data.write(recs.tobytes())
+        ts = recs["ts"]
+        i = 0
+        while i < len(recs):
+            room = INDEX_EVERY - self.rows % INDEX_EVERY
+            part = ts[i:i + room]
+            lo, hi = int(part.min()), int(part.max())
+            self._lo = lo if self._lo is None else min(self._lo, lo)
+            self._hi = hi if self._hi is None else max(self._hi, hi)
+            self.rows += len(part)
+            i += len(part)
+            if self.rows % INDEX_EVERY == 0:
+                self._idx.write(np.array([self.rows - INDEX_EVERY, self._lo, self._hi], np.int64).tobytes())
+                self._lo, self._hi = None, None
+
+    def flush(self) -> None:
+        self._data.flush()  # 데이터 먼저 → 인덱스가 데이터보다 앞서지 않음
+        self._idx.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._data.close()
+        self._idx.close()
+
+
+class TickWriter:
+    """
+    체결 배열을 큐로 받아 세그먼트에 모아 쓰는 asyncio 태스크.
+    put()은 절대 기다리지 않음 (큐가 가득 차면 버리고 dropped 증가).
+    """
+
+    def __init__(self, root: str = TICK_ROOT, max_batch: int = 50_000,
+                 flush_every: float = 0.5, max_queue: int = 100_000):
+        _check_dtype(root)
+        self.root = root
+        self.max_batch = max_batch
+        self.flush_every = flush_every
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._open: Dict[int, _Segment] = {}
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+    def put(self, ticks: Optional[np.ndarray]) -> None:
+        if ticks is None or not len(ticks):
+            return
+        try:
+            self.queue.put_nowait(ticks)
+        except asyncio.QueueFull:
+            self.dropped += len(ticks)
+
+    def _write(self, recs: np.ndarray) -> None:
+        """같은 시간대끼리 묶어 세그먼트에 추가 (스레드에서 실행)."""
+        hours = recs["ts"] // HOUR_MS * HOUR_MS
+        for h in np.unique(hours):
+            seg = self._open.get(int(h))
+            if seg is None:
+                seg = self._open[int(h)] = _Segment(segment_path(self.root, int(h)))
+            seg.append(recs[hours == h])
+        for seg in self._open.values():
+            seg.flush()
+        # 두 시간 넘게 지난 세그먼트는 닫음 (늦게 온 체결을 위해 직전 시간은 열어 둠)
+        latest = int(hours.max())
+        for h in [h for h in self._open if h < latest - HOUR_MS]:
+            self._open.pop(h).close()
+        self.written += len(recs)
+        self.batches += 1
+
+    def _drain(self, first: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        parts = [first] if first is not None else []
+        n = len(first) if first is not None else 0
+        while n < self.max_batch:
+            try:
+                a = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            parts.append(a)
+            n += len(a)
+        return np.concatenate(parts) if parts else None
+
+    async def run(self) -> None:
+        """큐가 빌 때까지 모아서 기록, 배치 사이 최소 flush_every초. 취소되면 남은 것 기록 후 닫음."""
+        first: Optional[np.ndarray] = None
+        pending: Optional[asyncio.Future] = None
+        try:
+            while True:
+                first = await self.queue.get()
+                await asyncio.sleep(self.flush_every)  # 그동안 들어온 것까지 한 번에
+                recs, first = self._drain(first), None
+                pending = asyncio.ensure_future(asyncio.to_thread(self._write, recs))
+                await asyncio.shield(pending)
+        finally:
+            if pending is not None and not pending.done():
+                await asyncio.wait([pending])  # 스레드에서 쓰는 중이던 배치부터 끝냄
+            recs = self._drain(first)
+            while recs is not None:
+                self._write(recs)
+                recs = self._drain()
+            self.close()
+            print(f"[STORE] closed: written={self.written} batches={self.batches} dropped={self.dropped}")
+
+    async def report(self, every: float = 60.0, check: float = 1.0) -> None:
+        """every초마다 누적 기록/버림 건수와 큐 길이 출력. 버림(dropped)이 늘면 check초 안에 바로 경고."""
+        last_dropped, last_print = self.dropped, time.monotonic()
+        while True:
+            await asyncio.sleep(check)
+            if self.dropped > last_dropped:
+                print(f"[STORE WARN] queue full: dropped +{self.dropped - last_dropped} ticks "
+                      f"(total {self.dropped}, queue={self.queue.qsize()})")
+                last_dropped = self.dropped
+            if time.monotonic() - last_print >= every:
+                print(f"[STORE] written={self.written} batches={self.batches} dropped={self.dropped} "
+                      f"queue={self.queue.qsize()}")
+                last_print = time.monotonic()
+
+    def close(self) -> None:
+        for seg in self._open.values():
+            seg.close()
+        self._open.clear()
+
+
+# -------------------- 읽기 --------------------
+def open_segment(path: str) -> np.ndarray:
+    """세그먼트 전체를 읽기 전용 memmap으로 (완성된 레코드까지만)."""
+    rows = os.path.getsize(path) // TICK_DTYPE.itemsize
+    if rows == 0:
+        return np.empty(0, dtype=TICK_DTYPE)
+    return np.memmap(path, dtype=TICK_DTYPE, mode="r", shape=(rows,))
+
+
+def _read_index(path: str) -> np.ndarray:
+    idx_path = path[:-len(".ticks")] + ".idx"
+    if not os.path.exists(idx_path):
+        return np.empty((0, 3), dtype=np.int64)
+    return np.fromfile(idx_path, dtype=np.int64).reshape(-1, 3)
+
+
+def _segment_ranges(path: str, rows: int, t0: int, t1: int) -> List[Tuple[int, int]]:
+    """[t0, t1]과 겹칠 수 있는 행 구간들 (인덱스 블록 + 인덱스 없는 꼬리)."""
+    idx = _read_index(path)
+    idx = idx[idx[:, 0] + INDEX_EVERY <= rows]
+    hit = idx[(idx[:, 2] >= t0) & (idx[:, 1] <= t1), 0]
+    ranges = [(int(s), int(s) + INDEX_EVERY) for s in hit]
+    tail = len(idx) * INDEX_EVERY
+    if tail < rows:
+        ranges.append((tail, rows))
+    return ranges
+
+
+def read_ticks(start: Optional[dt.datetime] = None, end: Optional[dt.datetime] = None,
+               symbols: Optional[List[str]] = None, root: str = TICK_ROOT) -> np.ndarray:
+    """[start, end] 구간 체결 (ts 순 정렬). naive datetime은 UTC로 간주."""
+    def ms(d, default):
+        if d is None:
+            return default
+        if d.tzinfo is None:
+            d = d.replace(tzinfo=dt.timezone.utc)
+        return int(d.timestamp() * 1000)
+
+    t0, t1 = ms(start, 0), ms(end, 2 ** 62)
+    want = None if symbols is None else np.array([s.encode() for s in symbols], dtype=TICK_DTYPE["symb"])
+    out = []
+    for day in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+        for name in sorted(os.listdir(os.path.join(root, day))) if day.isdigit() else []:
+            if not name.endswith(".ticks"):
+                continue
+            hour = int(dt.datetime.strptime(day + name[:2], "%Y%m%d%H").replace(tzinfo=dt.timezone.utc).timestamp() * 1000)
+            if hour + HOUR_MS <= t0 or hour > t1:
+                continue
+            path = os.path.join(root, day, name)
+            seg = open_segment(path)
+            if not len(seg):
+                continue
+            for a, b in _segment_ranges(path, len(seg), t0, t1):
+                blk = seg[a:b]
+                keep = (blk["ts"] >= t0) & (blk["ts"] <= t1)
+                if want is not None:
+                    keep &= np.isin(blk["symb"], want)
+                out.append(np.array(blk[keep]))
+    if not out:
+        return np.empty(0, dtype=TICK_DTYPE)
+    recs = np.concatenate(out)
+    return recs[np.argsort(recs["ts"], kind="stable")]
+
+
+def ticks_to_frame(recs: np.ndarray, tz: Optional[str] = None) -> pd.DataFrame:
+    """체결 배열 → DataFrame (문자열 컬럼 디코드, time 컬럼 추가)."""
+    df = pd.DataFrame(recs)
+    for c in ("rsym", "symb"):
+        df[c] = df[c].str.decode("utf-8")
+    df.insert(0, "time", pd.to_datetime(df["ts"], unit="ms", utc=True))
+    if tz is not None:
+        df["time"] = df["time"].dt.tz_convert(tz).dt.tz_localize(None)
+    return df
+
+
+if __name__ == "__main__":
+    # 🔧 설정
+    hours = 1
+
+    end = dt.datetime.now(dt.timezone.utc)
+    recs = read_ticks(end - dt.timedelta(hours=hours), end)
+    print(f"{len(recs)} ticks in last {hours}h ({TICK_ROOT})")
+    if len(recs):
+        print(ticks_to_frame(recs, "Asia/Seoul")[["time", "symb", "last", "evol", "pbid", "pask"]].tail(20))
@@ -0,0 +1,178 @@
+# kis_ticks.py
+# KIS 해외주식 실시간 체결가(HDFSCNT0) 프레임 디코더
+# - 데이터 프레임: '0|HDFSCNT0|003|f0^f1^...'  (parts[2] = 이 프레임에 든 체결 건수 N)
+#   → payload는 N × 26개 필드가 '^'로 이어진 것 → 26개씩 잘라 N건으로 분리
+#   (예전 코드는 fields[11]만 보고 나머지 건은 버렸음)
+# - 결과: NumPy structured array (TICK_DTYPE), 가격은 float64, 수량은 int64,
+#   ts = 한국 일자/시각(KYMD/KHMS) 기준 UTC epoch ms (거래소 현지 일자/시각은 xymd/xhms 정수로 보존)
+# - decode_frames(msgs): 여러 프레임을 배열 하나로 (저장/분석용)
+
+import time
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+TR_ID = "HDFSCNT0"
+
+# KIS 문서 필드 순서 그대로 (이름, dtype, 설명)
+FIELD_MAP = [
+    ("rsym", "S16", "실시간종목코드 (D+EXCD+SYMB)"),
+    ("symb", "S12", "종목코드"),
+    ("zdiv", "u1",  "소수점자리수"),
+    ("tymd", "i4",  "현지영업일자"),
+    ("xymd", "i4",  "현지일자"),
+    ("xhms", "i4",  "현지시간"),
+    ("kymd", "i4",  "한국일자"),
+    ("khms", "i4",  "한국시간"),
+    ("open", "f8",  "시가"),
+    ("high", "f8",  "고가"),
+    ("low",  "f8",  "저가"),
+    ("last", "f8",  "현재가"),
+    ("sign", "u1",  "대비구분 (1상한 2상승 3보합 4하한 5하락)"),
+    ("diff", "f8",  "전일대비"),
+    ("rate", "f8",  "등락율"),
+    ("pbid", "f8",  "매수호가"),
+    ("pask", "f8",  "매도호가"),
+    ("vbid", "i8",  "매수잔량"),
+    ("vask", "i8",  "매도잔량"),
+    ("evol", "i8",  "체결량"),
+    ("tvol", "i8",  "거래량"),
+    ("tamt", "f8",  "거래대금"),
+    ("bivl", "i8",  "매도체결량"),
+    ("asvl", "i8",  "매수체결량"),
+    ("strn", "f8",  "체결강도"),
+    ("mtyp", "u1",  "시장구분 (1장중 2장전 3장후)"),
+]
+N_FIELDS = len(FIELD_MAP)
+TICK_DTYPE = np.dtype([("ts", "i8")] + [(name, dtype) for name, dtype, _ in FIELD_MAP])
+
+_KST_MS = 9 * 3600 * 1000
+_EMPTY = {"f": "nan", "i": "0", "u": "0", "S": ""}
+
+
+def split_frame(msg) -> Optional[Tuple[str, int, List[str]]]:
+    """데이터 프레임 → (tr_id, 건수, 필드 목록). 제어 프레임(JSON 등)이면 None."""
+    if isinstance(msg, bytes):
+        msg = msg.decode("utf-8", errors="ignore")
+    if not msg or msg[0] not in "01":
+        return None
+    parts = msg.split("|", 3)
+    if len(parts) < 4:
+        return None
+    fields = parts[3].split("^")
+    n = int(parts[2])
+    if len(fields) != n * N_FIELDS:
+        raise ValueError(f"{parts[1]}: expected {n}×{N_FIELDS} fields, got {len(fields)}")
+    return parts[1], n, fields
+
+
+_day_ms = {}  # 'YYYYMMDD'(KST) → 그날 0시의 UTC epoch ms
+
+
+def _kst_ms(ymd: str, hms: str) -> int:
+    day = _day_ms.get(ymd)
+    if day is None:
+        day = _day_ms[ymd] = int(kst_to_epoch_ms(np.array([int(ymd)]), np.array([0]))[0])
+    h = int(hms)
+    return day + (h // 10000 * 3600 + h // 100 % 100 * 60 + h % 100) * 1000
+
+
+def _to_records(rows: List[tuple]) -> np.ndarray:
+    """필드 문자열 튜플(26개) 목록 → TICK_DTYPE 배열 (문자열 → 숫자 변환은 numpy가 한 번에)."""
+    rows = [(_kst_ms(r[6], r[7]),) + r for r in rows]
+    try:
+        return np.array(rows, dtype=TICK_DTYPE)
+    except ValueError:
+        # 장전/장후 등 빈 필드가 섞인 경우만 느린 경로 (빈 값 → NaN/0)
+        kinds = [TICK_DTYPE[i].kind for i in range(len(TICK_DTYPE))]
+        rows = [tuple(v if v != "" else _EMPTY[k] for v, k in zip(r, kinds)) for r in rows]
+        return np.array(rows, dtype=TICK_DTYPE)
+
+
+def kst_to_epoch_ms(ymd: np.ndarray, hms: np.ndarray) -> np.ndarray:
+    """YYYYMMDD / HHMMSS 정수 배열 (한국 시각) → UTC epoch ms."""
+    ymd = np.asarray(ymd, dtype=np.int64)
+    hms = np.asarray(hms, dtype=np.int64)
+    months = (ymd // 10000 - 1970) * 12 + ymd // 100 % 100 - 1
+    days = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) + ymd % 100 - 1
+    secs = hms // 10000 * 3600 + hms // 100 % 100 * 60 + hms % 100
+    return days * 86_400_000 + secs * 1000 - _KST_MS
+
+
+def decode_frame(msg, tr_id: str = TR_ID) -> Optional[np.ndarray]:
+    """프레임 하나 → 체결 N건 structured array. tr_id가 다르거나 제어 프레임이면 None."""
+    sp = split_frame(msg)
+    if sp is None or sp[0] != tr_id:
+        return None
+    _, n, f = sp
+    return _to_records([tuple(f[i * N_FIELDS:(i + 1) * N_FIELDS]) for i in range(n)])
+
+
+def decode_frames(msgs: Iterable, tr_id: str = TR_ID) -> np.ndarray:
+    """여러 프레임 → 전체 체결 structured array (수신 순서). 제어 프레임/다른 tr_id는 건너뜀."""
+    rows: List[tuple] = []
+    for msg in msgs:
+        sp = split_frame(msg)
+        if sp is None or sp[0] != tr_id:
+            continue
+        _, n, f = sp
+        rows.extend(tuple(f[i * N_FIELDS:(i + 1) * N_FIELDS]) for i in range(n))
+    if not rows:
+        return np.empty(0, dtype=TICK_DTYPE)
+    return _to_records(rows)
+
+
+def format_tick(t) -> str:
+    """체결 한 건 → 한 줄 문자열 (출력용)."""
+    ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t["ts"] / 1000))
+    return (f"[{ts}] {t['symb'].decode()} last={t['last']:.{t['zdiv']}f} "
+            f"vol={t['evol']} bid={t['pbid']:.{t['zdiv']}f} ask={t['pask']:.{t['zdiv']}f} "
+            f"local={t['xymd']} {t['xhms']:06d}")
+
+
+# -------------------- 벤치마크 --------------------
+def synth_frame(symbol: str = "BITI", excd: str = "AMS", n: int = 1, seq: int = 0) -> str:
+    """테스트용 HDFSCNT0 프레임 (n건)."""
+    recs = []
+    for i in range(n):
+        k = seq + i
+        last = 10.0 + (k % 100) * 0.01
+        hms = 223000 + k % 60
+        recs.append("^".join([
+            f"D{excd}{symbol}", symbol, "4", "20261016", "20261016", f"{hms - 130000:06d}",
+            "20261016", f"{hms:06d}", "10.0000", "11.0000", "9.5000", f"{last:.4f}", "2",
+            "0.1500", "1.52", f"{last - 0.01:.4f}", f"{last + 0.01:.4f}", "300", "200",
+            str(1 + k % 50), str(100000 + k), f"{1000000.0 + k:.2f}", "400", "600", "120.50", "1",
+        ]))
+    return f"0|{TR_ID}|{n:03d}|" + "^".join(recs)
+
+
+def bench(frames: int = 50_000, per_frame: int = 1) -> None:
+    msgs = [synth_frame(n=per_frame, seq=i * per_frame) for i in range(frames)]
+
+    t = time.perf_counter()
+    for m in msgs:
+        parts = m.split("|")
+        _ = parts[3].split("^")[11]
+    legacy = frames / (time.perf_counter() - t)
+
+    t = time.perf_counter()
+    for m in msgs:
+        decode_frame(m)
+    one = frames / (time.perf_counter() - t)
+
+    t = time.perf_counter()
+    out = decode_frames(msgs)
+    batch = frames / (time.perf_counter() - t)
+    assert len(out) == frames * per_frame
+    print(f"{per_frame} tick/frame  legacy split(first tick only)={legacy:,.0f} msgs/s  "
+          f"decode_frame={one:,.0f} msgs/s  decode_frames={batch:,.0f} msgs/s ({batch * per_frame:,.0f} ticks/s)")
+
+
+if __name__ == "__main__":
+    # 🔧 설정
+    frames = 50_000
+
+    for per_frame in (1, 3, 10):
+        bench(frames, per_frame)
+    print(format_tick(decode_frame(synth_frame(n=3))[2]))
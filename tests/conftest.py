@@ -0,0 +1,8 @@
+# 스크립트들은 패키지가 아니라 같은 폴더 import를 씀 → 루트와 Crawling을 경로에 추가
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for p in (ROOT, os.path.join(ROOT, "Crawling")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
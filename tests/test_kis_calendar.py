@@ -0,0 +1,65 @@
+# kis_calendar 휴장일/조기 폐장 표를 NYSE 공표 일정과 비교
+import datetime as dt
+
+import pytest
+
+import kis_calendar as kc
+
+D = dt.date
+
+# NYSE 공표 휴장일 (주말이 아닌 날만)
+NYSE_HOLIDAYS = {
+    2021: [D(2021, 1, 1), D(2021, 1, 18), D(2021, 2, 15), D(2021, 4, 2), D(2021, 5, 31),
+           D(2021, 7, 5), D(2021, 9, 6), D(2021, 11, 25), D(2021, 12, 24)],
+    # 신정이 토요일 → 2021-12-31 금요일은 개장, 준틴스/성탄은 월요일 대체
+    2022: [D(2022, 1, 17), D(2022, 2, 21), D(2022, 4, 15), D(2022, 5, 30), D(2022, 6, 20),
+           D(2022, 7, 4), D(2022, 9, 5), D(2022, 11, 24), D(2022, 12, 26)],
+    2024: [D(2024, 1, 1), D(2024, 1, 15), D(2024, 2, 19), D(2024, 3, 29), D(2024, 5, 27),
+           D(2024, 6, 19), D(2024, 7, 4), D(2024, 9, 2), D(2024, 11, 28), D(2024, 12, 25)],
+    2025: [D(2025, 1, 1), D(2025, 1, 9), D(2025, 1, 20), D(2025, 2, 17), D(2025, 4, 18),
+           D(2025, 5, 26), D(2025, 6, 19), D(2025, 7, 4), D(2025, 9, 1), D(2025, 11, 27),
+           D(2025, 12, 25)],
+    # 독립기념일이 토요일 → 7/3 금요일 대체
+    2026: [D(2026, 1, 1), D(2026, 1, 19), D(2026, 2, 16), D(2026, 4, 3), D(2026, 5, 25),
+           D(2026, 6, 19), D(2026, 7, 3), D(2026, 9, 7), D(2026, 11, 26), D(2026, 12, 25)],
+}
+
+NYSE_EARLY_CLOSES = {
+    2021: [D(2021, 11, 26)],
+    2022: [D(2022, 11, 25)],
+    2024: [D(2024, 7, 3), D(2024, 11, 29), D(2024, 12, 24)],
+    2025: [D(2025, 7, 3), D(2025, 11, 28), D(2025, 12, 24)],
+    2026: [D(2026, 11, 27), D(2026, 12, 24)],
+}
+
+
+@pytest.mark.parametrize("year", sorted(NYSE_HOLIDAYS))
+def test_holidays(year):
+    weekday_holidays = sorted(d for d in kc.us_holidays(year) if d.weekday() < 5)
+    assert weekday_holidays == NYSE_HOLIDAYS[year]
+
+
+@pytest.mark.parametrize("year", sorted(NYSE_EARLY_CLOSES))
+def test_early_closes(year):
+    assert sorted(kc.early_closes(year)) == NYSE_EARLY_CLOSES[year]
+
+
+def test_saturday_new_year_keeps_previous_friday_open():
+    assert kc.is_trading_day(D(2021, 12, 31))
+
+
+def test_early_close_session():
+    _, close = kc.session(D(2025, 11, 28))
+    assert close.time() == kc.EARLY_CLOSE_TIME
+    _, close = kc.session(D(2025, 11, 26))
+    assert close.time() == kc.CLOSE_TIME
+
+
+def test_trading_date_rolls_at_premarket_over_holiday():
+    # 2025-07-04(금) 휴장 → 월요일 04:00 ET 전까지는 7/3 거래일
+    before = dt.datetime(2025, 7, 7, 3, 59, tzinfo=kc.NY)
+    after = dt.datetime(2025, 7, 7, 4, 0, tzinfo=kc.NY)
+    assert kc.trading_date(before) == D(2025, 7, 3)
+    assert kc.trading_date(after) == D(2025, 7, 7)
+    assert kc.next_roll(before) == after
+    assert kc.prev_trading_day(D(2025, 7, 7)) == D(2025, 7, 3)
@@ -0,0 +1,70 @@
+# 샤딩(workers > 1) 수집 결과가 순차 수집과 같은지 mock_binance로 확인
+import datetime as dt
+
+import pytest
+
+import multi_symbols_to_csv as msc
+from mock_binance import MockBinance, listing_ms
+
+NOW_MS = 1_735_689_600_000  # 2025-01-01 00:00 UTC (진행 중인 봉이 결과를 흔들지 않게 고정)
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = MockBinance(now_ms=NOW_MS).start()
+    yield srv
+    srv.stop()
+
+
+@pytest.fixture(autouse=True)
+def mock_base(server, monkeypatch):
+    monkeypatch.setattr(msc, "BASE_URL", f"{server.url}/api/v3/klines")
+
+
+def _utc(ms: int) -> dt.datetime:
+    return dt.datetime.fromtimestamp(ms / 1000, dt.timezone.utc)
+
+
+def _collect(symbol, interval, start, end, workers):
+    rows = []
+    for chunk in msc.iter_binance_klines(symbol, interval, start, end, pause=0.0, workers=workers):
+        rows.extend(chunk)
+    return rows
+
+
+@pytest.mark.parametrize("interval,days,offset_ms", [
+    ("1h", 800, 0),           # 상장 전부터 시작 → 첫 봉은 상장 시각
+    ("1h", 120, 1_234_567),   # 봉 경계가 아닌 시작
+    ("15m", 30, 0),
+    ("1m", 3, 59_999),
+])
+def test_sharded_equals_sequential(interval, days, offset_ms):
+    symbol = "ADAUSDT"
+    start = _utc(listing_ms(symbol) - 86_400_000 + offset_ms)
+    end = start + dt.timedelta(days=days)
+    seq = _collect(symbol, interval, start, end, workers=1)
+    shard = _collect(symbol, interval, start, end, workers=4)
+    assert seq, "mock returned no klines"
+    assert shard == seq
+    opens = [r[0] for r in shard]
+    assert opens == sorted(set(opens))
+
+
+def test_sharded_stops_at_failed_window(monkeypatch):
+    symbol = "ADAUSDT"
+    start = _utc(listing_ms(symbol))
+    end = start + dt.timedelta(days=200)
+    seq = _collect(symbol, "1h", start, end, workers=1)
+    fail_at = seq[2500][0]
+    real = msc.request_json
+
+    def flaky(session, url, params, *args, **kwargs):
+        if params.get("startTime", 0) <= fail_at <= params.get("endTime", 0):
+            return None
+        return real(session, url, params, *args, **kwargs)
+
+    monkeypatch.setattr(msc, "request_json", flaky)
+    shard = _collect(symbol, "1h", start, end, workers=4)
+    # 실패 구간 앞까지만, 구멍 없이
+    assert 0 < len(shard) <= 2500
+    assert shard == seq[:len(shard)]